@@ -0,0 +1,39 @@
+"""add file content digest columns
+
+Revision ID: 3b7e9f2c4a1d
+Revises: 58d5027c1abd
+Create Date: 2026-10-17 10:12:03.418265
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3b7e9f2c4a1d"
+down_revision: Union[str, Sequence[str], None] = "58d5027c1abd"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """添加文件内容摘要字段（SHA-256 / MD5）"""
+    op.add_column(
+        "files", sa.Column("content_sha256", sa.String(length=64), nullable=True)
+    )
+    op.add_column(
+        "files", sa.Column("content_md5", sa.String(length=32), nullable=True)
+    )
+    op.create_index(
+        op.f("ix_files_content_sha256"), "files", ["content_sha256"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """删除文件内容摘要字段"""
+    op.drop_index(op.f("ix_files_content_sha256"), table_name="files")
+    op.drop_column("files", "content_md5")
+    op.drop_column("files", "content_sha256")
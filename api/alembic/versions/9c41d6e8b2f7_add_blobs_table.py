@@ -0,0 +1,71 @@
+"""add blobs table for content-addressed storage
+
+Revision ID: 9c41d6e8b2f7
+Revises: 3b7e9f2c4a1d
+Create Date: 2026-10-17 11:40:27.913504
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9c41d6e8b2f7"
+down_revision: Union[str, Sequence[str], None] = "3b7e9f2c4a1d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 初始迁移中 files.storage_path 的唯一约束未命名，SQLite 批量模式下按此规则命名后删除
+_SQLITE_NAMING_CONVENTION = {"uq": "uq_%(table_name)s_%(column_0_name)s"}
+
+
+def upgrade() -> None:
+    """添加 blobs 表，并允许多个文件共享同一 storage_path"""
+    op.create_table(
+        "blobs",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("storage_backend_id", sa.String(length=36), nullable=False),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("storage_path", sa.String(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["storage_backend_id"],
+            ["storage_backends.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "storage_backend_id", "sha256", name="uq_blobs_storage_backend_id_sha256"
+        ),
+    )
+    op.create_index(op.f("ix_blobs_id"), "blobs", ["id"], unique=False)
+
+    if op.get_bind().dialect.name == "sqlite":
+        with op.batch_alter_table(
+            "files", naming_convention=_SQLITE_NAMING_CONVENTION
+        ) as batch_op:
+            batch_op.drop_constraint("uq_files_storage_path", type_="unique")
+    else:
+        op.drop_constraint("files_storage_path_key", "files", type_="unique")
+    op.create_index(
+        op.f("ix_files_storage_path"), "files", ["storage_path"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """删除 blobs 表，恢复 storage_path 唯一约束（需先清理共享路径的文件记录）"""
+    op.drop_index(op.f("ix_files_storage_path"), table_name="files")
+    if op.get_bind().dialect.name == "sqlite":
+        with op.batch_alter_table(
+            "files", naming_convention=_SQLITE_NAMING_CONVENTION
+        ) as batch_op:
+            batch_op.create_unique_constraint("uq_files_storage_path", ["storage_path"])
+    else:
+        op.create_unique_constraint("files_storage_path_key", "files", ["storage_path"])
+    op.drop_index(op.f("ix_blobs_id"), table_name="blobs")
+    op.drop_table("blobs")
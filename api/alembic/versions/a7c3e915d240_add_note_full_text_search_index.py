@@ -0,0 +1,100 @@
+"""add note full-text search index
+
+Revision ID: a7c3e915d240
+Revises: f2a6d8b41c37
+Create Date: 2026-10-17 20:12:08.554871
+
+"""
+
+import logging
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a7c3e915d240"
+down_revision: Union[str, Sequence[str], None] = "f2a6d8b41c37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# notes 的主键不是整数，rowid 在 VACUUM 后可能变化，因此索引表单独保存 note_id，
+# 触发器按 note_id 的短语匹配定位索引记录（note_id 列同样建了 trigram 索引）。
+# 以后用批量模式重建 notes 表的迁移需要重新创建这些触发器
+_SQLITE_STATEMENTS = [
+    "CREATE VIRTUAL TABLE notes_fts USING fts5("
+    "note_id, title, content, tokenize = 'trigram')",
+    """
+    CREATE TRIGGER notes_fts_insert AFTER INSERT ON notes BEGIN
+        INSERT INTO notes_fts (note_id, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_fts_update AFTER UPDATE OF id, title, content ON notes BEGIN
+        DELETE FROM notes_fts
+        WHERE notes_fts MATCH 'note_id: "' || old.id || '"' AND note_id = old.id;
+        INSERT INTO notes_fts (note_id, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_fts_delete AFTER DELETE ON notes BEGIN
+        DELETE FROM notes_fts
+        WHERE notes_fts MATCH 'note_id: "' || old.id || '"' AND note_id = old.id;
+    END
+    """,
+    # 回填已有笔记
+    "INSERT INTO notes_fts (note_id, title, content) "
+    "SELECT id, title, content FROM notes",
+]
+
+
+def _sqlite_supports_trigram(bind) -> bool:
+    """trigram 分词需要 SQLite 3.34+ 且启用了 FTS5"""
+    try:
+        bind.exec_driver_sql(
+            "CREATE VIRTUAL TABLE temp.fts_probe USING fts5(x, tokenize = 'trigram')"
+        )
+        bind.exec_driver_sql("DROP TABLE temp.fts_probe")
+        return True
+    except sa.exc.OperationalError:
+        return False
+
+
+def upgrade() -> None:
+    """添加笔记全文搜索索引：SQLite 使用 FTS5 trigram，Postgres 使用 pg_trgm"""
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        if not _sqlite_supports_trigram(bind):
+            logger.warning(
+                "SQLite 不支持 FTS5 trigram 分词，笔记搜索将回退为 LIKE 扫描"
+            )
+            return
+        for statement in _SQLITE_STATEMENTS:
+            op.execute(statement)
+    elif bind.dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            "CREATE INDEX ix_notes_title_trgm ON notes USING gin (title gin_trgm_ops)"
+        )
+        op.execute(
+            "CREATE INDEX ix_notes_content_trgm ON notes "
+            "USING gin (content gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    """删除笔记全文搜索索引"""
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS notes_fts_delete")
+        op.execute("DROP TRIGGER IF EXISTS notes_fts_update")
+        op.execute("DROP TRIGGER IF EXISTS notes_fts_insert")
+        op.execute("DROP TABLE IF EXISTS notes_fts")
+    elif bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_notes_content_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_notes_title_trgm")
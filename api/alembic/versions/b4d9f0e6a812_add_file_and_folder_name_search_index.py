@@ -0,0 +1,100 @@
+"""add file and folder name search index
+
+Revision ID: b4d9f0e6a812
+Revises: a7c3e915d240
+Create Date: 2026-10-17 21:03:37.290416
+
+"""
+
+import logging
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b4d9f0e6a812"
+down_revision: Union[str, Sequence[str], None] = "a7c3e915d240"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# (索引表, 数据表, 索引表中的主键列, 名称列)，与笔记索引一样按主键短语匹配定位索引记录
+_INDEXES = [
+    ("files_fts", "files", "file_id", "filename"),
+    ("folders_fts", "folders", "folder_id", "name"),
+]
+
+
+def _sqlite_statements(fts: str, source: str, key: str, name: str) -> list:
+    locate = f"""
+        DELETE FROM {fts}
+        WHERE {fts} MATCH '{key}: "' || old.id || '"' AND {key} = old.id;
+    """
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({key}, {name}, tokenize = 'trigram')",
+        f"""
+        CREATE TRIGGER {fts}_insert AFTER INSERT ON {source} BEGIN
+            INSERT INTO {fts} ({key}, {name}) VALUES (new.id, new.{name});
+        END
+        """,
+        # 只在名称变化时更新，移动、软删除等操作不改动索引
+        f"""
+        CREATE TRIGGER {fts}_update AFTER UPDATE OF id, {name} ON {source} BEGIN
+            {locate}
+            INSERT INTO {fts} ({key}, {name}) VALUES (new.id, new.{name});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {fts}_delete AFTER DELETE ON {source} BEGIN
+            {locate}
+        END
+        """,
+        f"INSERT INTO {fts} ({key}, {name}) SELECT id, {name} FROM {source}",
+    ]
+
+
+def _sqlite_supports_trigram(bind) -> bool:
+    try:
+        bind.exec_driver_sql(
+            "CREATE VIRTUAL TABLE temp.fts_probe USING fts5(x, tokenize = 'trigram')"
+        )
+        bind.exec_driver_sql("DROP TABLE temp.fts_probe")
+        return True
+    except sa.exc.OperationalError:
+        return False
+
+
+def upgrade() -> None:
+    """添加文件名和文件夹名的 trigram 索引：SQLite 使用 FTS5，Postgres 使用 pg_trgm"""
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        if not _sqlite_supports_trigram(bind):
+            logger.warning(
+                "SQLite 不支持 FTS5 trigram 分词，文件名搜索将回退为 LIKE 扫描"
+            )
+            return
+        for index in _INDEXES:
+            for statement in _sqlite_statements(*index):
+                op.execute(statement)
+    elif bind.dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for _, source, _, name in _INDEXES:
+            op.execute(
+                f"CREATE INDEX ix_{source}_{name}_trgm ON {source} "
+                f"USING gin ({name} gin_trgm_ops)"
+            )
+
+
+def downgrade() -> None:
+    """删除文件名和文件夹名的 trigram 索引"""
+    bind = op.get_bind()
+    for fts, source, _, name in reversed(_INDEXES):
+        if bind.dialect.name == "sqlite":
+            for suffix in ("delete", "update", "insert"):
+                op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {fts}")
+        elif bind.dialect.name == "postgresql":
+            op.execute(f"DROP INDEX IF EXISTS ix_{source}_{name}_trgm")
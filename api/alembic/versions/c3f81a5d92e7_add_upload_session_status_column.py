@@ -0,0 +1,37 @@
+"""add upload session status column
+
+Revision ID: c3f81a5d92e7
+Revises: b4d9f0e6a812
+Create Date: 2026-10-18 09:41:26.517302
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c3f81a5d92e7"
+down_revision: Union[str, Sequence[str], None] = "b4d9f0e6a812"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """上传会话增加状态字段，完成上传前先抢占会话，避免并发完成"""
+    op.add_column(
+        "upload_sessions",
+        sa.Column(
+            "status",
+            sa.String(length=16),
+            nullable=False,
+            server_default="uploading",
+        ),
+    )
+
+
+def downgrade() -> None:
+    """删除上传会话状态字段"""
+    op.drop_column("upload_sessions", "status")
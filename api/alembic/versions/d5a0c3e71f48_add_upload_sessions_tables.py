@@ -0,0 +1,99 @@
+"""add upload_sessions tables
+
+Revision ID: d5a0c3e71f48
+Revises: 9c41d6e8b2f7
+Create Date: 2026-10-17 14:05:51.276390
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d5a0c3e71f48"
+down_revision: Union[str, Sequence[str], None] = "9c41d6e8b2f7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """添加分片上传会话表，文件大小改为 BigInteger 以支持超过 2GB 的文件"""
+    op.create_table(
+        "upload_sessions",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("user_id", sa.String(length=36), nullable=False),
+        sa.Column("storage_backend_id", sa.String(length=36), nullable=True),
+        sa.Column("folder_id", sa.String(length=36), nullable=True),
+        sa.Column("filename", sa.String(), nullable=False),
+        sa.Column("content_type", sa.String(), nullable=True),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("chunk_size", sa.Integer(), nullable=False),
+        sa.Column("storage_path", sa.String(), nullable=True),
+        sa.Column("s3_upload_id", sa.String(), nullable=True),
+        sa.Column("original_created_at", sa.DateTime(), nullable=True),
+        sa.Column("original_updated_at", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["storage_backend_id"],
+            ["storage_backends.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["folder_id"],
+            ["folders.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_upload_sessions_id"), "upload_sessions", ["id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_upload_sessions_expires_at"),
+        "upload_sessions",
+        ["expires_at"],
+        unique=False,
+    )
+    op.create_table(
+        "upload_session_parts",
+        sa.Column("session_id", sa.String(length=36), nullable=False),
+        sa.Column("part_number", sa.Integer(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("etag", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["session_id"], ["upload_sessions.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("session_id", "part_number"),
+    )
+
+    # SQLite 的 INTEGER 本身就是 64 位，只需修改其他数据库
+    if op.get_bind().dialect.name != "sqlite":
+        op.alter_column(
+            "files", "size", existing_type=sa.Integer(), type_=sa.BigInteger()
+        )
+        op.alter_column(
+            "blobs", "size", existing_type=sa.Integer(), type_=sa.BigInteger()
+        )
+
+
+def downgrade() -> None:
+    """删除分片上传会话表"""
+    if op.get_bind().dialect.name != "sqlite":
+        op.alter_column(
+            "blobs", "size", existing_type=sa.BigInteger(), type_=sa.Integer()
+        )
+        op.alter_column(
+            "files", "size", existing_type=sa.BigInteger(), type_=sa.Integer()
+        )
+    op.drop_table("upload_session_parts")
+    op.drop_index(op.f("ix_upload_sessions_expires_at"), table_name="upload_sessions")
+    op.drop_index(op.f("ix_upload_sessions_id"), table_name="upload_sessions")
+    op.drop_table("upload_sessions")
@@ -0,0 +1,88 @@
+"""add storage_migration_jobs table
+
+Revision ID: e8b14c7a9d25
+Revises: d5a0c3e71f48
+Create Date: 2026-10-17 16:20:13.508142
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e8b14c7a9d25"
+down_revision: Union[str, Sequence[str], None] = "d5a0c3e71f48"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """添加存储迁移任务表"""
+    op.create_table(
+        "storage_migration_jobs",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("source_backend_id", sa.String(length=36), nullable=True),
+        sa.Column("target_backend_id", sa.String(length=36), nullable=False),
+        sa.Column("user_id", sa.String(length=36), nullable=True),
+        sa.Column("file_type", sa.String(), nullable=True),
+        sa.Column("delete_source", sa.Integer(), nullable=False),
+        sa.Column("verify_checksum", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("cursor", sa.String(length=36), nullable=True),
+        sa.Column("total_files", sa.Integer(), nullable=False),
+        sa.Column("total_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("migrated_files", sa.Integer(), nullable=False),
+        sa.Column("migrated_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("failed_files", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("worker_id", sa.String(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("created_by", sa.String(length=36), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["source_backend_id"],
+            ["storage_backends.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["target_backend_id"],
+            ["storage_backends.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["created_by"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_storage_migration_jobs_id"),
+        "storage_migration_jobs",
+        ["id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_storage_migration_jobs_status"),
+        "storage_migration_jobs",
+        ["status"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """删除存储迁移任务表"""
+    op.drop_index(
+        op.f("ix_storage_migration_jobs_status"), table_name="storage_migration_jobs"
+    )
+    op.drop_index(
+        op.f("ix_storage_migration_jobs_id"), table_name="storage_migration_jobs"
+    )
+    op.drop_table("storage_migration_jobs")
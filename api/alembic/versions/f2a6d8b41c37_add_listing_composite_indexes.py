@@ -0,0 +1,54 @@
+"""add composite indexes for listing queries
+
+Revision ID: f2a6d8b41c37
+Revises: e8b14c7a9d25
+Create Date: 2026-10-17 19:05:42.116530
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f2a6d8b41c37"
+down_revision: Union[str, Sequence[str], None] = "e8b14c7a9d25"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (索引名, 表名, 列)
+# 查询条件中的 is_deleted 等值是绑定参数，SQLite 和 Postgres 的通用执行计划都无法据此
+# 选用 WHERE is_deleted = 0 的部分索引，因此把 is_deleted 作为复合索引的一列；
+# 末尾的 id 与游标分页的 (时间, id) 排序一致，列表查询不需要额外排序
+_INDEXES = [
+    (
+        "ix_files_user_deleted_folder_created",
+        "files",
+        ["user_id", "is_deleted", "folder_id", "created_at", "id"],
+    ),
+    ("ix_files_folder_id", "files", ["folder_id"]),
+    (
+        "ix_folders_user_deleted_parent_created",
+        "folders",
+        ["user_id", "is_deleted", "parent_id", "created_at", "id"],
+    ),
+    ("ix_folders_parent_id", "folders", ["parent_id"]),
+    ("ix_notes_user_updated", "notes", ["user_id", "updated_at", "id"]),
+    ("ix_file_note_association_note_id", "file_note_association", ["note_id"]),
+    ("ix_folder_note_association_note_id", "folder_note_association", ["note_id"]),
+]
+
+
+def upgrade() -> None:
+    """为文件、文件夹、笔记列表及笔记关联查询添加复合索引"""
+    for name, table, columns in _INDEXES:
+        op.create_index(name, table, columns, unique=False)
+    if op.get_bind().dialect.name == "sqlite":
+        # 更新统计信息，让查询规划器在多个候选索引中做出正确选择
+        op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """删除列表查询的复合索引"""
+    for name, table, _ in reversed(_INDEXES):
+        op.drop_index(name, table_name=table)
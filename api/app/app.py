@@ -15,15 +15,42 @@ from app.routers import (
     recycle,
     stats,
     storage_backends,
+    storage_migrations,
+    uploads,
     users,
 )
+from app.services.blob_store import run_blob_gc
+from app.services.io_scheduler import io_scheduler
+from app.services.storage import close_storage_backends
+from app.services.storage_backend import install_upload_spool, shutdown_disk_executor
+from app.services.storage_migration import (
+    run_migration_supervisor,
+    stop_migration_jobs,
+)
+from app.services.upload_sessions import run_session_gc
+
+# 上传文件落盘为有路径的临时文件，本地存储保存时可直接硬链接
+install_upload_spool()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Run migrations on startup
     await asyncio.to_thread(run_migrations)
+    # Periodically clean up expired upload sessions
+    session_gc_task = asyncio.create_task(run_session_gc())
+    # Periodically collect content-addressed blobs that lost their last reference
+    blob_gc_task = asyncio.create_task(run_blob_gc())
+    # Resume storage migration jobs interrupted by a restart
+    migration_task = asyncio.create_task(run_migration_supervisor())
     yield
+    session_gc_task.cancel()
+    blob_gc_task.cancel()
+    migration_task.cancel()
+    await stop_migration_jobs()
+    await close_storage_backends()
+    io_scheduler.shutdown()
+    shutdown_disk_executor()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -31,11 +58,13 @@ app = FastAPI(lifespan=lifespan)
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(files.router)
+app.include_router(uploads.router)
 app.include_router(notes.router)
 app.include_router(folders.router)
 app.include_router(recycle.router)
 app.include_router(stats.router)
 app.include_router(storage_backends.router)
+app.include_router(storage_migrations.router)
 
 
 # app.include_router(immich.router)
@@ -2,8 +2,27 @@ import uuid
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Table, Text
-from sqlalchemy.orm import Mapped, backref, mapped_column, relationship
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+    func,
+    select,
+)
+from sqlalchemy.orm import (
+    Mapped,
+    backref,
+    column_property,
+    mapped_column,
+    relationship,
+)
 
 from app.database import Base
 from app.services.storage import get_public_url
@@ -38,11 +57,26 @@ folder_note_association = Table(
         ForeignKey("notes.id", ondelete="CASCADE"),
         primary_key=True,
     ),
+    # 主键以 folder_id 开头，按笔记查找关联时需要单独的索引
+    Index("ix_folder_note_association_note_id", "note_id"),
 )
 
 
 class Folder(Base):
     __tablename__ = "folders"
+    __table_args__ = (
+        # 文件夹列表：按用户、删除状态和父文件夹过滤，按创建时间倒序（id 为相同时间时的次序）
+        Index(
+            "ix_folders_user_deleted_parent_created",
+            "user_id",
+            "is_deleted",
+            "parent_id",
+            "created_at",
+            "id",
+        ),
+        # 递归删除时按父文件夹查找子文件夹
+        Index("ix_folders_parent_id", "parent_id"),
+    )
 
     id = Column(
         String(36), primary_key=True, index=True, default=lambda: str(uuid.uuid4())
@@ -60,13 +94,22 @@ class Folder(Base):
     # Relationships
     files = relationship("File", back_populates="folder")
     subfolders = relationship("Folder", backref=backref("parent", remote_side=[id]))
+    # 笔记只在需要时显式 selectinload，列表只需要数量
     notes: Mapped[List["Note"]] = relationship(
-        secondary=folder_note_association, back_populates="folders", lazy="selectin"
+        secondary=folder_note_association, back_populates="folders"
+    )
+    # 关联笔记数：随查询一起计算的相关子查询，只扫描关联表的索引
+    _notes_count = column_property(
+        select(func.count())
+        .where(folder_note_association.c.folder_id == id)
+        .correlate_except(folder_note_association)
+        .scalar_subquery()
     )
 
     @property
     def notes_count(self) -> int:
-        return len(self.notes)
+        # 未从数据库加载的新对象没有该值
+        return self._notes_count or 0
 
 
 # Many-to-Many Association Table
@@ -85,11 +128,26 @@ file_note_association = Table(
         ForeignKey("notes.id", ondelete="CASCADE"),
         primary_key=True,
     ),
+    # 主键以 file_id 开头，按笔记查找关联时需要单独的索引
+    Index("ix_file_note_association_note_id", "note_id"),
 )
 
 
 class File(Base):
     __tablename__ = "files"
+    __table_args__ = (
+        # 文件列表：按用户、删除状态和文件夹过滤，按创建时间倒序；回收站和统计使用前缀
+        Index(
+            "ix_files_user_deleted_folder_created",
+            "user_id",
+            "is_deleted",
+            "folder_id",
+            "created_at",
+            "id",
+        ),
+        # 删除文件夹时按文件夹查找文件
+        Index("ix_files_folder_id", "folder_id"),
+    )
 
     id = Column(
         String(36), primary_key=True, index=True, default=lambda: str(uuid.uuid4())
@@ -100,15 +158,22 @@ class File(Base):
         String(36), ForeignKey("storage_backends.id"), nullable=True
     )
     filename: Mapped[str] = mapped_column(String, index=True)
-    storage_path: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    # 内容寻址存储下多个文件可共享同一个 storage_path（见 Blob）
+    storage_path: Mapped[str] = mapped_column(String, nullable=False, index=True)
     mime_type: Mapped[str] = mapped_column(String, nullable=False)
-    size: Mapped[int] = mapped_column(Integer, default=0)
+    size: Mapped[int] = mapped_column(BigInteger, default=0)
     file_type: Mapped[str] = mapped_column(
         String, nullable=True, index=True
     )  # text, document, image, video, binary
     file_type_confidence: Mapped[str] = mapped_column(
         String, nullable=True
     )  # high, medium, low
+    content_sha256: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True, index=True
+    )  # 文件内容 SHA-256（十六进制）
+    content_md5: Mapped[Optional[str]] = mapped_column(
+        String(32), nullable=True
+    )  # 文件内容 MD5（十六进制，可与 S3 ETag 比对）
     original_created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow
     )
@@ -125,12 +190,19 @@ class File(Base):
 
     # Relationship to Notes
     notes: Mapped[List["Note"]] = relationship(
-        secondary=file_note_association, back_populates="files", lazy="selectin"
+        secondary=file_note_association, back_populates="files"
+    )
+    # 关联笔记数，同 Folder._notes_count
+    _notes_count = column_property(
+        select(func.count())
+        .where(file_note_association.c.file_id == id)
+        .correlate_except(file_note_association)
+        .scalar_subquery()
     )
 
     @property
     def notes_count(self) -> int:
-        return len(self.notes)
+        return self._notes_count or 0
 
     @property
     def download_url(self) -> str:
@@ -143,6 +215,10 @@ class File(Base):
 
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        # 笔记列表：按用户过滤，按更新时间倒序
+        Index("ix_notes_user_updated", "user_id", "updated_at", "id"),
+    )
 
     id = Column(
         String(36), primary_key=True, index=True, default=lambda: str(uuid.uuid4())
@@ -197,3 +273,141 @@ class StorageBackendConfig(Base):
     created_by: Mapped[Optional[str]] = mapped_column(
         String(36), ForeignKey("users.id"), nullable=True
     )
+
+
+class Blob(Base):
+    """内容寻址存储的物理对象，ref_count 为引用它的文件记录数"""
+
+    __tablename__ = "blobs"
+    __table_args__ = (
+        UniqueConstraint(
+            "storage_backend_id", "sha256", name="uq_blobs_storage_backend_id_sha256"
+        ),
+    )
+
+    id = Column(
+        String(36), primary_key=True, index=True, default=lambda: str(uuid.uuid4())
+    )
+    storage_backend_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("storage_backends.id"), nullable=False
+    )
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    storage_path: Mapped[str] = mapped_column(String, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, default=0)
+    ref_count: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+class UploadSession(Base):
+    """分片上传会话"""
+
+    __tablename__ = "upload_sessions"
+
+    id = Column(
+        String(36), primary_key=True, index=True, default=lambda: str(uuid.uuid4())
+    )
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    storage_backend_id = Column(
+        String(36), ForeignKey("storage_backends.id"), nullable=True
+    )
+    folder_id = Column(String(36), ForeignKey("folders.id"), nullable=True)
+    filename: Mapped[str] = mapped_column(String, nullable=False)  # 可包含相对路径
+    content_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    chunk_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    # S3 分片上传：对象键和 UploadId（本地存储为空）
+    storage_path: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    s3_upload_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # uploading: 接收分片中；completing: 正在完成（写入存储并创建文件记录）
+    status: Mapped[str] = mapped_column(
+        String(16), nullable=False, default="uploading", server_default="uploading"
+    )
+    original_created_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, nullable=True
+    )
+    original_updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, nullable=True
+    )
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    parts: Mapped[List["UploadSessionPart"]] = relationship(
+        back_populates="session",
+        passive_deletes=True,
+        order_by="UploadSessionPart.part_number",
+    )
+
+    @property
+    def part_count(self) -> int:
+        return max((self.size + self.chunk_size - 1) // self.chunk_size, 1)
+
+
+class UploadSessionPart(Base):
+    """分片上传会话中已接收的分片"""
+
+    __tablename__ = "upload_session_parts"
+
+    session_id = Column(
+        String(36),
+        ForeignKey("upload_sessions.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    part_number: Mapped[int] = mapped_column(Integer, primary_key=True)  # 从0开始
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    etag: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # S3 分片ETag
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    session: Mapped["UploadSession"] = relationship(back_populates="parts")
+
+
+class StorageMigrationJob(Base):
+    """存储迁移任务：把符合条件的文件从一个存储后端迁移到另一个后端"""
+
+    __tablename__ = "storage_migration_jobs"
+
+    id = Column(
+        String(36), primary_key=True, index=True, default=lambda: str(uuid.uuid4())
+    )
+    # 源后端为空表示未关联存储后端的旧文件（默认本地存储）
+    source_backend_id = Column(
+        String(36), ForeignKey("storage_backends.id"), nullable=True
+    )
+    target_backend_id = Column(
+        String(36), ForeignKey("storage_backends.id"), nullable=False
+    )
+    # 过滤条件（为空表示不限）
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=True)
+    file_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    delete_source: Mapped[bool] = mapped_column(Integer, default=1)  # 0/1
+    verify_checksum: Mapped[bool] = mapped_column(Integer, default=1)  # 0/1
+    # pending / running / paused / completed / failed / cancelled
+    status: Mapped[str] = mapped_column(String, nullable=False, index=True)
+
+    # 进度：按文件ID顺序处理，cursor 为已处理的最后一个文件ID
+    cursor: Mapped[Optional[str]] = mapped_column(String(36), nullable=True)
+    total_files: Mapped[int] = mapped_column(Integer, default=0)
+    total_bytes: Mapped[int] = mapped_column(BigInteger, default=0)
+    migrated_files: Mapped[int] = mapped_column(Integer, default=0)
+    migrated_bytes: Mapped[int] = mapped_column(BigInteger, default=0)
+    failed_files: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # 执行该任务的进程及其心跳，心跳过期的任务由其他进程接管
+    worker_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    created_by: Mapped[Optional[str]] = mapped_column(
+        String(36), ForeignKey("users.id"), nullable=True
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
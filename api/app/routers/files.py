@@ -1,102 +1,100 @@
 import asyncio
+import math
 import os
 import uuid
-from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
 from urllib.parse import quote
 
+import httpx
 from fastapi import APIRouter, Depends
 from fastapi import File as FastAPIFile
-from fastapi import Form, HTTPException, Query, UploadFile
-from fastapi.responses import FileResponse, RedirectResponse
-from sqlalchemy import func, or_, select
+from fastapi import Form, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
+from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
 
 from app.database import get_async_session
-from app.models import File, Folder, User
+from app.models import File, Folder, StorageBackendConfig, User
 from app.schemas import (
+    BatchConfirmRequest,
     BatchFileMove,
     BatchFileOperation,
+    BatchPresignRequest,
     FileMove,
     FileRename,
     FileResponseModel,
+    MultipartUploadComplete,
+    MultipartUploadInitiate,
+    MultipartUploadPresign,
+    MultipartUploadRef,
+)
+from app.services.file_records import (
+    build_file_record,
+    insert_file_records,
+    resolve_folder_paths,
 )
 from app.services.file_type_detector import FileTypeDetector
+from app.services.http_cache import (
+    FILE_CACHE_CONTROL,
+    PROXY_REQUEST_HEADERS,
+    PROXY_RESPONSE_HEADERS,
+    file_etag,
+    http_date,
+    is_not_modified,
+)
+from app.services.io_scheduler import io_scheduler
+from app.services.pagination import paginate
+from app.services.search_index import file_name_condition
 from app.services.security import get_current_user
 from app.services.storage import (
-    file_exists,
+    afile_exists,
     get_default_storage_backend,
     get_storage_backend_by_id,
     save_file,
 )
-from app.services.storage_backend import S3StorageBackend
+from app.services.storage_backend import (
+    DETECTION_HEAD_SIZE,
+    S3_PROXY_CHUNK_SIZE,
+    S3StorageBackend,
+)
+from app.services.upload_sessions import resolve_chunk_size
 
 router = APIRouter(prefix="/api/v1/files", tags=["Files"])
 
-UPLOAD_DIR = "data/uploads"
-
-# 创建线程池执行器用于处理同步IO操作（文件保存）
-# max_workers 设置原则：
-# - IO密集型任务：推荐 CPU核心数 × (2-5)
-# - 本地存储：CPU核心数 × 2-3
-# - 网络存储(S3)：CPU核心数 × 3-5
-# - 可通过环境变量 FILE_UPLOAD_WORKERS 自定义
-_cpu_count = os.cpu_count() or 4
-_max_workers = int(os.getenv("FILE_UPLOAD_WORKERS", str(_cpu_count * 3)))
-_file_io_executor = ThreadPoolExecutor(
-    max_workers=_max_workers, thread_name_prefix="file_io"
-)
 
+async def _get_direct_upload_backend(
+    db: AsyncSession,
+) -> Tuple[S3StorageBackend, str]:
+    """获取默认存储后端，并检查其为 S3 且允许客户端直传"""
+    backend, backend_id = await get_default_storage_backend(db)
 
-async def get_or_create_folder_by_path(
-    db: AsyncSession, user_id: str, parent_folder_id: Optional[str], folder_path: str
-) -> Optional[str]:
-    """
-    根据路径创建或获取文件夹，返回最终文件夹的ID
-    folder_path: 相对路径，如 "folder1/folder2"
-    """
-    if not folder_path:
-        return parent_folder_id
-
-    # 分割路径
-    path_parts = folder_path.split("/")
-    current_parent_id = parent_folder_id
-
-    for folder_name in path_parts:
-        if not folder_name:
-            continue
-
-        # 查找是否已存在该文件夹
-        stmt = select(Folder).where(
-            Folder.user_id == user_id,
-            Folder.name == folder_name,
-            Folder.is_deleted == 0,
-        )
+    # 检查是否为S3后端并且允许直传
+    if not isinstance(backend, S3StorageBackend):
+        raise HTTPException(status_code=400, detail="当前存储后端不支持客户端直传")
 
-        if current_parent_id is not None:
-            stmt = stmt.where(Folder.parent_id == current_parent_id)
-        else:
-            stmt = stmt.where(Folder.parent_id.is_(None))
+    # 检查是否允许直传（从数据库配置读取）
+    stmt = select(StorageBackendConfig).where(StorageBackendConfig.id == backend_id)
+    result = await db.execute(stmt)
+    backend_config = result.scalar_one_or_none()
 
-        result = await db.execute(stmt)
-        folder = result.scalar_one_or_none()
+    if not backend_config or not backend_config.allow_client_direct_upload:
+        raise HTTPException(status_code=400, detail="当前存储后端未启用客户端直传功能")
+    _check_not_content_addressed(backend)
 
-        if not folder:
-            # 创建新文件夹
-            folder = Folder(
-                user_id=user_id,
-                parent_id=current_parent_id,
-                name=folder_name,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow(),
-            )
-            db.add(folder)
-            await db.flush()  # 立即获取ID
+    return backend, backend_id
 
-        current_parent_id = folder.id
 
-    return current_parent_id
+def _check_not_content_addressed(backend: S3StorageBackend) -> None:
+    """
+    客户端直传的对象不经过服务端，无法计算内容摘要，也不在 blobs/ 下按哈希存放，
+    内容寻址存储不支持直传和 S3 分片上传
+    """
+    if backend.content_addressed:
+        raise HTTPException(
+            status_code=400, detail="内容寻址存储不支持客户端直传，请使用服务端上传"
+        )
 
 
 @router.post("/presigned-upload-url")
@@ -113,22 +111,7 @@ async def get_presigned_upload_url(
     Returns:
         presigned_url: 预签名上传URL及相关信息
     """
-    # 获取默认存储后端
-    backend, backend_id = await get_default_storage_backend(db)
-
-    # 检查是否为S3后端并且允许直传
-    if not isinstance(backend, S3StorageBackend):
-        raise HTTPException(status_code=400, detail="当前存储后端不支持客户端直传")
-
-    # 检查是否允许直传（从数据库配置读取）
-    from app.models import StorageBackendConfig
-
-    stmt = select(StorageBackendConfig).where(StorageBackendConfig.id == backend_id)
-    result = await db.execute(stmt)
-    backend_config = result.scalar_one_or_none()
-
-    if not backend_config or not backend_config.allow_client_direct_upload:
-        raise HTTPException(status_code=400, detail="当前存储后端未启用客户端直传功能")
+    backend, backend_id = await _get_direct_upload_backend(db)
 
     try:
         # 生成预签名URL
@@ -178,10 +161,13 @@ async def confirm_direct_upload(
     backend = await get_storage_backend_by_id(db, storage_backend_id)
     if not isinstance(backend, S3StorageBackend):
         raise HTTPException(status_code=400, detail="无效的存储后端")
+    _check_not_content_addressed(backend)
 
     # 验证文件是否真的存在于S3
-    if not backend.exists(s3_key):
+    meta = await backend.astat(s3_key)
+    if meta is None:
         raise HTTPException(status_code=400, detail="文件上传未完成或不存在")
+    backend.meta_cache.put(s3_key, meta)
 
     # 检测文件类型
     file_type_info = FileTypeDetector.detect(
@@ -226,135 +212,426 @@ async def confirm_direct_upload(
     return file
 
 
-@router.post("/", response_model=List[FileResponseModel])
-async def upload_files(
-    folder_id: Optional[str] = Query(None),
-    files: List[UploadFile] = FastAPIFile(...),
-    original_created_at: Optional[List[datetime]] = Query(None),
-    original_updated_at: Optional[List[datetime]] = Query(None),
+# 同一前缀下待确认的对象数达到该值时，改用一次列举代替逐个 HEAD
+DIRECT_UPLOAD_LIST_THRESHOLD = 50
+
+
+async def _get_direct_upload_sizes(
+    backend: S3StorageBackend, backend_id: str, s3_keys: List[str]
+) -> dict:
+    """
+    批量确认对象已上传，返回 {对象键: 实际大小}，不存在的对象不在结果中
+    按目录前缀分组：对象多的前缀列举一次，其余并发 HEAD
+    """
+    by_prefix = {}
+    for key in s3_keys:
+        by_prefix.setdefault(os.path.dirname(key) + "/", []).append(key)
+
+    list_prefixes = [
+        prefix
+        for prefix, keys in by_prefix.items()
+        if len(keys) >= DIRECT_UPLOAD_LIST_THRESHOLD
+    ]
+    head_keys = [
+        key
+        for prefix, keys in by_prefix.items()
+        if len(keys) < DIRECT_UPLOAD_LIST_THRESHOLD
+        for key in keys
+    ]
+
+    # 列举走同步客户端（分页），HEAD 直接使用异步客户端并发发出
+    async with io_scheduler.admit(backend_id, backend, len(list_prefixes)) as admission:
+        listed, heads = await asyncio.gather(
+            asyncio.gather(
+                *[
+                    admission.run(backend.list_object_sizes, prefix)
+                    for prefix in list_prefixes
+                ]
+            ),
+            asyncio.gather(*[backend.aget_object_size(key) for key in head_keys]),
+        )
+
+    wanted = set(s3_keys)
+    sizes = {}
+    for prefix_sizes in listed:
+        sizes.update({k: v for k, v in prefix_sizes.items() if k in wanted})
+    sizes.update({k: v for k, v in zip(head_keys, heads) if v is not None})
+    return sizes
+
+
+@router.post("/presigned-upload-urls")
+async def get_presigned_upload_urls(
+    data: BatchPresignRequest,
     db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
-    """优化的文件上传：先处理文件IO，再批量插入数据库"""
-    loop = asyncio.get_event_loop()
+    """
+    批量获取S3预签名上传URL，顺序与请求一致
+    存储后端配置只查询一次，所有URL共用同一个客户端签名
+    """
+    backend, backend_id = await _get_direct_upload_backend(db)
+    user_id = str(current_user.id)
 
-    # 第一阶段：并行处理文件夹结构和文件保存（IO密集）
-    # 这部分不持有数据库连接，避免阻塞其他请求
-    file_data_list = []
-    folder_cache = {}  # 缓存已创建的文件夹ID
+    def presign_all():
+        return [
+            backend.generate_presigned_upload_url(
+                filename=os.path.basename(item.filename),
+                user_id=user_id,
+                content_type=item.content_type,
+            )
+            for item in data.files
+        ]
 
-    # 先单独处理文件夹结构（需要数据库操作）
-    for i, file in enumerate(files):
-        relative_path = file.filename or ""
-        dir_path = os.path.dirname(relative_path) if relative_path else ""
+    try:
+        presigned = await io_scheduler.run(backend_id, backend, presign_all)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"生成预签名URL失败: {str(e)}")
 
-        if dir_path and dir_path not in folder_cache:
-            target_folder_id = await get_or_create_folder_by_path(
-                db, str(current_user.id), folder_id, dir_path
+    return {
+        "storage_backend_id": backend_id,
+        "files": [
+            {
+                "filename": item.filename,
+                "presigned_url": presigned_data["url"],
+                "fields": presigned_data["fields"],
+                "s3_key": presigned_data["s3_key"],
+                "bucket": presigned_data["bucket"],
+            }
+            for item, presigned_data in zip(data.files, presigned)
+        ],
+    }
+
+
+@router.post("/confirm-direct-uploads", response_model=List[FileResponseModel])
+async def confirm_direct_uploads(
+    data: BatchConfirmRequest,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    批量确认客户端直传完成，并批量创建文件记录
+    任一对象不存在时不创建任何记录，返回 400 和缺失的对象键
+    """
+    user_id = str(current_user.id)
+    backend = await get_storage_backend_by_id(db, data.storage_backend_id)
+    if not isinstance(backend, S3StorageBackend):
+        raise HTTPException(status_code=400, detail="无效的存储后端")
+    _check_not_content_addressed(backend)
+    if any(not item.s3_key.startswith(f"{user_id}/") for item in data.files):
+        raise HTTPException(status_code=403, detail="无权确认其他用户的对象")
+
+    try:
+        sizes = await _get_direct_upload_sizes(
+            backend, data.storage_backend_id, [item.s3_key for item in data.files]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"验证上传文件失败: {str(e)}")
+
+    missing = [item.s3_key for item in data.files if item.s3_key not in sizes]
+    if missing:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "文件上传未完成或不存在", "missing": missing},
+        )
+
+    # 文件名中的相对路径按层批量创建文件夹
+    folder_map = await resolve_folder_paths(
+        db,
+        user_id,
+        data.folder_id,
+        {os.path.dirname(item.filename) for item in data.files} - {""},
+    )
+
+    records = []
+    for item in data.files:
+        dir_path = os.path.dirname(item.filename)
+        filename = os.path.basename(item.filename)
+        records.append(
+            build_file_record(
+                user_id=user_id,
+                folder_id=folder_map[dir_path] if dir_path else data.folder_id,
+                filename=filename,
+                storage_path=item.s3_key,
+                storage_backend_id=data.storage_backend_id,
+                size=sizes[item.s3_key],
+                # 直传模式下无法获取文件内容，只按文件名和 MIME 提示检测类型
+                file_type_info=FileTypeDetector.detect(
+                    filename=filename, file_content=None, mime_hint=item.content_type
+                ),
+                original_created_at=item.original_created_at,
+                original_updated_at=item.original_updated_at,
             )
-            folder_cache[dir_path] = target_folder_id
+        )
 
-    # 提交文件夹创建（快速释放连接）
-    await db.commit()
+    return await insert_file_records(db, records, backend, data.storage_backend_id)
+
+
+async def _get_multipart_backend(
+    db: AsyncSession, upload: MultipartUploadRef, user_id: str
+) -> S3StorageBackend:
+    """校验分片上传所属的存储后端和对象键（只能操作自己目录下的对象）"""
+    if not upload.s3_key.startswith(f"{user_id}/"):
+        raise HTTPException(status_code=403, detail="无权操作该上传")
+    backend = await get_storage_backend_by_id(db, upload.storage_backend_id)
+    if not isinstance(backend, S3StorageBackend):
+        raise HTTPException(status_code=400, detail="无效的存储后端")
+    return backend
 
-    # 获取默认存储后端（异步）
-    backend, backend_id = await get_default_storage_backend(db)
 
-    # 第二阶段：并行保存文件到存储（不持有数据库连接）
-    async def save_file_async(file: UploadFile, index: int):
-        """在线程池中异步保存文件"""
-        relative_path = file.filename or ""
-        actual_filename = (
-            os.path.basename(relative_path) if relative_path else file.filename
+@router.post("/multipart-upload/initiate")
+async def initiate_multipart_upload(
+    data: MultipartUploadInitiate,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    创建 S3 分片上传，返回每个分片的预签名 PUT URL
+    客户端可并行把分片直接上传到存储桶，记录每个分片响应的 ETag 后调用 complete
+    """
+    backend, backend_id = await _get_direct_upload_backend(db)
+
+    part_size = resolve_chunk_size(data.size, data.part_size, is_s3=True)
+    part_count = max(math.ceil(data.size / part_size), 1)
+
+    try:
+        async with io_scheduler.admit(backend_id, backend, 2) as admission:
+            s3_key, upload_id = await admission.run(
+                backend.create_multipart_upload,
+                os.path.basename(data.filename),
+                str(current_user.id),
+                data.content_type,
+            )
+            urls = await admission.run(
+                backend.generate_presigned_part_urls,
+                s3_key,
+                upload_id,
+                list(range(1, part_count + 1)),
+            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "s3_key": s3_key,
+        "upload_id": upload_id,
+        "storage_backend_id": backend_id,
+        "part_size": part_size,
+        "part_count": part_count,
+        "parts": [
+            {"part_number": part_number, "url": url}
+            for part_number, url in urls.items()
+        ],
+    }
+
+
+@router.post("/multipart-upload/presign")
+async def presign_multipart_upload_parts(
+    data: MultipartUploadPresign,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """重新签发指定分片的上传 URL（URL 过期或断点续传时使用）"""
+    backend = await _get_multipart_backend(db, data, str(current_user.id))
+    # 最多 10000 个分片，签名耗时不能阻塞事件循环
+    try:
+        urls = await io_scheduler.run(
+            data.storage_backend_id,
+            backend,
+            backend.generate_presigned_part_urls,
+            data.s3_key,
+            data.upload_id,
+            sorted(set(data.part_numbers)),
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "parts": [
+            {"part_number": part_number, "url": url}
+            for part_number, url in urls.items()
+        ]
+    }
+
+
+@router.get("/multipart-upload/parts")
+async def list_multipart_upload_parts(
+    s3_key: str = Query(..., description="S3对象键"),
+    upload_id: str = Query(..., description="分片上传ID"),
+    storage_backend_id: str = Query(..., description="存储后端ID"),
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """列出已上传到存储桶的分片，用于断点续传"""
+    upload = MultipartUploadRef(
+        s3_key=s3_key, upload_id=upload_id, storage_backend_id=storage_backend_id
+    )
+    backend = await _get_multipart_backend(db, upload, str(current_user.id))
+    try:
+        parts = await io_scheduler.run(
+            storage_backend_id, backend, backend.list_multipart_parts, s3_key, upload_id
         )
-        dir_path = os.path.dirname(relative_path) if relative_path else ""
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"parts": parts}
 
-        target_folder_id = folder_cache.get(dir_path) if dir_path else folder_id
 
-        # 在线程池中执行同步IO
-        storage_path, size, file_type_info = await loop.run_in_executor(
-            _file_io_executor, save_file, file, backend, str(current_user.id)
+@router.post("/multipart-upload/complete", response_model=FileResponseModel)
+async def complete_multipart_upload(
+    data: MultipartUploadComplete,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """合并分片并创建文件记录（与 confirm-direct-upload 相同）"""
+    user_id = str(current_user.id)
+    backend = await _get_multipart_backend(db, data, user_id)
+    _check_not_content_addressed(backend)
+
+    parts = [
+        {"PartNumber": part.part_number, "ETag": part.etag}
+        for part in sorted(data.parts, key=lambda part: part.part_number)
+    ]
+    try:
+        await io_scheduler.run(
+            data.storage_backend_id,
+            backend,
+            backend.complete_multipart_upload,
+            data.s3_key,
+            data.upload_id,
+            parts,
         )
+        # 合并后读取对象大小和文件头，用于记录大小和检测类型
+        size = await backend.aget_object_size(data.s3_key)
+        head = await backend.aget_object(data.s3_key, (0, DETECTION_HEAD_SIZE - 1))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        # 处理时间戳
-        created_at = datetime.utcnow()
-        if (
-            original_created_at
-            and index < len(original_created_at)
-            and original_created_at[index]
-        ):
-            created_at = original_created_at[index]
-            if created_at.tzinfo is not None:
-                created_at = created_at.utctimetuple()
-                created_at = datetime(*created_at[:6])
-
-        updated_at = datetime.utcnow()
-        if (
-            original_updated_at
-            and index < len(original_updated_at)
-            and original_updated_at[index]
-        ):
-            updated_at = original_updated_at[index]
-            if updated_at.tzinfo is not None:
-                updated_at = updated_at.utctimetuple()
-                updated_at = datetime(*updated_at[:6])
+    # 与批量确认相同：文件名中的相对路径映射为文件夹
+    dir_path = os.path.dirname(data.filename)
+    filename = os.path.basename(data.filename)
+    folder_id = data.folder_id
+    if dir_path:
+        folder_map = await resolve_folder_paths(db, user_id, data.folder_id, {dir_path})
+        folder_id = folder_map[dir_path]
+
+    file_type_info = FileTypeDetector.detect(
+        filename=filename, file_content=head, mime_hint=data.content_type
+    )
+    record = build_file_record(
+        user_id=user_id,
+        folder_id=folder_id,
+        filename=filename,
+        storage_path=data.s3_key,
+        storage_backend_id=data.storage_backend_id,
+        size=size,
+        file_type_info=file_type_info,
+        original_created_at=data.original_created_at,
+        original_updated_at=data.original_updated_at,
+    )
+    files = await insert_file_records(db, [record], backend, data.storage_backend_id)
+    return files[0]
 
-        return {
-            "user_id": str(current_user.id),
-            "folder_id": target_folder_id,
-            "filename": actual_filename,
-            "storage_path": storage_path,
-            "storage_backend_id": backend_id,
-            "mime_type": file_type_info.get("mime_type"),
-            "size": size,
-            "file_type": file_type_info.get("category"),
-            "file_type_confidence": file_type_info.get("confidence"),
-            "original_created_at": created_at,
-            "original_updated_at": updated_at,
-        }
 
-    # 并行保存所有文件
-    file_data_list = await asyncio.gather(
-        *[save_file_async(file, i) for i, file in enumerate(files)]
+@router.post("/multipart-upload/abort")
+async def abort_multipart_upload(
+    data: MultipartUploadRef,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """中止分片上传，删除已上传的分片"""
+    backend = await _get_multipart_backend(db, data, str(current_user.id))
+    aborted = await io_scheduler.run(
+        data.storage_backend_id,
+        backend,
+        backend.abort_multipart_upload,
+        data.s3_key,
+        data.upload_id,
     )
+    if not aborted:
+        raise HTTPException(status_code=400, detail="中止分片上传失败")
+    return {"message": "Multipart upload aborted"}
 
-    # 第三阶段：批量插入数据库（快速操作）
-    # 使用bulk_insert_mappings进行高效批量插入
-    if file_data_list:
-        # 添加创建时间、更新时间和ID
-        now = datetime.utcnow()
-        for data in file_data_list:
-            data["id"] = str(uuid.uuid4())
-            data["created_at"] = now
-            data["updated_at"] = now
-            data["is_deleted"] = 0
-
-        # 批量插入（非常快）
-        # 使用 File.__mapper__ 来获取正确的 mapper 对象
-        from sqlalchemy import inspect
-
-        file_mapper = inspect(File)
-        await db.run_sync(
-            lambda session: session.bulk_insert_mappings(file_mapper, file_data_list)
+
+@router.post("/", response_model=List[FileResponseModel])
+async def upload_files(
+    folder_id: Optional[str] = Query(None),
+    files: List[UploadFile] = FastAPIFile(...),
+    original_created_at: Optional[List[datetime]] = Query(None),
+    original_updated_at: Optional[List[datetime]] = Query(None),
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """优化的文件上传：先处理文件IO，再批量插入数据库"""
+    # 获取默认存储后端（异步）
+    backend, backend_id = await get_default_storage_backend(db)
+
+    # 先为所有文件申请 I/O 排队名额，队列已满时直接返回 429，不做任何处理
+    async with io_scheduler.admit(backend_id, backend, len(files)) as admission:
+        # 第一阶段：并行处理文件夹结构和文件保存（IO密集）
+        # 这部分不持有数据库连接，避免阻塞其他请求
+        # 一次性解析请求中所有目录（按层批量查询和创建）
+        dir_paths = {
+            os.path.dirname(file.filename) for file in files if file.filename
+        } - {""}
+        folder_cache = await resolve_folder_paths(
+            db, str(current_user.id), folder_id, dir_paths
         )
+
+        # 提交文件夹创建（快速释放连接）
         await db.commit()
 
-    # 查询返回插入的记录（可选优化：如果不需要立即返回完整对象，可以只返回基本信息）
-    if file_data_list:
-        # 获取刚插入的文件（通过storage_path匹配）
-        storage_paths = [data["storage_path"] for data in file_data_list]
-        stmt = (
-            select(File)
-            .where(
-                File.storage_path.in_(storage_paths), File.user_id == current_user.id
+        # 第二阶段：并行保存文件到存储（不持有数据库连接）
+        async def save_file_async(file: UploadFile, index: int):
+            """在存储后端的 I/O 线程池中异步保存文件"""
+            relative_path = file.filename or ""
+            actual_filename = (
+                os.path.basename(relative_path) if relative_path else file.filename
+            )
+            dir_path = os.path.dirname(relative_path) if relative_path else ""
+
+            target_folder_id = folder_cache.get(dir_path) if dir_path else folder_id
+
+            # 小文件走快速通道，大文件按在途字节预算排队
+            storage_path, size, file_type_info = await admission.run(
+                save_file, file, backend, str(current_user.id), size=file.size or 0
+            )
+
+            return build_file_record(
+                user_id=str(current_user.id),
+                folder_id=target_folder_id,
+                filename=actual_filename,
+                storage_path=storage_path,
+                storage_backend_id=backend_id,
+                size=size,
+                file_type_info=file_type_info,
+                original_created_at=(
+                    original_created_at[index]
+                    if original_created_at and index < len(original_created_at)
+                    else None
+                ),
+                original_updated_at=(
+                    original_updated_at[index]
+                    if original_updated_at and index < len(original_updated_at)
+                    else None
+                ),
             )
-            .order_by(File.created_at.desc())
+
+        # 并行保存所有文件
+        file_data_list = await asyncio.gather(
+            *[save_file_async(file, i) for i, file in enumerate(files)]
         )
-        result = await db.execute(stmt)
-        results = result.scalars().all()
-        return list(results)[: len(files)]  # 返回对应数量的结果
 
-    return []
+    # 第三阶段：批量插入数据库（快速操作）
+    return await insert_file_records(db, list(file_data_list), backend, backend_id)
 
 
 @router.put("/{file_id}/move", response_model=FileResponseModel)
@@ -412,14 +689,15 @@ async def list_files(
     ),
     page: int = Query(1, ge=1, description="页码，从1开始"),
     page_size: int = Query(10, ge=1, le=100, description="每页条数，默认10"),
+    cursor: Optional[str] = Query(
+        None, description="分页游标，传入后使用游标分页（空字符串表示第一页）"
+    ),
+    include_total: bool = Query(False, description="游标分页时是否返回总数"),
     db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
     """获取当前用户的文件列表（分页）"""
 
-    # 计算偏移量
-    offset = (page - 1) * page_size
-
     stmt = select(File).where(File.user_id == current_user.id, File.is_deleted == 0)
 
     if folder_id:
@@ -428,7 +706,7 @@ async def list_files(
         stmt = stmt.where(File.folder_id.is_(None))
 
     if q:
-        stmt = stmt.where(File.filename.ilike(f"%{q}%"))
+        stmt = stmt.where(await file_name_condition(db, q))
 
     if file_type:
         if file_type == "image":
@@ -444,23 +722,12 @@ async def list_files(
                 or_(File.mime_type.like("%document%"), File.mime_type.like("%word%"))
             )
 
-    query = stmt.offset(offset).limit(page_size).order_by(File.created_at.desc())
-
-    # 获取总数
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total_result = await db.execute(count_stmt)
-    total = total_result.scalar()
-
-    # 获取分页数据
-
-    result = await db.execute(query)
-    files = result.scalars().all()
+    files, meta = await paginate(
+        db, stmt, File.created_at, File.id, page, page_size, cursor, include_total
+    )
 
     return {
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size,
+        **meta,
         "data": [
             {
                 "id": f.id,
@@ -496,13 +763,68 @@ async def get_file_metadata(
     return file
 
 
-@router.get("/download/{file_id}/{filename}")
-async def download_file(
-    file_id: str,
-    filename: Optional[str] = None,
-    session: AsyncSession = Depends(get_async_session),
-):
-    """下载文件"""
+async def _proxy_s3_file(
+    request: Request,
+    file_record: File,
+    backend: S3StorageBackend,
+    disposition: str,
+) -> Response:
+    """
+    代理模式：把 S3 对象流式转发给客户端，按固定大小分块，内存占用与对象大小无关
+    Range 和条件请求头转发给 S3，206 / 304 / 412 / 416 状态原样返回
+    """
+    storage_path = file_record.storage_path
+    forward_headers = {
+        name: request.headers[name]
+        for name in PROXY_REQUEST_HEADERS
+        if name in request.headers
+    }
+    try:
+        upstream = await backend.aopen_object(storage_path, forward_headers)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"从 S3 读取文件失败: {str(e)}")
+
+    if upstream.status_code not in (200, 206, 304, 412, 416):
+        await upstream.aclose()
+        if upstream.status_code == 404:
+            backend.meta_cache.put(storage_path, None)
+            raise HTTPException(status_code=404, detail="文件在存储中不存在")
+        raise HTTPException(
+            status_code=502,
+            detail=f"从 S3 读取文件失败: HTTP {upstream.status_code}",
+        )
+
+    headers = {
+        name: upstream.headers[name]
+        for name in PROXY_RESPONSE_HEADERS
+        if name in upstream.headers
+    }
+    headers["Cache-Control"] = FILE_CACHE_CONTROL
+    encoded_filename = quote(file_record.filename)
+    headers["Content-Disposition"] = (
+        f"{disposition}; filename*=UTF-8''{encoded_filename}"
+    )
+
+    if upstream.status_code not in (200, 206):
+        # 304 / 412 / 416 不转发响应体
+        await upstream.aclose()
+        headers.pop("content-length", None)
+        return Response(status_code=upstream.status_code, headers=headers)
+
+    return StreamingResponse(
+        upstream.aiter_bytes(S3_PROXY_CHUNK_SIZE),
+        status_code=upstream.status_code,
+        headers=headers,
+        media_type=file_record.mime_type,
+        background=BackgroundTask(upstream.aclose),
+    )
+
+
+async def _serve_file(
+    request: Request, file_id: str, session: AsyncSession, disposition: str
+) -> Response:
+    """下载和预览共用：S3 重定向到预签名 URL，本地文件支持条件请求和 Range"""
+    action = "下载" if disposition == "attachment" else "预览"
 
     # 查询文件
     stmt = select(File).where((File.id == file_id))
@@ -512,92 +834,89 @@ async def download_file(
     if not file_record:
         raise HTTPException(status_code=404, detail="文件不存在或无权限访问")
 
-    # 检查文件是否存在
     storage_path = file_record.storage_path
-    backend_id = file_record.storage_backend_id
 
     # 获取存储后端实例
-    backend = await get_storage_backend_by_id(session, backend_id)
+    backend = await get_storage_backend_by_id(session, file_record.storage_backend_id)
 
-    if not file_exists(storage_path, backend=backend):
-        raise HTTPException(status_code=404, detail="文件在存储中不存在")
+    if isinstance(backend, S3StorageBackend) and backend.proxy_downloads:
+        return await _proxy_s3_file(request, file_record, backend, disposition)
 
     if isinstance(backend, S3StorageBackend):
+        # 检查文件是否存在
+        if not await afile_exists(storage_path, backend=backend):
+            raise HTTPException(status_code=404, detail="文件在存储中不存在")
+
         # S3 存储：重定向到预签名 URL
         try:
-            url = backend.get_public_url(
+            url = await backend.aget_public_url(
                 storage_path, filename=file_record.filename, disposition="inline"
             )
-            return RedirectResponse(url=url)
+            # 同一时间窗口内 URL 不变，允许浏览器缓存重定向直到窗口结束
+            return RedirectResponse(
+                url=url,
+                headers={
+                    "Cache-Control": f"public, max-age={backend.presigned_url_max_age()}"
+                },
+            )
         except Exception as e:
             raise HTTPException(
-                status_code=500, detail=f"获取 S3 下载链接失败: {str(e)}"
+                status_code=500, detail=f"获取 S3 {action}链接失败: {str(e)}"
             )
-    else:
-        # 本地存储：使用 FileResponse
-        # 对文件名进行URL编码以支持中文等非ASCII字符
-        encoded_filename = quote(file_record.filename)
-
-        return FileResponse(
-            path=storage_path,
-            filename=file_record.filename,
-            media_type=file_record.mime_type,
-            headers={
-                "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"
-            },
-        )
+
+    # 本地存储：只 stat 一次，同时用于存在检查、缓存验证和 FileResponse
+    try:
+        stat_result = await backend.run_blocking(os.stat, storage_path)
+    except FileNotFoundError:
+        backend.meta_cache.put(storage_path, None)
+        raise HTTPException(status_code=404, detail="文件在存储中不存在")
+
+    last_modified = datetime.fromtimestamp(stat_result.st_mtime, timezone.utc)
+    etag = file_etag(file_record.content_sha256, stat_result.st_size, last_modified)
+    cache_headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": FILE_CACHE_CONTROL,
+    }
+    if is_not_modified(request.headers, etag, last_modified):
+        return Response(status_code=304, headers=cache_headers)
+
+    # 对文件名进行URL编码以支持中文等非ASCII字符
+    encoded_filename = quote(file_record.filename)
+
+    # FileResponse 负责单个及多个 Range（206 / multipart/byteranges）和 If-Range
+    return FileResponse(
+        path=storage_path,
+        filename=file_record.filename,
+        media_type=file_record.mime_type,
+        stat_result=stat_result,
+        headers={
+            "Content-Disposition": f"{disposition}; filename*=UTF-8''{encoded_filename}",
+            **cache_headers,
+        },
+    )
+
+
+@router.get("/download/{file_id}/{filename}")
+async def download_file(
+    request: Request,
+    file_id: str,
+    filename: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """下载文件"""
+    return await _serve_file(request, file_id, session, "attachment")
 
 
 @router.get("/preview/{file_id}/{filename}")
 async def preview_file(
+    request: Request,
     file_id: str,
     filename: Optional[str] = None,
     session: AsyncSession = Depends(get_async_session),
 ):
     """预览文件"""
-
-    # 查询文件
-    stmt = select(File).where((File.id == file_id))
-    result = await session.execute(stmt)
-    file_record = result.scalar_one_or_none()
-
-    if not file_record:
-        raise HTTPException(status_code=404, detail="文件不存在或无权限访问")
-
-    # 检查文件是否存在
-    storage_path = file_record.storage_path
-    backend_id = file_record.storage_backend_id
-
-    # 获取存储后端实例
-    backend = await get_storage_backend_by_id(session, backend_id)
-
-    if not file_exists(storage_path, backend=backend):
-        raise HTTPException(status_code=404, detail="文件在存储中不存在")
-
-    if isinstance(backend, S3StorageBackend):
-        # S3 存储：重定向到预签名 URL
-        try:
-            url = backend.get_public_url(
-                storage_path, filename=file_record.filename, disposition="inline"
-            )
-            return RedirectResponse(url=url)
-        except Exception as e:
-            raise HTTPException(
-                status_code=500, detail=f"获取 S3 预览链接失败: {str(e)}"
-            )
-    else:
-        # 本地存储：使用 FileResponse
-        # 对文件名进行URL编码以支持中文等非ASCII字符
-        encoded_filename = quote(file_record.filename)
-
-        return FileResponse(
-            path=storage_path,
-            filename=file_record.filename,
-            media_type=file_record.mime_type,
-            headers={
-                "Content-Disposition": f"inline; filename*=UTF-8''{encoded_filename}"
-            },
-        )
+    return await _serve_file(request, file_id, session, "inline")
 
 
 @router.delete("/{file_id}")
@@ -3,7 +3,7 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
-from sqlalchemy import func, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -16,6 +16,8 @@ from app.schemas import (
     FolderResponse,
     FolderUpdate,
 )
+from app.services.pagination import paginate
+from app.services.search_index import folder_name_condition
 from app.services.security import get_current_user
 from app.services.storage import delete_file
 
@@ -47,14 +49,15 @@ async def list_folders(
     q: Optional[str] = None,
     page: int = Query(1, ge=1, description="页码，从1开始"),
     page_size: int = Query(100, ge=1, le=100, description="每页条数，默认100"),
+    cursor: Optional[str] = Query(
+        None, description="分页游标，传入后使用游标分页（空字符串表示第一页）"
+    ),
+    include_total: bool = Query(False, description="游标分页时是否返回总数"),
     db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
     """获取当前用户的文件夹列表（分页）"""
 
-    # 计算偏移量
-    offset = (page - 1) * page_size
-
     stmt = select(Folder).where(
         Folder.user_id == current_user.id, Folder.is_deleted == 0
     )
@@ -65,24 +68,14 @@ async def list_folders(
         stmt = stmt.where(Folder.parent_id.is_(None))
 
     if q:
-        stmt = stmt.where(Folder.name.ilike(f"%{q}%"))
-
-    query = stmt.offset(offset).limit(page_size).order_by(Folder.created_at.desc())
-
-    # 获取总数
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total_result = await db.execute(count_stmt)
-    total = total_result.scalar()
+        stmt = stmt.where(await folder_name_condition(db, q))
 
-    # 获取分页数据
-    result = await db.execute(query)
-    folders = result.scalars().all()
+    folders, meta = await paginate(
+        db, stmt, Folder.created_at, Folder.id, page, page_size, cursor, include_total
+    )
 
     return {
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size,
+        **meta,
         "data": [
             {
                 "id": f.id,
@@ -2,7 +2,7 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
-from sqlalchemy import delete, func, select, update
+from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -19,6 +19,8 @@ class FolderIdsRequest(BaseModel):
 
 
 from app.models import File, Folder, Note, User
+from app.services.pagination import paginate
+from app.services.search_index import note_search_condition, search_notes
 from app.services.security import get_current_user
 
 router = APIRouter(prefix="/api/v1/notes", tags=["Notes"])
@@ -49,19 +51,20 @@ async def list_notes(
     folder_id: Optional[str] = None,
     page: int = Query(1, ge=1, description="页码，从1开始"),
     page_size: int = Query(10, ge=1, le=100, description="每页条数，默认10"),
+    cursor: Optional[str] = Query(
+        None, description="分页游标，传入后使用游标分页（空字符串表示第一页）"
+    ),
+    include_total: bool = Query(False, description="游标分页时是否返回总数"),
     db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
     """获取当前用户的笔记列表（分页）"""
 
-    # 计算偏移量
-    offset = (page - 1) * page_size
-
     # 基础查询
     stmt = (
         select(Note)
         .where(Note.user_id == current_user.id)
-        .options(selectinload(Note.files).selectinload(File.notes))
+        .options(selectinload(Note.files))
         .options(selectinload(Note.folders))
     )
 
@@ -73,25 +76,14 @@ async def list_notes(
 
     if q:
         # 在标题或内容中搜索
-        stmt = stmt.where((Note.title.ilike(f"%{q}%")) | (Note.content.ilike(f"%{q}%")))
-
-    # 分页查询
-    query = stmt.offset(offset).limit(page_size).order_by(Note.updated_at.desc())
+        stmt = stmt.where(await note_search_condition(db, q))
 
-    # 获取总数
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total_result = await db.execute(count_stmt)
-    total = total_result.scalar()
-
-    # 获取分页数据
-    result = await db.execute(query)
-    notes = result.scalars().all()
+    notes, meta = await paginate(
+        db, stmt, Note.updated_at, Note.id, page, page_size, cursor, include_total
+    )
 
     return {
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size,
+        **meta,
         "data": [
             {
                 "id": note.id,
@@ -131,6 +123,17 @@ async def list_notes(
     }
 
 
+@router.get("/search")
+async def search_notes_endpoint(
+    q: str = Query(..., min_length=1, description="搜索词"),
+    limit: int = Query(20, ge=1, le=100, description="最多返回条数"),
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """全文搜索当前用户的笔记，按相关度排序并返回高亮片段"""
+    return {"data": await search_notes(db, current_user.id, q, limit)}
+
+
 @router.get("/{note_id}", response_model=NoteResponse)
 async def get_note(
     note_id: str,
@@ -139,7 +142,7 @@ async def get_note(
 ):
     query = (
         select(Note)
-        .options(selectinload(Note.files).selectinload(File.notes))
+        .options(selectinload(Note.files))
         .options(selectinload(Note.folders))
         .where((Note.id == note_id) & (Note.user_id == current_user.id))
     )
@@ -9,9 +9,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_async_session
 from app.models import File, Folder, User
 from app.schemas import FileResponseModel, FolderResponse
+from app.services.blob_store import collect_blobs, release_blob
 from app.services.security import get_current_user
-from app.services.storage import delete_file as delete_file_storage
-from app.services.storage import get_public_url, get_storage_backend_by_id
+from app.services.storage import (
+    aget_public_url,
+    delete_storage_objects,
+    get_storage_backend_by_id,
+)
 
 router = APIRouter(prefix="/api/v1/recycle", tags=["Recycle Bin"])
 
@@ -63,7 +67,7 @@ async def list_recycle_bin_items(
                 "filename": f.filename,
                 "size": f.size,
                 "storage_path": f.storage_path,
-                "download_url": get_public_url(f.storage_path, backend=backend)
+                "download_url": await aget_public_url(f.storage_path, backend=backend)
                 or f"/api/v1/files/download/{f.id}/{f.filename}",
                 "mime_type": f.mime_type,
                 "created_at": f.created_at,
@@ -112,6 +116,11 @@ async def permanent_delete_items(
     db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
+    # (storage_backend_id, storage_path) of objects to remove once the rows are gone
+    physical = []
+    # (storage_backend_id, sha256) of shared blobs whose references were released
+    released = []
+
     # Delete files
     if request.file_ids:
         stmt = select(File).where(
@@ -122,14 +131,11 @@ async def permanent_delete_items(
         for file in files:
             if file in db:
                 await db.delete(file)
-                # Physical delete
-                try:
-                    backend = await get_storage_backend_by_id(
-                        db, file.storage_backend_id
-                    )
-                    delete_file_storage(file.storage_path, backend=backend)
-                except Exception as e:
-                    print(f"Error deleting file {file.id}: {e}")
+                # Physical delete after commit (shared blobs are garbage collected)
+                if await release_blob(db, file):
+                    physical.append((file.storage_backend_id, file.storage_path))
+                else:
+                    released.append((file.storage_backend_id, file.content_sha256))
 
         # Flush file deletes
         if files:
@@ -164,13 +170,10 @@ async def permanent_delete_items(
             for file in files:
                 if file in db:
                     await db.delete(file)
-                    try:
-                        backend = await get_storage_backend_by_id(
-                            db, file.storage_backend_id
-                        )
-                        delete_file_storage(file.storage_path, backend=backend)
-                    except Exception as e:
-                        print(f"Error deleting file {file.id}: {e}")
+                    if await release_blob(db, file):
+                        physical.append((file.storage_backend_id, file.storage_path))
+                    else:
+                        released.append((file.storage_backend_id, file.content_sha256))
 
             # Flush file deletes before deleting folder
             await db.flush()
@@ -188,4 +191,18 @@ async def permanent_delete_items(
             await delete_folder_recursive(folder)
 
     await db.commit()
-    return {"message": "Items permanently deleted"}
+
+    # Batched physical delete, grouped by backend
+    failed = await delete_storage_objects(db, physical)
+    # Shared blobs left without references; the collector re-checks under a lock
+    collected = await collect_blobs(released) if released else 0
+    for failure in failed:
+        print(
+            f"Error deleting {failure['storage_path']} "
+            f"from backend {failure['storage_backend_id']}: {failure['error']}"
+        )
+    return {
+        "message": "Items permanently deleted",
+        "deleted": len(set(physical)) - len(failed) + collected,
+        "failed": failed,
+    }
@@ -7,7 +7,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_async_session
 from app.models import File, Note, User
-from app.services.security import get_current_user
+from app.services.io_scheduler import io_scheduler
+from app.services.security import get_current_admin_user, get_current_user
 
 router = APIRouter(prefix="/api/v1/stats", tags=["Stats"])
 
@@ -63,3 +64,9 @@ async def get_stats(
         note_count=note_count,
         today_activity=today_activity,
     )
+
+
+@router.get("/io")
+async def get_io_stats(current_user: User = Depends(get_current_admin_user)):
+    """文件 I/O 调度器状态：各存储后端的队列深度、等待时间和全局在途字节"""
+    return io_scheduler.snapshot()
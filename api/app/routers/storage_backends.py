@@ -2,6 +2,7 @@
 存储后端管理路由
 """
 
+import asyncio
 import json
 import uuid
 from datetime import datetime
@@ -21,6 +22,7 @@ from app.schemas import (
     StorageBackendUpdate,
 )
 from app.services.security import get_current_admin_user, get_current_user
+from app.services.storage import invalidate_storage_backend_cache
 
 router = APIRouter(prefix="/api/v1/storage-backends", tags=["storage-backends"])
 
@@ -97,6 +99,7 @@ async def create_storage_backend(
 
     db.add(new_backend)
     await db.commit()
+    invalidate_storage_backend_cache()
     await db.refresh(new_backend)
 
     return _backend_to_response(new_backend)
@@ -239,6 +242,7 @@ async def update_storage_backend(
             backend.is_default = False
 
     await db.commit()
+    invalidate_storage_backend_cache(backend_id)
     await db.refresh(backend)
 
     return _backend_to_response(backend)
@@ -269,6 +273,7 @@ async def delete_storage_backend(
 
     await db.delete(backend)
     await db.commit()
+    invalidate_storage_backend_cache(backend_id)
 
     return None
 
@@ -300,6 +305,7 @@ async def set_default_backend(
     backend.is_active = True
 
     await db.commit()
+    invalidate_storage_backend_cache()
     await db.refresh(backend)
 
     return _backend_to_response(backend)
@@ -328,20 +334,19 @@ async def test_storage_backend(
         if backend.backend_type == StorageBackendType.LOCAL.value:
             from app.services.storage_backend import LocalStorageBackend
 
-            test_backend = LocalStorageBackend(**config)
-            # 检查目录是否存在或可创建
-            import os
-
-            if not os.path.exists(test_backend.base_dir):
-                os.makedirs(test_backend.base_dir, exist_ok=True)
+            # 构造时会检查目录是否存在或可创建
+            await asyncio.to_thread(LocalStorageBackend, **config)
             return {"status": "success", "message": "本地存储测试成功"}
 
         elif backend.backend_type == StorageBackendType.S3.value:
             from app.services.storage_backend import S3StorageBackend
 
-            test_backend = S3StorageBackend(**config)
-            # 尝试列出桶（测试连接）
-            test_backend.s3_client.head_bucket(Bucket=config["bucket_name"])
+            def check_bucket():
+                test_backend = S3StorageBackend(**config)
+                # 尝试列出桶（测试连接）
+                test_backend.s3_client.head_bucket(Bucket=config["bucket_name"])
+
+            await asyncio.to_thread(check_bucket)
             return {"status": "success", "message": "S3存储连接测试成功"}
 
         else:
@@ -521,6 +526,7 @@ async def import_storage_config(
 
         # 提交更改
         await db.commit()
+        invalidate_storage_backend_cache()
 
         return {
             "status": "success",
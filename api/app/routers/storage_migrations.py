@@ -0,0 +1,239 @@
+"""
+存储迁移任务路由
+"""
+
+from datetime import datetime
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_session
+from app.models import StorageBackendConfig, StorageMigrationJob, User
+from app.schemas import StorageMigrationCreate, StorageMigrationResponse
+from app.services import storage_migration
+from app.services.security import get_current_admin_user
+
+router = APIRouter(prefix="/api/v1/storage-migrations", tags=["storage-migrations"])
+
+
+def _job_to_response(job: StorageMigrationJob) -> StorageMigrationResponse:
+    processed = job.migrated_files + job.failed_files
+    progress = 100.0 if not job.total_files else processed * 100 / job.total_files
+    if job.status == storage_migration.STATUS_COMPLETED:
+        progress = 100.0
+    return StorageMigrationResponse(
+        id=job.id,
+        source_backend_id=job.source_backend_id,
+        target_backend_id=job.target_backend_id,
+        user_id=job.user_id,
+        file_type=job.file_type,
+        delete_source=bool(job.delete_source),
+        verify_checksum=bool(job.verify_checksum),
+        status=job.status,
+        total_files=job.total_files,
+        total_bytes=job.total_bytes,
+        migrated_files=job.migrated_files,
+        migrated_bytes=job.migrated_bytes,
+        failed_files=job.failed_files,
+        progress=round(min(progress, 100.0), 2),
+        throughput=round(storage_migration.job_throughput(job), 2),
+        last_error=job.last_error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        updated_at=job.updated_at,
+    )
+
+
+async def _get_job(session: AsyncSession, job_id: str) -> StorageMigrationJob:
+    job = (
+        await session.execute(
+            select(StorageMigrationJob).where(StorageMigrationJob.id == job_id)
+        )
+    ).scalar_one_or_none()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="迁移任务不存在"
+        )
+    return job
+
+
+@router.post(
+    "", response_model=StorageMigrationResponse, status_code=status.HTTP_201_CREATED
+)
+async def create_storage_migration(
+    data: StorageMigrationCreate,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_admin_user),
+):
+    """创建存储迁移任务并立即开始执行（仅管理员）"""
+    if data.source_backend_id == data.target_backend_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="源存储后端和目标存储后端相同",
+        )
+    backend_ids = {data.target_backend_id}
+    if data.source_backend_id:
+        backend_ids.add(data.source_backend_id)
+    found = (
+        (
+            await session.execute(
+                select(StorageBackendConfig.id).where(
+                    StorageBackendConfig.id.in_(backend_ids)
+                )
+            )
+        )
+        .scalars()
+        .all()
+    )
+    if len(found) != len(backend_ids):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="存储后端不存在"
+        )
+
+    # 同一批文件同时只能有一个进行中的迁移任务
+    source_condition = (
+        StorageMigrationJob.source_backend_id == data.source_backend_id
+        if data.source_backend_id
+        else StorageMigrationJob.source_backend_id.is_(None)
+    )
+    active = (
+        await session.execute(
+            select(StorageMigrationJob.id).where(
+                source_condition,
+                StorageMigrationJob.status.in_(
+                    [storage_migration.STATUS_RUNNING, storage_migration.STATUS_PAUSED]
+                ),
+            )
+        )
+    ).first()
+    if active:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="该存储后端已有未完成的迁移任务",
+        )
+
+    now = datetime.utcnow()
+    job = StorageMigrationJob(
+        source_backend_id=data.source_backend_id,
+        target_backend_id=data.target_backend_id,
+        user_id=data.user_id,
+        file_type=data.file_type,
+        delete_source=data.delete_source,
+        verify_checksum=data.verify_checksum,
+        status=storage_migration.STATUS_RUNNING,
+        total_files=0,
+        total_bytes=0,
+        migrated_files=0,
+        migrated_bytes=0,
+        failed_files=0,
+        created_by=current_user.id,
+        created_at=now,
+        started_at=now,
+        updated_at=now,
+    )
+    await storage_migration.count_job_files(session, job)
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+
+    await storage_migration.claim_and_start(session, job.id)
+    await session.refresh(job)
+    return _job_to_response(job)
+
+
+@router.get("", response_model=List[StorageMigrationResponse])
+async def list_storage_migrations(
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_admin_user),
+):
+    """列出存储迁移任务（仅管理员）"""
+    jobs = (
+        (
+            await session.execute(
+                select(StorageMigrationJob).order_by(
+                    StorageMigrationJob.created_at.desc()
+                )
+            )
+        )
+        .scalars()
+        .all()
+    )
+    return [_job_to_response(job) for job in jobs]
+
+
+@router.get("/{job_id}", response_model=StorageMigrationResponse)
+async def get_storage_migration(
+    job_id: str,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_admin_user),
+):
+    """获取存储迁移任务进度（仅管理员）"""
+    return _job_to_response(await _get_job(session, job_id))
+
+
+@router.post("/{job_id}/pause", response_model=StorageMigrationResponse)
+async def pause_storage_migration(
+    job_id: str,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_admin_user),
+):
+    """暂停迁移任务，当前批次完成后停止（仅管理员）"""
+    job = await _get_job(session, job_id)
+    if job.status != storage_migration.STATUS_RUNNING:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="只能暂停运行中的任务"
+        )
+    job.status = storage_migration.STATUS_PAUSED
+    await session.commit()
+    await session.refresh(job)
+    return _job_to_response(job)
+
+
+@router.post("/{job_id}/resume", response_model=StorageMigrationResponse)
+async def resume_storage_migration(
+    job_id: str,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_admin_user),
+):
+    """继续已暂停或失败的迁移任务（仅管理员）"""
+    job = await _get_job(session, job_id)
+    if job.status not in (
+        storage_migration.STATUS_PAUSED,
+        storage_migration.STATUS_FAILED,
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="只能继续已暂停或失败的任务"
+        )
+    job.status = storage_migration.STATUS_RUNNING
+    job.finished_at = None
+    await session.commit()
+    # 暂停前的批次仍在本进程执行时会直接继续；否则获取租约重新开始
+    # （租约仍被其他进程持有时由其继续，或过期后被接管）
+    await storage_migration.claim_and_start(session, job.id)
+    await session.refresh(job)
+    return _job_to_response(job)
+
+
+@router.post("/{job_id}/cancel", response_model=StorageMigrationResponse)
+async def cancel_storage_migration(
+    job_id: str,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_admin_user),
+):
+    """取消迁移任务，已迁移的文件保留在目标存储后端（仅管理员）"""
+    job = await _get_job(session, job_id)
+    if job.status in (
+        storage_migration.STATUS_COMPLETED,
+        storage_migration.STATUS_CANCELLED,
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="任务已结束"
+        )
+    job.status = storage_migration.STATUS_CANCELLED
+    job.finished_at = datetime.utcnow()
+    await session.commit()
+    await session.refresh(job)
+    return _job_to_response(job)
@@ -0,0 +1,394 @@
+"""
+分片上传（断点续传）路由
+创建会话 -> 并行上传任意顺序的分片 -> 查询已接收的分片 -> 完成上传
+"""
+
+import asyncio
+import os
+import uuid
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from starlette.datastructures import Headers
+
+from app.database import get_async_session
+from app.models import UploadSession, UploadSessionPart, User
+from app.schemas import (
+    FileResponseModel,
+    UploadPartInfo,
+    UploadSessionCreate,
+    UploadSessionResponse,
+)
+from app.services.file_records import (
+    build_file_record,
+    get_or_create_folder_by_path,
+    insert_file_records,
+)
+from app.services.file_type_detector import FileTypeDetector
+from app.services.io_scheduler import io_scheduler
+from app.services.security import get_current_user
+from app.services.storage import (
+    get_default_storage_backend,
+    get_storage_backend_by_id,
+    save_file,
+)
+from app.services.storage_backend import DETECTION_HEAD_SIZE, S3StorageBackend
+from app.services.upload_sessions import (
+    SESSION_COMPLETING,
+    SESSION_UPLOADING,
+    PartsReader,
+    discard_session,
+    expected_part_size,
+    part_path,
+    remove_session_dir,
+    resolve_chunk_size,
+    session_dir,
+    session_expires_at,
+)
+
+router = APIRouter(prefix="/api/v1/uploads", tags=["Uploads"])
+
+
+def _session_to_response(session: UploadSession) -> UploadSessionResponse:
+    """将上传会话转换为响应模型"""
+    received = {part.part_number: part for part in session.parts}
+    return UploadSessionResponse(
+        id=session.id,
+        filename=session.filename,
+        size=session.size,
+        chunk_size=session.chunk_size,
+        part_count=session.part_count,
+        storage_backend_id=session.storage_backend_id,
+        received_bytes=sum(part.size for part in received.values()),
+        received_parts=[
+            UploadPartInfo(
+                part_number=part.part_number,
+                offset=part.part_number * session.chunk_size,
+                size=part.size,
+            )
+            for part in session.parts
+        ],
+        missing_parts=[n for n in range(session.part_count) if n not in received],
+        status=session.status,
+        expires_at=session.expires_at,
+    )
+
+
+async def _get_session(
+    db: AsyncSession, session_id: str, user_id: str
+) -> UploadSession:
+    stmt = (
+        select(UploadSession)
+        .options(selectinload(UploadSession.parts))
+        .where(UploadSession.id == session_id, UploadSession.user_id == user_id)
+    )
+    result = await db.execute(stmt)
+    session = result.scalar_one_or_none()
+    if not session:
+        raise HTTPException(status_code=404, detail="上传会话不存在或已过期")
+    return session
+
+
+@router.post("/sessions", response_model=UploadSessionResponse)
+async def create_upload_session(
+    data: UploadSessionCreate,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """创建分片上传会话，返回服务端确定的分片大小和分片数"""
+    backend, backend_id = await get_default_storage_backend(db)
+    # 内容寻址存储需要在服务端计算摘要，分片暂存在本地，完成时整体写入
+    is_s3 = isinstance(backend, S3StorageBackend) and not backend.content_addressed
+
+    session = UploadSession(
+        id=str(uuid.uuid4()),
+        user_id=str(current_user.id),
+        storage_backend_id=backend_id,
+        folder_id=data.folder_id,
+        filename=data.filename,
+        content_type=data.content_type,
+        size=data.size,
+        chunk_size=resolve_chunk_size(data.size, data.chunk_size, is_s3),
+        original_created_at=data.original_created_at,
+        original_updated_at=data.original_updated_at,
+        expires_at=session_expires_at(),
+    )
+
+    # S3 存储：分片直接映射为 S3 分片上传的分片
+    if is_s3:
+        try:
+            s3_key, upload_id = await io_scheduler.run(
+                backend_id,
+                backend,
+                backend.create_multipart_upload,
+                os.path.basename(data.filename),
+                str(current_user.id),
+                data.content_type,
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        session.storage_path = s3_key
+        session.s3_upload_id = upload_id
+
+    db.add(session)
+    await db.commit()
+    return _session_to_response(await _get_session(db, session.id, current_user.id))
+
+
+@router.get("/sessions/{session_id}", response_model=UploadSessionResponse)
+async def get_upload_session(
+    session_id: str,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """查询上传会话，返回已接收和缺失的分片（用于断点续传）"""
+    return _session_to_response(await _get_session(db, session_id, current_user.id))
+
+
+def _remove_if_exists(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@router.put("/sessions/{session_id}/chunks/{part_number}")
+async def upload_chunk(
+    session_id: str,
+    part_number: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    上传一个分片，请求体为分片的原始字节
+    分片可以任意顺序、并行上传；重复上传同一分片会覆盖之前的内容
+    """
+    session = await _get_session(db, session_id, current_user.id)
+    if session.status != SESSION_UPLOADING:
+        raise HTTPException(status_code=409, detail="上传会话正在完成中")
+    if part_number < 0 or part_number >= session.part_count:
+        raise HTTPException(status_code=400, detail="分片编号超出范围")
+    expected_size = expected_part_size(session, part_number)
+    storage_backend_id = session.storage_backend_id
+    s3_key, s3_upload_id = session.storage_path, session.s3_upload_id
+
+    # 接收分片期间不持有数据库连接
+    await db.commit()
+
+    # 先写入临时文件，接收完整后再原子替换，避免并发重传同一分片时读到半个分片
+    await asyncio.to_thread(os.makedirs, session_dir(session_id), exist_ok=True)
+    target_path = part_path(session_id, part_number)
+    tmp_path = f"{target_path}.{uuid.uuid4().hex}.tmp"
+    received = 0
+    try:
+        async with await anyio.open_file(tmp_path, "wb") as buffer:
+            async for piece in request.stream():
+                received += len(piece)
+                if received > expected_size:
+                    break
+                await buffer.write(piece)
+        if received != expected_size:
+            raise HTTPException(
+                status_code=400,
+                detail=f"分片大小不正确，应为 {expected_size} 字节",
+            )
+        # 接收期间会话可能已被完成或删除，替换前再次确认，避免在会话目录删除后写入分片；
+        # 条件 UPDATE 持有行锁直到提交，完成请求的抢占会等待替换结束
+        uploading = await db.execute(
+            update(UploadSession)
+            .where(
+                UploadSession.id == session_id,
+                UploadSession.status == SESSION_UPLOADING,
+            )
+            .values(expires_at=session_expires_at())
+        )
+        if not uploading.rowcount:
+            await db.rollback()
+            raise HTTPException(status_code=409, detail="上传会话正在完成中")
+        try:
+            await asyncio.to_thread(os.replace, tmp_path, target_path)
+        finally:
+            await db.commit()
+    finally:
+        await asyncio.to_thread(_remove_if_exists, tmp_path)
+
+    etag = None
+    if s3_upload_id:
+        backend = await get_storage_backend_by_id(db, storage_backend_id)
+
+        def upload_part_file():
+            with open(target_path, "rb") as body:
+                return backend.upload_part(s3_key, s3_upload_id, part_number + 1, body)
+
+        try:
+            etag = await io_scheduler.run(
+                storage_backend_id, backend, upload_part_file, size=received
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"上传分片到 S3 失败: {e}")
+        finally:
+            await asyncio.to_thread(_remove_if_exists, target_path)
+
+    await db.merge(
+        UploadSessionPart(
+            session_id=session_id,
+            part_number=part_number,
+            size=received,
+            etag=etag,
+        )
+    )
+    session = await _get_session(db, session_id, current_user.id)
+    session.expires_at = session_expires_at()
+    await db.commit()
+
+    return {"part_number": part_number, "size": received, "etag": etag}
+
+
+@router.post("/sessions/{session_id}/complete", response_model=FileResponseModel)
+async def complete_upload_session(
+    session_id: str,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """所有分片上传完成后，写入存储并创建文件记录"""
+    session = await _get_session(db, session_id, current_user.id)
+    response = _session_to_response(session)
+    if response.missing_parts:
+        raise HTTPException(
+            status_code=400,
+            detail=f"还有 {len(response.missing_parts)} 个分片未上传",
+        )
+
+    # 先抢占会话：并发的完成请求只有一个能继续，其余返回 409
+    claimed = await db.execute(
+        update(UploadSession)
+        .where(
+            UploadSession.id == session_id,
+            UploadSession.status == SESSION_UPLOADING,
+        )
+        .values(status=SESSION_COMPLETING, expires_at=session_expires_at())
+    )
+    await db.commit()
+    if not claimed.rowcount:
+        raise HTTPException(status_code=409, detail="上传会话正在完成中")
+
+    try:
+        file = await _complete_session(db, session, str(current_user.id))
+    except asyncio.CancelledError:
+        # 客户端断开或服务关闭：释放会话后继续向上取消
+        await asyncio.shield(_release_session(db, session_id))
+        raise
+    except Exception:
+        await _release_session(db, session_id)
+        raise
+
+    # 文件记录提交后才删除暂存分片
+    await asyncio.to_thread(remove_session_dir, session_id)
+    return file
+
+
+async def _release_session(db: AsyncSession, session_id: str) -> None:
+    """完成失败时回滚并把会话恢复为上传中，客户端可以重试"""
+    await db.rollback()
+    await db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == session_id)
+        .values(status=SESSION_UPLOADING)
+    )
+    await db.commit()
+
+
+async def _complete_session(db: AsyncSession, session: UploadSession, user_id: str):
+    """合并分片写入存储，删除会话并创建文件记录（同一事务）"""
+    backend = await get_storage_backend_by_id(db, session.storage_backend_id)
+    filename = os.path.basename(session.filename)
+
+    if session.s3_upload_id:
+        parts = [
+            {"PartNumber": part.part_number + 1, "ETag": part.etag}
+            for part in session.parts
+        ]
+        try:
+            await io_scheduler.run(
+                session.storage_backend_id,
+                backend,
+                backend.complete_multipart_upload,
+                session.storage_path,
+                session.s3_upload_id,
+                parts,
+            )
+            head = await backend.aget_object(
+                session.storage_path, (0, DETECTION_HEAD_SIZE - 1)
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=str(e))
+        storage_path, size = session.storage_path, session.size
+        file_type_info = FileTypeDetector.detect(
+            filename=filename, file_content=head, mime_hint=session.content_type
+        )
+    else:
+        reader = PartsReader(
+            [part_path(session.id, n) for n in range(session.part_count)]
+        )
+        upload = UploadFile(
+            file=reader,
+            filename=filename,
+            headers=Headers(
+                {"content-type": session.content_type or "application/octet-stream"}
+            ),
+        )
+        try:
+            storage_path, size, file_type_info = await io_scheduler.run(
+                session.storage_backend_id,
+                backend,
+                save_file,
+                upload,
+                backend,
+                user_id,
+                size=session.size,
+            )
+        finally:
+            reader.close()
+
+    folder_id = await get_or_create_folder_by_path(
+        db, user_id, session.folder_id, os.path.dirname(session.filename)
+    )
+    record = build_file_record(
+        user_id=user_id,
+        folder_id=folder_id,
+        filename=filename,
+        storage_path=storage_path,
+        storage_backend_id=session.storage_backend_id,
+        size=size,
+        file_type_info=file_type_info,
+        original_created_at=session.original_created_at,
+        original_updated_at=session.original_updated_at,
+    )
+
+    # 会话删除与文件记录插入在同一事务中提交
+    await discard_session(session, db, abort_upload=False, remove_parts=False)
+    files = await insert_file_records(db, [record], backend, session.storage_backend_id)
+    return files[0]
+
+
+@router.delete("/sessions/{session_id}")
+async def abort_upload_session(
+    session_id: str,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """取消上传会话，删除已上传的分片"""
+    session = await _get_session(db, session_id, current_user.id)
+    if session.status != SESSION_UPLOADING:
+        raise HTTPException(status_code=409, detail="上传会话正在完成中")
+    await discard_session(session, db)
+    await db.commit()
+    return {"message": "Upload session aborted"}
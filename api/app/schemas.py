@@ -1,7 +1,8 @@
 from datetime import datetime
 from enum import Enum
+from typing import Annotated
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class Visibility(str, Enum):
@@ -38,6 +39,8 @@ class FileResponseModel(BaseModel):
     size: int
     file_type: str | None = None  # text, document, image, video, binary
     file_type_confidence: str | None = None  # high, medium, low
+    content_sha256: str | None = None
+    content_md5: str | None = None
     original_created_at: datetime | None = None
     original_updated_at: datetime | None = None
     created_at: datetime
@@ -78,6 +81,105 @@ class NoteResponse(BaseModel):
         from_attributes = True
 
 
+class UploadSessionCreate(BaseModel):
+    filename: str  # 可包含相对路径，如 "folder1/file.txt"
+    size: int = Field(ge=0)
+    chunk_size: int | None = Field(None, ge=64 * 1024)
+    content_type: str | None = None
+    folder_id: str | None = None
+    original_created_at: datetime | None = None
+    original_updated_at: datetime | None = None
+
+
+class UploadPartInfo(BaseModel):
+    part_number: int
+    offset: int
+    size: int
+
+
+class UploadSessionResponse(BaseModel):
+    id: str
+    filename: str
+    size: int
+    chunk_size: int
+    part_count: int
+    storage_backend_id: str | None = None
+    received_bytes: int
+    received_parts: list[UploadPartInfo]
+    missing_parts: list[int]
+    status: str  # uploading / completing
+    expires_at: datetime
+
+
+class MultipartUploadInitiate(BaseModel):
+    """客户端直传：创建 S3 分片上传"""
+
+    filename: str
+    size: int = Field(ge=0)
+    part_size: int | None = Field(None, ge=5 * 1024 * 1024)
+    content_type: str | None = None
+
+
+class MultipartUploadRef(BaseModel):
+    """定位一个进行中的 S3 分片上传"""
+
+    s3_key: str
+    upload_id: str
+    storage_backend_id: str
+
+
+class MultipartUploadPresign(MultipartUploadRef):
+    """重新签发指定分片的上传 URL（断点续传或 URL 过期时使用）"""
+
+    part_numbers: list[Annotated[int, Field(ge=1, le=10000)]] = Field(
+        min_length=1, max_length=10000
+    )
+
+
+class MultipartUploadPart(BaseModel):
+    part_number: int = Field(ge=1, le=10000)
+    etag: str
+
+
+class MultipartUploadComplete(MultipartUploadRef):
+    """完成分片上传并创建文件记录"""
+
+    filename: str  # 可包含相对路径，如 "folder1/file.txt"
+    content_type: str | None = None
+    folder_id: str | None = None
+    original_created_at: datetime | None = None
+    original_updated_at: datetime | None = None
+    parts: list[MultipartUploadPart] = Field(min_length=1)
+
+
+class DirectUploadFile(BaseModel):
+    filename: str  # 可包含相对路径，如 "folder1/file.txt"
+    content_type: str | None = None
+
+
+class BatchPresignRequest(BaseModel):
+    """批量获取预签名上传URL"""
+
+    files: list[DirectUploadFile] = Field(min_length=1, max_length=5000)
+
+
+class DirectUploadConfirmItem(BaseModel):
+    s3_key: str
+    filename: str  # 可包含相对路径，如 "folder1/file.txt"
+    size: int = Field(ge=0)
+    content_type: str | None = None
+    original_created_at: datetime | None = None
+    original_updated_at: datetime | None = None
+
+
+class BatchConfirmRequest(BaseModel):
+    """批量确认客户端直传"""
+
+    storage_backend_id: str
+    folder_id: str | None = None
+    files: list[DirectUploadConfirmItem] = Field(min_length=1, max_length=5000)
+
+
 class FileMove(BaseModel):
     folder_id: str | None
 
@@ -158,10 +260,16 @@ class StorageBackendType(str, Enum):
     S3 = "s3"
 
 
+class S3DownloadMode(str, Enum):
+    REDIRECT = "redirect"  # 重定向到预签名 URL，由客户端直接从桶下载
+    PROXY = "proxy"  # 由服务端流式转发（客户端无法访问桶时使用）
+
+
 class LocalStorageConfig(BaseModel):
     """本地存储配置"""
 
     base_dir: str = "data/files"
+    content_addressed: bool = False  # 按内容哈希存储，相同内容只保存一份
 
 
 class S3StorageConfig(BaseModel):
@@ -173,6 +281,12 @@ class S3StorageConfig(BaseModel):
     endpoint_url: str | None = None
     region_name: str = "us-east-1"
     public_url: str | None = None
+    multipart_chunksize: int = 8 * 1024 * 1024  # 分片上传的分片大小（字节，最小5MB）
+    multipart_concurrency: int = 4  # 单个文件同时上传的分片数
+    # 按内容哈希存储，相同内容只保存一份；启用后不支持客户端直传和 S3 分片上传，
+    # 上传会话的分片暂存在服务端，完成时计算摘要后写入
+    content_addressed: bool = False
+    download_mode: S3DownloadMode = S3DownloadMode.REDIRECT  # 下载和预览方式
 
 
 class StorageBackendCreate(BaseModel):
@@ -214,3 +328,41 @@ class StorageBackendResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class StorageMigrationCreate(BaseModel):
+    """创建存储迁移任务"""
+
+    source_backend_id: str | None = (
+        None  # None 表示未指定存储后端的旧数据（默认本地存储）
+    )
+    target_backend_id: str
+    user_id: str | None = None  # 只迁移该用户的文件
+    file_type: str | None = None  # 只迁移该类型的文件
+    delete_source: bool = True  # 迁移成功后删除源文件
+    verify_checksum: bool = True  # 写入后重新读取目标文件校验 SHA-256
+
+
+class StorageMigrationResponse(BaseModel):
+    """存储迁移任务响应"""
+
+    id: str
+    source_backend_id: str | None = None
+    target_backend_id: str
+    user_id: str | None = None
+    file_type: str | None = None
+    delete_source: bool
+    verify_checksum: bool
+    status: str
+    total_files: int
+    total_bytes: int
+    migrated_files: int
+    migrated_bytes: int
+    failed_files: int
+    progress: float  # 已处理文件百分比
+    throughput: float  # 迁移速度（字节/秒）
+    last_error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    updated_at: datetime
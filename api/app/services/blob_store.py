@@ -0,0 +1,205 @@
+"""
+内容寻址存储的引用计数
+相同内容的文件共享 blobs 表中的一条记录及其物理对象。引用计数归零时只保留记录，
+由 collect_blobs 在持有行锁的事务中重新确认计数为 0 后再删除物理对象和记录
+"""
+
+import asyncio
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session_maker
+from app.models import Blob, File
+from app.services.storage import load_storage_backend
+from app.services.storage_backend import StorageBackend
+
+# 后台回收未引用 blob 的间隔（秒）
+BLOB_GC_INTERVAL = int(os.getenv("BLOB_GC_INTERVAL", "600"))
+# 每次回收最多处理的 blob 数
+BLOB_GC_BATCH_SIZE = int(os.getenv("BLOB_GC_BATCH_SIZE", "500"))
+
+
+class BlobMissingError(Exception):
+    """新登记的 blob 的物理对象不存在（写入方跳过写入后对象被并发回收）"""
+
+
+async def acquire_blobs(
+    session: AsyncSession, storage_backend_id: str, file_data_list: Iterable[dict]
+) -> List[str]:
+    """
+    为新插入的文件记录增加 blob 引用计数（不提交事务）
+
+    Args:
+        session: 数据库会话
+        storage_backend_id: 存储后端ID
+        file_data_list: 文件记录字典，需包含 content_sha256 / storage_path / size
+
+    Returns:
+        本次新插入记录的 blob 的 storage_path，调用方需在提交前用 ensure_blobs_exist 确认
+    """
+    grouped = defaultdict(lambda: {"count": 0})
+    for data in file_data_list:
+        # 未计算摘要的记录不参与内容寻址
+        if not data.get("content_sha256"):
+            continue
+        entry = grouped[data["content_sha256"]]
+        entry["count"] += 1
+        entry["storage_path"] = data["storage_path"]
+        entry["size"] = data["size"]
+
+    created = []
+    now = datetime.utcnow()
+    for sha256, entry in grouped.items():
+        increment = (
+            update(Blob)
+            .where(Blob.storage_backend_id == storage_backend_id, Blob.sha256 == sha256)
+            .values(ref_count=Blob.ref_count + entry["count"], updated_at=now)
+        )
+        result = await session.execute(increment)
+        if result.rowcount:
+            continue
+
+        try:
+            async with session.begin_nested():
+                session.add(
+                    Blob(
+                        storage_backend_id=storage_backend_id,
+                        sha256=sha256,
+                        storage_path=entry["storage_path"],
+                        size=entry["size"],
+                        ref_count=entry["count"],
+                        created_at=now,
+                        updated_at=now,
+                    )
+                )
+            created.append(entry["storage_path"])
+        except IntegrityError:
+            # 并发上传相同内容时，另一个请求已插入该 blob
+            await session.execute(increment)
+    return created
+
+
+async def ensure_blobs_exist(backend: StorageBackend, storage_paths: List[str]) -> None:
+    """
+    确认新登记的 blob 的物理对象存在（在 acquire_blobs 之后、提交之前调用）
+
+    写入方发现对象已存在时会跳过写入，而该对象可能正被 collect_blobs 回收：
+    回收在删除物理对象后才提交，acquire_blobs 会等待其提交后插入新记录，
+    因此新插入的记录都要在此确认对象仍在。已有记录被增加计数时对象不会被回收。
+
+    Raises:
+        BlobMissingError: 对象已被回收，调用方应回滚事务并重新写入
+    """
+    if not storage_paths:
+        return
+    exists = await asyncio.gather(*[backend.aexists(path) for path in storage_paths])
+    missing = [path for path, found in zip(storage_paths, exists) if not found]
+    if missing:
+        raise BlobMissingError(", ".join(missing))
+
+
+async def release_blob(
+    session: AsyncSession, file: File, keep_object: bool = False
+) -> bool:
+    """
+    释放文件对 blob 的引用（不提交事务）
+
+    内容寻址的文件只减少引用计数，计数为 0 的 blob 由 collect_blobs 回收；
+    keep_object 为 True 时（迁移保留源文件）计数归零后直接删除记录，物理对象保留
+
+    Returns:
+        调用方是否需要自行删除物理对象：文件不是内容寻址存储时返回 True
+    """
+    if not file.storage_backend_id or not file.content_sha256:
+        return True
+
+    condition = (
+        (Blob.storage_backend_id == file.storage_backend_id)
+        & (Blob.sha256 == file.content_sha256)
+        & (Blob.storage_path == file.storage_path)
+    )
+    result = await session.execute(
+        update(Blob).where(condition).values(ref_count=Blob.ref_count - 1)
+    )
+    if not result.rowcount:
+        return True
+
+    if keep_object:
+        await session.execute(delete(Blob).where(condition, Blob.ref_count <= 0))
+    return False
+
+
+async def collect_blobs(
+    keys: Optional[Iterable[Tuple[str, str]]] = None,
+    limit: int = BLOB_GC_BATCH_SIZE,
+) -> int:
+    """
+    回收引用计数为 0 的 blob，返回删除的物理对象数
+
+    每个 blob 在单独的事务中处理：先按 ref_count 仍为 0 的条件删除记录（同时持有
+    Postgres 行锁 / SQLite 写锁），再删除物理对象，成功后才提交。回收期间并发的
+    acquire_blobs 会等待锁释放；删除物理对象失败时回滚，记录保留到下次回收。
+
+    Args:
+        keys: 只回收指定的 (storage_backend_id, sha256)；None 表示全部
+        limit: 最多处理的 blob 数
+    """
+    stmt = select(Blob.id, Blob.storage_backend_id, Blob.storage_path).where(
+        Blob.ref_count <= 0
+    )
+    if keys is not None:
+        keys = list(set(keys))
+        if not keys:
+            return 0
+        stmt = stmt.where(tuple_(Blob.storage_backend_id, Blob.sha256).in_(keys))
+
+    collected = 0
+    async with async_session_maker() as db:
+        candidates = (await db.execute(stmt.limit(limit))).all()
+        await db.commit()
+
+        backends = {}
+        for blob_id, backend_id, storage_path in candidates:
+            if backend_id not in backends:
+                backends[backend_id] = await load_storage_backend(db, backend_id)
+                await db.commit()
+            backend = backends[backend_id]
+            if backend is None:
+                continue
+
+            result = await db.execute(
+                delete(Blob).where(Blob.id == blob_id, Blob.ref_count <= 0)
+            )
+            if not result.rowcount:
+                # 已被重新引用
+                await db.rollback()
+                continue
+            try:
+                failures = await backend.adelete_many([storage_path])
+            except Exception as e:
+                failures = {storage_path: str(e)}
+            if failures:
+                await db.rollback()
+                print(f"回收 blob 失败: {storage_path}: {failures[storage_path]}")
+                continue
+            await db.commit()
+            collected += 1
+    return collected
+
+
+async def run_blob_gc() -> None:
+    """后台定期回收引用计数为 0 的 blob（补充删除文件时未能完成的回收）"""
+    while True:
+        await asyncio.sleep(BLOB_GC_INTERVAL)
+        try:
+            count = await collect_blobs()
+            if count:
+                print(f"已回收 {count} 个未引用的 blob")
+        except Exception as e:
+            print(f"回收 blob 失败: {e}")
@@ -0,0 +1,246 @@
+"""
+文件记录服务
+普通上传与分片上传共用的文件夹解析、文件记录构建和批量插入逻辑
+"""
+
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, insert, inspect, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import File, Folder
+from app.services.blob_store import BlobMissingError, acquire_blobs, ensure_blobs_exist
+from app.services.object_meta_cache import ObjectMeta
+from app.services.storage_backend import StorageBackend
+
+# 每条查询携带的 (parent_id, name) 对数量，避免超过数据库的参数个数上限
+FOLDER_QUERY_BATCH_SIZE = 400
+
+
+def _split_folder_path(folder_path: str) -> Tuple[str, ...]:
+    return tuple(part for part in folder_path.split("/") if part)
+
+
+async def _select_folders(
+    db: AsyncSession,
+    user_id: str,
+    pairs: List[Tuple[Optional[str], str]],
+) -> Dict[Tuple[Optional[str], str], str]:
+    """
+    批量查询 (parent_id, name) 对应的文件夹ID
+    同名文件夹有多个时取最早创建的一个
+    """
+    found: Dict[Tuple[Optional[str], str], str] = {}
+    for start in range(0, len(pairs), FOLDER_QUERY_BATCH_SIZE):
+        batch = pairs[start : start + FOLDER_QUERY_BATCH_SIZE]
+        parent_ids = {parent_id for parent_id, _ in batch if parent_id is not None}
+        parent_filters = []
+        if parent_ids:
+            parent_filters.append(Folder.parent_id.in_(parent_ids))
+        if any(parent_id is None for parent_id, _ in batch):
+            parent_filters.append(Folder.parent_id.is_(None))
+
+        stmt = (
+            select(Folder.id, Folder.parent_id, Folder.name)
+            .where(
+                Folder.user_id == user_id,
+                Folder.is_deleted == 0,
+                Folder.name.in_({name for _, name in batch}),
+                or_(*parent_filters),
+            )
+            .order_by(Folder.created_at, Folder.id)
+        )
+        wanted = set(batch)
+        for folder_id, parent_id, name in (await db.execute(stmt)).all():
+            key = (parent_id, name)
+            if key in wanted and key not in found:
+                found[key] = folder_id
+    return found
+
+
+async def resolve_folder_paths(
+    db: AsyncSession,
+    user_id: str,
+    parent_folder_id: Optional[str],
+    folder_paths: Iterable[str],
+) -> Dict[str, Optional[str]]:
+    """
+    批量解析（并创建缺失的）文件夹路径，返回 {路径: 文件夹ID}，不提交事务
+
+    所有路径先合并成一棵前缀树，再按层批量查询已存在的文件夹、批量插入缺失的文件夹，
+    查询次数与目录深度成正比，而不是与目录数量成正比。
+
+    folders 表不限制同名文件夹（create_folder 允许重名），因此：
+    - Postgres 上按用户加事务级咨询锁，串行化同一用户的并发创建；
+    - 插入后重新查询，以最早创建的文件夹为准，删除本次插入的重复文件夹。
+
+    Args:
+        parent_folder_id: 根文件夹ID，None 表示用户根目录
+        folder_paths: 相对路径，如 "folder1/folder2"
+    """
+    paths = {path: _split_folder_path(path) for path in folder_paths}
+    resolved: Dict[Tuple[str, ...], Optional[str]] = {(): parent_folder_id}
+
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(
+            select(func.pg_advisory_xact_lock(func.hashtext(f"folders:{user_id}")))
+        )
+
+    depth = max((len(parts) for parts in paths.values()), default=0)
+    for level in range(1, depth + 1):
+        # 本层需要的节点：(父路径, 名称)
+        nodes = {parts[:level] for parts in paths.values() if len(parts) >= level}
+        keys = {node: (resolved[node[:-1]], node[-1]) for node in nodes}
+        pairs = list(set(keys.values()))
+        found = await _select_folders(db, user_id, pairs)
+
+        missing = [pair for pair in pairs if pair not in found]
+        if missing:
+            now = datetime.utcnow()
+            new_folders = {
+                pair: {
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "parent_id": pair[0],
+                    "name": pair[1],
+                    "created_at": now,
+                    "updated_at": now,
+                    "is_deleted": 0,
+                }
+                for pair in missing
+            }
+            await db.execute(insert(Folder), list(new_folders.values()))
+
+            # 并发请求可能同时创建了同名文件夹：以最早的为准，删除本次插入的重复项
+            winners = await _select_folders(db, user_id, missing)
+            losers = [
+                row["id"]
+                for pair, row in new_folders.items()
+                if winners.get(pair, row["id"]) != row["id"]
+            ]
+            if losers:
+                await db.execute(delete(Folder).where(Folder.id.in_(losers)))
+            for pair, row in new_folders.items():
+                found[pair] = winners.get(pair, row["id"])
+
+        for node, pair in keys.items():
+            resolved[node] = found[pair]
+
+    return {path: resolved[parts] for path, parts in paths.items()}
+
+
+async def get_or_create_folder_by_path(
+    db: AsyncSession, user_id: str, parent_folder_id: Optional[str], folder_path: str
+) -> Optional[str]:
+    """
+    根据路径创建或获取文件夹，返回最终文件夹的ID
+    folder_path: 相对路径，如 "folder1/folder2"
+    """
+    if not folder_path:
+        return parent_folder_id
+    resolved = await resolve_folder_paths(db, user_id, parent_folder_id, [folder_path])
+    return resolved[folder_path]
+
+
+def normalize_timestamp(value: Optional[datetime]) -> datetime:
+    """客户端传入的时间转换为不带时区的 UTC 时间，未传入时使用当前时间"""
+    if not value:
+        return datetime.utcnow()
+    if value.tzinfo is not None:
+        return datetime(*value.utctimetuple()[:6])
+    return value
+
+
+def build_file_record(
+    user_id: str,
+    folder_id: Optional[str],
+    filename: str,
+    storage_path: str,
+    storage_backend_id: Optional[str],
+    size: int,
+    file_type_info: dict,
+    original_created_at: Optional[datetime] = None,
+    original_updated_at: Optional[datetime] = None,
+) -> dict:
+    """构建用于批量插入的文件记录字典"""
+    return {
+        "user_id": user_id,
+        "folder_id": folder_id,
+        "filename": filename,
+        "storage_path": storage_path,
+        "storage_backend_id": storage_backend_id,
+        "mime_type": file_type_info.get("mime_type"),
+        "size": size,
+        "file_type": file_type_info.get("category"),
+        "file_type_confidence": file_type_info.get("confidence"),
+        "content_sha256": file_type_info.get("sha256"),
+        "content_md5": file_type_info.get("md5"),
+        "original_created_at": normalize_timestamp(original_created_at),
+        "original_updated_at": normalize_timestamp(original_updated_at),
+    }
+
+
+async def insert_file_records(
+    db: AsyncSession,
+    file_data_list: List[dict],
+    backend: StorageBackend,
+    backend_id: Optional[str],
+) -> List[File]:
+    """
+    批量插入文件记录并提交
+
+    Args:
+        db: 数据库会话
+        file_data_list: build_file_record 构建的记录字典
+        backend: 文件所在的存储后端
+        backend_id: 存储后端ID
+
+    Returns:
+        插入的文件记录（未关联会话的 File 对象，顺序与 file_data_list 一致）
+    """
+    if not file_data_list:
+        return []
+
+    # 添加创建时间、更新时间和ID
+    now = datetime.utcnow()
+    for data in file_data_list:
+        data["id"] = str(uuid.uuid4())
+        data["created_at"] = now
+        data["updated_at"] = now
+        data["is_deleted"] = 0
+
+    # 批量插入（非常快）
+    # 使用 File.__mapper__ 来获取正确的 mapper 对象
+    file_mapper = inspect(File)
+    await db.run_sync(
+        lambda session: session.bulk_insert_mappings(file_mapper, file_data_list)
+    )
+
+    # 内容寻址存储：与文件记录在同一事务中增加 blob 引用计数
+    if backend.content_addressed and backend_id:
+        created = await acquire_blobs(db, backend_id, file_data_list)
+        try:
+            await ensure_blobs_exist(backend, created)
+        except BlobMissingError:
+            # 保存时跳过了写入的相同内容恰好被回收，文件需要重新上传
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="相同内容的文件刚被回收，请重新上传",
+            )
+
+    await db.commit()
+
+    # 刚写入的对象一定存在，预先填充元数据缓存，首次下载不必再 stat 或 HEAD
+    last_modified = now.replace(tzinfo=timezone.utc)
+    for data in file_data_list:
+        backend.meta_cache.put(
+            data["storage_path"],
+            ObjectMeta(size=data["size"], last_modified=last_modified),
+        )
+
+    # 直接用内存中的记录构建返回对象（不加入会话，也不重新查询），保持请求中的顺序
+    return [File(**data) for data in file_data_list]
@@ -0,0 +1,89 @@
+"""
+HTTP 缓存验证
+为文件下载和预览生成 ETag / Last-Modified，并处理 If-None-Match / If-Modified-Since 条件请求
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from starlette.datastructures import Headers
+
+# 文件内容不会原地修改，但仍要求客户端每次使用前向服务器验证（命中时返回 304）
+FILE_CACHE_CONTROL = "private, no-cache"
+
+# 代理下载时转发给存储服务的请求头
+PROXY_REQUEST_HEADERS = (
+    "range",
+    "if-range",
+    "if-match",
+    "if-none-match",
+    "if-modified-since",
+    "if-unmodified-since",
+)
+# 代理下载时回传给客户端的响应头
+PROXY_RESPONSE_HEADERS = (
+    "content-length",
+    "content-range",
+    "accept-ranges",
+    "etag",
+    "last-modified",
+)
+
+
+def file_etag(
+    content_sha256: Optional[str], size: int, last_modified: Optional[datetime]
+) -> str:
+    """
+    生成强 ETag：优先使用内容 SHA-256，没有记录哈希时由大小和修改时间派生
+    """
+    if content_sha256:
+        return f'"{content_sha256}"'
+    mtime = last_modified.timestamp() if last_modified else 0
+    base = f"{mtime}-{size}"
+    return f'"{hashlib.md5(base.encode(), usedforsecurity=False).hexdigest()}"'
+
+
+def http_date(value: datetime) -> str:
+    """格式化为 HTTP 日期（RFC 7231 IMF-fixdate）"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match 使用弱比较：忽略 W/ 前缀"""
+    if header.strip() == "*":
+        return True
+    target = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == target
+        for candidate in header.split(",")
+    )
+
+
+def is_not_modified(
+    headers: Headers, etag: Optional[str], last_modified: Optional[datetime]
+) -> bool:
+    """
+    判断条件请求是否可以返回 304
+    同时携带两个条件头时以 If-None-Match 为准（RFC 7232 第 6 节）
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and _etag_matches(if_none_match, etag)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # HTTP 日期只精确到秒
+    return last_modified.replace(microsecond=0) <= since
@@ -0,0 +1,309 @@
+"""
+文件 I/O 调度器
+每个存储后端拥有独立的有界线程池（大文件通道 + 小文件快速通道），慢速的 S3
+不会占满本地存储的线程；所有后端共享一个在途字节预算，限制同时缓冲在内存中的数据量；
+队列已满时拒绝新请求（429 + Retry-After），由客户端稍后重试
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Set
+
+from fastapi import HTTPException, status
+
+from app.services.storage_backend import StorageBackend
+
+# 线程数设置原则：
+# - IO密集型任务：推荐 CPU核心数 × (2-5)
+# - 本地存储：CPU核心数 × 2-3
+# - 网络存储(S3)：CPU核心数 × 3-5
+_cpu_count = os.cpu_count() or 4
+# 每个存储后端大文件通道的线程数
+FILE_UPLOAD_WORKERS = int(os.getenv("FILE_UPLOAD_WORKERS", str(_cpu_count * 3)))
+# 每个存储后端小文件快速通道的线程数
+IO_FAST_LANE_WORKERS = int(os.getenv("IO_FAST_LANE_WORKERS", str(_cpu_count)))
+# 不超过该大小（字节）的文件走快速通道，不会排在大文件后面
+IO_SMALL_FILE_SIZE = int(os.getenv("IO_SMALL_FILE_SIZE", str(1024 * 1024)))
+# 每个存储后端最多排队的任务数，超过后返回 429
+IO_QUEUE_LIMIT = int(os.getenv("IO_QUEUE_LIMIT", str(FILE_UPLOAD_WORKERS * 8)))
+# 所有后端同时缓冲在内存中的最大字节数
+IO_INFLIGHT_BYTES = int(os.getenv("IO_INFLIGHT_BYTES", str(256 * 1024 * 1024)))
+# 队列已满时建议客户端等待的秒数
+IO_RETRY_AFTER = int(os.getenv("IO_RETRY_AFTER", "2"))
+
+# 未配置存储后端时（默认本地存储）使用的键
+DEFAULT_BACKEND_KEY = "default"
+
+
+class IOQueueFullError(HTTPException):
+    """存储后端的 I/O 队列已满"""
+
+    def __init__(self, backend_key: str):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"存储后端 {backend_key} 繁忙，请稍后重试",
+            headers={"Retry-After": str(IO_RETRY_AFTER)},
+        )
+
+
+class _Lane:
+    """一个有界线程池及其排队统计"""
+
+    def __init__(self, name: str, workers: int):
+        self.workers = max(workers, 1)
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix=name
+        )
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def enqueue(self) -> None:
+        with self._lock:
+            self.queued += 1
+
+    def dequeue(self) -> None:
+        """任务在开始执行前被取消"""
+        with self._lock:
+            self.queued -= 1
+
+    def start(self, wait: float) -> None:
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def finish(self) -> None:
+        with self._lock:
+            self.running -= 1
+            self.completed += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            started = self.completed + self.running
+            return {
+                "workers": self.workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "avg_wait_ms": (
+                    round(self.total_wait / started * 1000, 2) if started else 0.0
+                ),
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+            }
+
+
+class _BackendQueue:
+    """单个存储后端的两个通道"""
+
+    def __init__(self, key: str):
+        self.key = key
+        prefix = f"io_{key[:8]}"
+        self.bulk = _Lane(f"{prefix}_bulk", FILE_UPLOAD_WORKERS)
+        self.fast = _Lane(f"{prefix}_fast", IO_FAST_LANE_WORKERS)
+        # 已准入但尚未提交到通道的任务数
+        self.reserved = 0
+        self.rejected = 0
+
+    @property
+    def depth(self) -> int:
+        return self.reserved + self.bulk.queued + self.fast.queued
+
+    def lane_for(self, size: int) -> _Lane:
+        return self.fast if size <= IO_SMALL_FILE_SIZE else self.bulk
+
+    def snapshot(self) -> dict:
+        return {
+            "backend": self.key,
+            "depth": self.depth,
+            "queue_limit": IO_QUEUE_LIMIT,
+            "rejected": self.rejected,
+            "bulk": self.bulk.snapshot(),
+            "fast": self.fast.snapshot(),
+        }
+
+    def shutdown(self) -> None:
+        self.bulk.executor.shutdown(wait=False)
+        self.fast.executor.shutdown(wait=False)
+
+
+class Admission:
+    """
+    一次请求的准入凭证
+    准入时一次性预留请求内所有任务的排队名额，避免批量上传中途被拒绝留下半批文件
+    """
+
+    def __init__(
+        self,
+        scheduler: "IOScheduler",
+        queue: _BackendQueue,
+        backend: StorageBackend,
+        count: int,
+    ):
+        self._scheduler = scheduler
+        self._queue = queue
+        self._backend = backend
+        self._remaining = count
+
+    async def run(self, func: Callable, *args, size: int = 0):
+        """
+        在该后端的线程池中执行同步 I/O
+
+        Args:
+            func: 同步函数
+            size: 本次处理的数据量（字节），用于选择通道和计算在途字节
+        """
+        if self._remaining > 0:
+            self._remaining -= 1
+            self._queue.reserved -= 1
+
+        lane = self._queue.lane_for(size)
+        enqueued_at = time.monotonic()
+        lane.enqueue()
+
+        def task():
+            lane.start(time.monotonic() - enqueued_at)
+            try:
+                return func(*args)
+            finally:
+                lane.finish()
+
+        loop = asyncio.get_running_loop()
+        nbytes = 0
+
+        def on_done(future):
+            # 开始执行前被取消的任务不会经过 lane.start
+            if future.cancelled():
+                lane.dequeue()
+            # 等待方被取消时线程可能仍在使用缓冲区，任务真正结束后才归还在途字节
+            self._scheduler.release_bytes_threadsafe(loop, nbytes)
+
+        try:
+            nbytes = await self._scheduler.acquire_bytes(
+                self._backend.buffer_bytes(size)
+            )
+            future = lane.executor.submit(task)
+        except BaseException:
+            lane.dequeue()
+            await self._scheduler.release_bytes(nbytes)
+            raise
+        future.add_done_callback(on_done)
+        return await asyncio.wrap_future(future)
+
+    def release(self) -> None:
+        """归还未使用的排队名额"""
+        self._queue.reserved -= self._remaining
+        self._remaining = 0
+
+    async def __aenter__(self) -> "Admission":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.release()
+
+
+class IOScheduler:
+    """按存储后端划分线程池的 I/O 调度器"""
+
+    def __init__(self):
+        self._queues: Dict[str, _BackendQueue] = {}
+        self._inflight_bytes = 0
+        self._budget: Optional[asyncio.Condition] = None
+        # 归还在途字节的任务，保持引用直到完成
+        self._releasing: Set[asyncio.Task] = set()
+
+    def _queue(self, backend_id: Optional[str]) -> _BackendQueue:
+        key = backend_id or DEFAULT_BACKEND_KEY
+        if key not in self._queues:
+            self._queues[key] = _BackendQueue(key)
+        return self._queues[key]
+
+    def admit(
+        self, backend_id: Optional[str], backend: StorageBackend, count: int = 1
+    ) -> Admission:
+        """
+        为 count 个任务申请排队名额，队列已满时抛出 IOQueueFullError（429）
+        队列为空时总是准入，单个超大批次不会被永久拒绝
+        """
+        queue = self._queue(backend_id)
+        if queue.depth > 0 and queue.depth + count > IO_QUEUE_LIMIT:
+            queue.rejected += 1
+            raise IOQueueFullError(queue.key)
+        queue.reserved += count
+        return Admission(self, queue, backend, count)
+
+    async def run(
+        self,
+        backend_id: Optional[str],
+        backend: StorageBackend,
+        func: Callable,
+        *args,
+        size: int = 0,
+    ):
+        """准入并执行单个 I/O 任务"""
+        async with self.admit(backend_id, backend) as admission:
+            return await admission.run(func, *args, size=size)
+
+    async def acquire_bytes(self, nbytes: int) -> int:
+        """占用在途字节预算，超过预算的单个任务在其他任务都完成后独占执行"""
+        nbytes = min(max(nbytes, 0), IO_INFLIGHT_BYTES)
+        if not nbytes:
+            return 0
+        if self._budget is None:
+            self._budget = asyncio.Condition()
+        async with self._budget:
+            await self._budget.wait_for(
+                lambda: self._inflight_bytes + nbytes <= IO_INFLIGHT_BYTES
+            )
+            self._inflight_bytes += nbytes
+        return nbytes
+
+    async def release_bytes(self, nbytes: int) -> None:
+        if not nbytes or self._budget is None:
+            return
+        async with self._budget:
+            self._inflight_bytes -= nbytes
+            self._budget.notify_all()
+
+    def release_bytes_threadsafe(
+        self, loop: asyncio.AbstractEventLoop, nbytes: int
+    ) -> None:
+        """在线程池的回调中归还在途字节"""
+        if not nbytes:
+            return
+
+        def release():
+            task = loop.create_task(self.release_bytes(nbytes))
+            self._releasing.add(task)
+            task.add_done_callback(self._releasing.discard)
+
+        try:
+            loop.call_soon_threadsafe(release)
+        except RuntimeError:
+            # 事件循环已关闭（进程退出）
+            pass
+
+    def snapshot(self) -> dict:
+        """当前队列深度、等待时间和在途字节"""
+        return {
+            "inflight_bytes": self._inflight_bytes,
+            "inflight_bytes_limit": IO_INFLIGHT_BYTES,
+            "small_file_size": IO_SMALL_FILE_SIZE,
+            "backends": [queue.snapshot() for queue in self._queues.values()],
+        }
+
+    def shutdown(self) -> None:
+        for queue in self._queues.values():
+            queue.shutdown()
+        self._queues.clear()
+        self._budget = None
+
+
+io_scheduler = IOScheduler()
@@ -0,0 +1,110 @@
+"""
+对象元数据缓存
+按存储路径缓存对象的大小、ETag 和修改时间，下载和预览时不必每次都 stat 磁盘或
+HEAD 一次 S3；对象不存在的结果也会缓存一小段时间（负缓存）
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+
+# 元数据缓存有效期（秒）
+OBJECT_META_CACHE_TTL = float(os.getenv("OBJECT_META_CACHE_TTL", "300"))
+# "对象不存在" 结果的缓存有效期（秒），应明显短于正常缓存
+OBJECT_META_NEGATIVE_TTL = float(os.getenv("OBJECT_META_NEGATIVE_TTL", "10"))
+# 每个存储后端最多缓存的对象数
+OBJECT_META_CACHE_SIZE = int(os.getenv("OBJECT_META_CACHE_SIZE", "10000"))
+# 乐观模式：下载远程对象前不检查是否存在，信任数据库记录，由存储服务自行返回 404
+OBJECT_META_OPTIMISTIC = os.getenv("OBJECT_META_OPTIMISTIC", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+
+class ObjectMeta:
+    """对象元数据"""
+
+    __slots__ = ("size", "etag", "last_modified")
+
+    def __init__(
+        self,
+        size: int,
+        etag: Optional[str] = None,
+        last_modified: Optional[datetime] = None,
+    ):
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def __repr__(self) -> str:
+        return (
+            f"ObjectMeta(size={self.size}, etag={self.etag!r}, "
+            f"last_modified={self.last_modified!r})"
+        )
+
+
+class ObjectMetaCache:
+    """线程安全的 LRU 元数据缓存，值为 ObjectMeta 或 None（对象不存在）"""
+
+    def __init__(
+        self,
+        ttl: float = OBJECT_META_CACHE_TTL,
+        negative_ttl: float = OBJECT_META_NEGATIVE_TTL,
+        max_size: int = OBJECT_META_CACHE_SIZE,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        # storage_path -> (过期时间, ObjectMeta | None)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, storage_path: str) -> Tuple[bool, Optional[ObjectMeta]]:
+        """
+        Returns:
+            (是否命中, 元数据)；命中且元数据为 None 表示对象已知不存在
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(storage_path)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[storage_path]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(storage_path)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, storage_path: str, meta: Optional[ObjectMeta]) -> None:
+        """写入元数据，meta 为 None 时按负缓存有效期记录对象不存在"""
+        ttl = self.ttl if meta is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[storage_path] = (time.monotonic() + ttl, meta)
+            self._entries.move_to_end(storage_path)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, storage_path: str) -> None:
+        with self._lock:
+            self._entries.pop(storage_path, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
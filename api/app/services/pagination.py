@@ -0,0 +1,97 @@
+"""
+列表分页
+支持两种模式：
+- 页码模式（page / page_size）：OFFSET 分页并返回总数，兼容旧客户端
+- 游标模式（cursor）：按 (排序时间, id) 做键集分页，翻到多深都只扫描一页数据，
+  总数按需统计
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(sort_value: datetime, item_id: str) -> str:
+    """把一页最后一条记录的 (排序时间, id) 编码为不透明游标"""
+    raw = json.dumps([sort_value.isoformat(), item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, item_id = json.loads(raw)
+        return datetime.fromisoformat(sort_value), str(item_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="无效的分页游标"
+        )
+
+
+async def _count(db: AsyncSession, stmt: Select) -> int:
+    count_stmt = select(func.count()).select_from(stmt.order_by(None).subquery())
+    return (await db.execute(count_stmt)).scalar()
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    sort_column: Any,
+    id_column: Any,
+    page: int,
+    page_size: int,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+) -> Tuple[list, dict]:
+    """
+    按 sort_column 倒序分页，id_column 作为相同时间时的次序
+
+    Args:
+        cursor: 为 None 时使用页码模式；空字符串表示游标模式的第一页
+        include_total: 游标模式下是否统计总数（页码模式总是返回总数）
+
+    Returns:
+        (当前页记录, 分页信息)
+    """
+    ordered = stmt.order_by(sort_column.desc(), id_column.desc())
+
+    if cursor is None:
+        total = await _count(db, stmt)
+        result = await db.execute(
+            ordered.offset((page - 1) * page_size).limit(page_size)
+        )
+        return result.scalars().all(), {
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": (total + page_size - 1) // page_size,
+        }
+
+    query = ordered
+    if cursor:
+        sort_value, item_id = decode_cursor(cursor)
+        query = query.where(tuple_(sort_column, id_column) < (sort_value, item_id))
+    # 多取一条判断是否还有下一页
+    items = (await db.execute(query.limit(page_size + 1))).scalars().all()
+    has_more = len(items) > page_size
+    items = items[:page_size]
+
+    meta = {
+        "page_size": page_size,
+        "next_cursor": None,
+        "has_more": has_more,
+    }
+    if has_more:
+        last = items[-1]
+        meta["next_cursor"] = encode_cursor(
+            getattr(last, sort_column.key), getattr(last, id_column.key)
+        )
+    if include_total:
+        meta["total"] = await _count(db, stmt)
+    return items, meta
@@ -0,0 +1,407 @@
+"""
+异步 S3 客户端
+基于 httpx 连接池和自行实现的 AWS 签名（SigV2 / SigV4，与同步客户端的签名版本一致），
+供异步路由直接 await，避免同步的 boto3 调用在 S3 延迟抖动时阻塞整个事件循环
+"""
+
+import base64
+import datetime
+import hashlib
+import hmac
+import ipaddress
+import os
+from email.utils import formatdate
+from typing import AsyncIterator, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+import httpx
+
+# 每个 S3 后端异步连接池的最大连接数
+S3_ASYNC_MAX_CONNECTIONS = int(os.getenv("S3_ASYNC_MAX_CONNECTIONS", "32"))
+# 单次请求的连接/读写超时（秒）
+S3_ASYNC_TIMEOUT = float(os.getenv("S3_ASYNC_TIMEOUT", "30"))
+
+EMPTY_PAYLOAD_SHA256 = hashlib.sha256(b"").hexdigest()
+
+# SigV2 中需要参与签名的子资源查询参数
+SIGV2_SUBRESOURCES = frozenset(
+    {
+        "acl",
+        "cors",
+        "delete",
+        "lifecycle",
+        "location",
+        "logging",
+        "notification",
+        "partNumber",
+        "policy",
+        "requestPayment",
+        "response-cache-control",
+        "response-content-disposition",
+        "response-content-encoding",
+        "response-content-language",
+        "response-content-type",
+        "response-expires",
+        "tagging",
+        "torrent",
+        "uploadId",
+        "uploads",
+        "versionId",
+        "versioning",
+        "versions",
+        "website",
+    }
+)
+
+
+class S3AsyncError(Exception):
+    """S3 返回了非 2xx 响应"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"S3 请求失败 ({status_code}): {message}")
+        self.status_code = status_code
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+
+def _uri_encode(value: str, safe: str = "~") -> str:
+    """按 SigV4 规则编码：只保留非保留字符"""
+    return quote(value, safe=safe)
+
+
+def _canonical_query(query: dict) -> str:
+    return "&".join(
+        f"{_uri_encode(str(k))}={_uri_encode(str(v))}" for k, v in sorted(query.items())
+    )
+
+
+class SigV4Signer:
+    """AWS Signature Version 4 请求签名（Authorization 头方式）"""
+
+    def __init__(
+        self, access_key: str, secret_key: str, region: str, service: str = "s3"
+    ):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.service = service
+
+    def _signing_key(self, datestamp: str) -> bytes:
+        key = _hmac(f"AWS4{self.secret_key}".encode("utf-8"), datestamp)
+        key = _hmac(key, self.region)
+        key = _hmac(key, self.service)
+        return _hmac(key, "aws4_request")
+
+    def sign(
+        self,
+        method: str,
+        host: str,
+        path: str,
+        query: dict,
+        headers: dict,
+        payload_hash: str,
+        now: Optional[datetime.datetime] = None,
+    ) -> dict:
+        """
+        计算签名并返回需要附加到请求上的头
+
+        Args:
+            path: 已按 URI 规则编码的路径
+            query: 查询参数（未编码）
+            headers: 需要参与签名的其他请求头
+            payload_hash: 请求体的 SHA-256（十六进制）
+        """
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        datestamp = now.strftime("%Y%m%d")
+
+        signed = {
+            "host": host,
+            "x-amz-date": amz_date,
+            "x-amz-content-sha256": payload_hash,
+            **{name.lower(): str(value).strip() for name, value in headers.items()},
+        }
+        signed_headers = ";".join(sorted(signed))
+        canonical_headers = "".join(
+            f"{name}:{signed[name]}\n" for name in sorted(signed)
+        )
+        canonical_query = _canonical_query(query)
+        canonical_request = "\n".join(
+            [
+                method,
+                path,
+                canonical_query,
+                canonical_headers,
+                signed_headers,
+                payload_hash,
+            ]
+        )
+
+        scope = f"{datestamp}/{self.region}/{self.service}/aws4_request"
+        string_to_sign = "\n".join(
+            [
+                "AWS4-HMAC-SHA256",
+                amz_date,
+                scope,
+                hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+            ]
+        )
+        signature = hmac.new(
+            self._signing_key(datestamp),
+            string_to_sign.encode("utf-8"),
+            hashlib.sha256,
+        ).hexdigest()
+
+        return {
+            "x-amz-date": amz_date,
+            "x-amz-content-sha256": payload_hash,
+            "authorization": (
+                f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+                f"SignedHeaders={signed_headers}, Signature={signature}"
+            ),
+        }
+
+
+class SigV2Signer:
+    """
+    AWS Signature Version 2 请求签名（HMAC-SHA1，与 boto3 的 signature_version="s3" 相同）
+    阿里云 OSS 等只兼容 V2 签名的服务使用
+    """
+
+    def __init__(self, access_key: str, secret_key: str, bucket_name: str):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.bucket_name = bucket_name
+
+    def sign(
+        self,
+        method: str,
+        host: str,
+        path: str,
+        query: dict,
+        headers: dict,
+        payload_hash: str,
+        now: Optional[datetime.datetime] = None,
+    ) -> dict:
+        """计算签名并返回需要附加到请求上的头，参数与 SigV4Signer.sign 相同（不使用 payload_hash）"""
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        date = formatdate(now.timestamp(), usegmt=True)
+        lowered = {name.lower(): str(value).strip() for name, value in headers.items()}
+
+        # 虚拟主机风格的请求，规范资源仍以 /桶名 开头
+        resource = path
+        if host.startswith(f"{self.bucket_name}."):
+            resource = f"/{self.bucket_name}{path}"
+        subresources = sorted(key for key in query if key in SIGV2_SUBRESOURCES)
+        if subresources:
+            resource += "?" + "&".join(
+                key if query[key] in (None, "") else f"{key}={query[key]}"
+                for key in subresources
+            )
+
+        amz_headers = "".join(
+            f"{name}:{lowered[name]}\n"
+            for name in sorted(lowered)
+            if name.startswith("x-amz-")
+        )
+        string_to_sign = "\n".join(
+            [
+                method,
+                lowered.get("content-md5", ""),
+                lowered.get("content-type", ""),
+                date,
+                amz_headers + resource,
+            ]
+        )
+        signature = base64.b64encode(
+            hmac.new(
+                self.secret_key.encode("utf-8"),
+                string_to_sign.encode("utf-8"),
+                hashlib.sha1,
+            ).digest()
+        ).decode("ascii")
+
+        return {
+            "date": date,
+            "authorization": f"AWS {self.access_key}:{signature}",
+        }
+
+
+class AsyncS3Client:
+    """最小化的异步 S3 对象客户端（HEAD / GET / PUT / DELETE）"""
+
+    def __init__(
+        self,
+        bucket_name: str,
+        access_key: str,
+        secret_key: str,
+        endpoint_url: str = None,
+        region_name: str = "us-east-1",
+        signature_version: str = "s3v4",
+    ):
+        """
+        Args:
+            signature_version: "s3" 使用 SigV2 签名，"s3v4" 使用 SigV4 签名
+        """
+        self.bucket_name = bucket_name
+        if signature_version == "s3":
+            self.signer = SigV2Signer(access_key, secret_key, bucket_name)
+        else:
+            self.signer = SigV4Signer(access_key, secret_key, region_name)
+
+        if endpoint_url:
+            if "://" not in endpoint_url:
+                endpoint_url = f"https://{endpoint_url}"
+        elif region_name == "us-east-1":
+            endpoint_url = "https://s3.amazonaws.com"
+        else:
+            endpoint_url = f"https://s3.{region_name}.amazonaws.com"
+        parts = urlsplit(endpoint_url)
+        self._scheme = parts.scheme
+        self._endpoint_host = parts.netloc
+
+        # 与同步客户端一致优先使用虚拟主机风格；IP、localhost 或桶名不兼容 DNS 时回退到路径风格
+        self._virtual_host = self._supports_virtual_host(parts.hostname or "")
+
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=S3_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=S3_ASYNC_MAX_CONNECTIONS,
+            ),
+            # 连接池排队不设超时，并发量由连接数限制
+            timeout=httpx.Timeout(S3_ASYNC_TIMEOUT, pool=None),
+        )
+
+    def _supports_virtual_host(self, hostname: str) -> bool:
+        if hostname == "localhost" or "." in self.bucket_name:
+            return False
+        try:
+            ipaddress.ip_address(hostname)
+            return False
+        except ValueError:
+            return True
+
+    def _locate(self, key: str) -> Tuple[str, str]:
+        """返回 (host, 已编码的路径)"""
+        encoded_key = _uri_encode(key, safe="/~")
+        if self._virtual_host:
+            return f"{self.bucket_name}.{self._endpoint_host}", f"/{encoded_key}"
+        return self._endpoint_host, f"/{self.bucket_name}/{encoded_key}"
+
+    async def request(
+        self,
+        method: str,
+        key: str,
+        headers: Optional[dict] = None,
+        content: Optional[bytes] = None,
+        query: Optional[dict] = None,
+        stream: bool = False,
+    ) -> httpx.Response:
+        """签名并发送请求，stream=True 时响应体需由调用方读取并关闭"""
+        host, path = self._locate(key)
+        query = query or {}
+        headers = dict(headers or {})
+        payload_hash = (
+            hashlib.sha256(content).hexdigest()
+            if content is not None
+            else EMPTY_PAYLOAD_SHA256
+        )
+        headers.update(
+            self.signer.sign(method, host, path, query, headers, payload_hash)
+        )
+
+        url = f"{self._scheme}://{host}{path}"
+        if query:
+            url += f"?{_canonical_query(query)}"
+        request = self._client.build_request(
+            method, url, headers=headers, content=content
+        )
+        return await self._client.send(request, stream=stream)
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response) -> None:
+        if response.status_code >= 300:
+            raise S3AsyncError(response.status_code, response.text[:200])
+
+    async def head_object(self, key: str) -> Optional[dict]:
+        """
+        获取对象元数据，对象不存在时返回 None
+
+        Returns:
+            {"size": int, "etag": str, "content_type": str, "last_modified": str}
+        """
+        response = await self.request("HEAD", key)
+        if response.status_code == 404:
+            return None
+        self._raise_for_status(response)
+        return {
+            "size": int(response.headers.get("content-length", 0)),
+            "etag": response.headers.get("etag"),
+            "content_type": response.headers.get("content-type"),
+            "last_modified": response.headers.get("last-modified"),
+        }
+
+    async def get_object(
+        self, key: str, byte_range: Optional[Tuple[int, int]] = None
+    ) -> bytes:
+        """
+        读取对象内容
+
+        Args:
+            byte_range: (起始, 结束) 闭区间，None 表示整个对象
+        """
+        headers = {}
+        if byte_range:
+            headers["range"] = f"bytes={byte_range[0]}-{byte_range[1]}"
+        response = await self.request("GET", key, headers=headers)
+        # 空对象请求范围时返回 416
+        if byte_range and response.status_code == 416:
+            return b""
+        self._raise_for_status(response)
+        return response.content
+
+    async def stream_object(
+        self,
+        key: str,
+        byte_range: Optional[Tuple[int, int | None]] = None,
+        chunk_size: int = 1024 * 1024,
+    ) -> AsyncIterator[bytes]:
+        """
+        流式读取对象内容，不把整个对象读入内存
+
+        Args:
+            byte_range: (起始, 结束) 闭区间，结束为 None 表示读到末尾
+        """
+        headers = {}
+        if byte_range:
+            start, end = byte_range
+            headers["range"] = f"bytes={start}-{'' if end is None else end}"
+        response = await self.request("GET", key, headers=headers, stream=True)
+        try:
+            if byte_range and response.status_code == 416:
+                return
+            if response.status_code >= 300:
+                await response.aread()
+                self._raise_for_status(response)
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+        finally:
+            await response.aclose()
+
+    async def put_object(
+        self, key: str, body: bytes, content_type: Optional[str] = None
+    ) -> str:
+        """上传对象，返回 ETag"""
+        headers = {"content-type": content_type} if content_type else {}
+        response = await self.request("PUT", key, headers=headers, content=body)
+        self._raise_for_status(response)
+        return response.headers.get("etag")
+
+    async def delete_object(self, key: str) -> None:
+        response = await self.request("DELETE", key)
+        self._raise_for_status(response)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -0,0 +1,273 @@
+"""
+全文搜索索引
+- SQLite：FTS5 trigram 分词的索引表，由触发器与数据表同步；按三字符切分，中文等不以
+  空格分词的文本也能做子串匹配
+- Postgres：pg_trgm 的 GIN 索引，ILIKE 查询直接使用索引
+索引覆盖笔记的标题和内容、文件名以及文件夹名。trigram 至少需要 3 个字符，更短的查询词回退为 LIKE 扫描
+
+回填 / 重建索引：python -m app.services.search_index rebuild
+"""
+
+import argparse
+import asyncio
+import html
+import os
+import re
+from typing import List, Optional
+
+from sqlalchemy import column, func, literal_column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session_maker
+from app.models import File, Folder, Note
+
+# trigram 索引可用的最短查询词
+TRIGRAM_MIN_QUERY = 3
+# 搜索结果片段的长度（字符）
+SEARCH_SNIPPET_LENGTH = int(os.getenv("SEARCH_SNIPPET_LENGTH", "64"))
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# FTS5 snippet() 使用的临时标记，转义 HTML 后再替换为高亮标签
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+
+NOTES_FTS = "notes_fts"
+FILES_FTS = "files_fts"
+FOLDERS_FTS = "folders_fts"
+notes_fts = table(NOTES_FTS, column("note_id"), column("title"), column("content"))
+
+# 索引表 -> (数据表, 索引表中对应数据表主键的列, 索引列)
+FTS_TABLES = {
+    NOTES_FTS: ("notes", "note_id", ("title", "content")),
+    FILES_FTS: ("files", "file_id", ("filename",)),
+    FOLDERS_FTS: ("folders", "folder_id", ("name",)),
+}
+
+# 数据库中已创建的 FTS 表（进程内缓存，迁移在启动时完成）
+_existing_fts: Optional[set] = None
+
+
+async def _has_fts(db: AsyncSession, name: str) -> bool:
+    global _existing_fts
+    if db.bind.dialect.name != "sqlite":
+        return False
+    if _existing_fts is None:
+        rows = await db.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'table'")
+        )
+        _existing_fts = {row[0] for row in rows} & set(FTS_TABLES)
+    return name in _existing_fts
+
+
+def fts_phrase(query: str, columns: tuple) -> str:
+    """把用户输入转换为 FTS5 查询：限定列的短语匹配，避免输入被解析为查询语法"""
+    phrase = '"' + query.replace('"', '""') + '"'
+    return "{" + " ".join(columns) + "}: " + phrase
+
+
+def _render_snippet(raw: Optional[str]) -> str:
+    """转义 FTS5 生成的片段并替换高亮标记"""
+    if not raw:
+        return ""
+    return (
+        html.escape(raw)
+        .replace(_MARK_START, HIGHLIGHT_START)
+        .replace(_MARK_END, HIGHLIGHT_END)
+    )
+
+
+def make_snippet(value: Optional[str], query: str) -> str:
+    """在 Python 中截取包含查询词的片段并高亮（不使用 FTS5 时）"""
+    if not value:
+        return ""
+    match = re.search(re.escape(query), value, re.IGNORECASE)
+    if not match:
+        snippet = html.escape(value[:SEARCH_SNIPPET_LENGTH])
+        return snippet + ("…" if len(value) > SEARCH_SNIPPET_LENGTH else "")
+    context = max((SEARCH_SNIPPET_LENGTH - len(query)) // 2, 0)
+    start = max(match.start() - context, 0)
+    end = min(match.end() + context, len(value))
+    return (
+        ("…" if start > 0 else "")
+        + html.escape(value[start : match.start()])
+        + HIGHLIGHT_START
+        + html.escape(match.group())
+        + HIGHLIGHT_END
+        + html.escape(value[match.end() : end])
+        + ("…" if end < len(value) else "")
+    )
+
+
+async def _fts_condition(db: AsyncSession, name: str, id_column, query: str):
+    """
+    数据表记录包含查询词的过滤条件：有 FTS 索引时使用索引表，否则返回 None
+    （Postgres 上调用方的 ILIKE 条件由 pg_trgm 索引加速）
+    """
+    if len(query) < TRIGRAM_MIN_QUERY or not await _has_fts(db, name):
+        return None
+    _, key, columns = FTS_TABLES[name]
+    return id_column.in_(
+        select(column(key))
+        .select_from(table(name))
+        .where(
+            text(f"{name} MATCH :{name}_query").bindparams(
+                **{f"{name}_query": fts_phrase(query, columns)}
+            )
+        )
+    )
+
+
+async def note_search_condition(db: AsyncSession, query: str):
+    """笔记标题或内容包含查询词的过滤条件"""
+    condition = await _fts_condition(db, NOTES_FTS, Note.id, query)
+    if condition is not None:
+        return condition
+    return Note.title.ilike(f"%{query}%") | Note.content.ilike(f"%{query}%")
+
+
+async def file_name_condition(db: AsyncSession, query: str):
+    """文件名包含查询词的过滤条件"""
+    condition = await _fts_condition(db, FILES_FTS, File.id, query)
+    if condition is not None:
+        return condition
+    return File.filename.ilike(f"%{query}%")
+
+
+async def folder_name_condition(db: AsyncSession, query: str):
+    """文件夹名包含查询词的过滤条件"""
+    condition = await _fts_condition(db, FOLDERS_FTS, Folder.id, query)
+    if condition is not None:
+        return condition
+    return Folder.name.ilike(f"%{query}%")
+
+
+async def search_notes(
+    db: AsyncSession, user_id: str, query: str, limit: int = 20
+) -> List[dict]:
+    """
+    搜索笔记，按相关度排序并返回高亮片段
+
+    Returns:
+        [{"id", "title", "title_highlight", "snippet", "visibility", "updated_at"}]
+    """
+    columns = (Note.id, Note.title, Note.visibility, Note.updated_at)
+
+    if len(query) >= TRIGRAM_MIN_QUERY and await _has_fts(db, NOTES_FTS):
+        fts = literal_column(NOTES_FTS)
+        size = min(SEARCH_SNIPPET_LENGTH, 64)
+        stmt = (
+            select(
+                *columns,
+                func.snippet(fts, 1, _MARK_START, _MARK_END, "…", size).label(
+                    "title_snippet"
+                ),
+                func.snippet(fts, 2, _MARK_START, _MARK_END, "…", size).label(
+                    "content_snippet"
+                ),
+            )
+            .select_from(notes_fts)
+            .join(Note, Note.id == notes_fts.c.note_id)
+            .where(
+                text("notes_fts MATCH :note_query").bindparams(
+                    note_query=fts_phrase(query, FTS_TABLES[NOTES_FTS][2])
+                ),
+                Note.user_id == user_id,
+            )
+            # bm25 越小越相关，标题命中的权重高于内容
+            .order_by(func.bm25(fts, 0.0, 5.0, 1.0), Note.updated_at.desc())
+            .limit(limit)
+        )
+        rows = (await db.execute(stmt)).all()
+        return [
+            {
+                "id": row.id,
+                "title": row.title,
+                "title_highlight": _render_snippet(row.title_snippet),
+                "snippet": _render_snippet(row.content_snippet),
+                "visibility": row.visibility,
+                "updated_at": row.updated_at,
+            }
+            for row in rows
+        ]
+
+    stmt = (
+        select(*columns, Note.content)
+        .where(
+            Note.user_id == user_id,
+            Note.title.ilike(f"%{query}%") | Note.content.ilike(f"%{query}%"),
+        )
+        .limit(limit)
+    )
+    if db.bind.dialect.name == "postgresql" and len(query) >= TRIGRAM_MIN_QUERY:
+        rank = func.greatest(
+            func.word_similarity(query, func.coalesce(Note.title, "")) * 2,
+            func.word_similarity(query, Note.content),
+        )
+        stmt = stmt.order_by(rank.desc(), Note.updated_at.desc())
+    else:
+        stmt = stmt.order_by(Note.updated_at.desc())
+
+    rows = (await db.execute(stmt)).all()
+    return [
+        {
+            "id": row.id,
+            "title": row.title,
+            "title_highlight": make_snippet(row.title, query),
+            "snippet": make_snippet(row.content, query),
+            "visibility": row.visibility,
+            "updated_at": row.updated_at,
+        }
+        for row in rows
+    ]
+
+
+async def rebuild_index(db: AsyncSession, name: str) -> int:
+    """用数据表的当前内容重建 FTS 索引表，返回写入的记录数"""
+    source, key, columns = FTS_TABLES[name]
+    await db.execute(text(f"DELETE FROM {name}"))
+    result = await db.execute(
+        text(
+            f"INSERT INTO {name} ({key}, {', '.join(columns)}) "
+            f"SELECT id, {', '.join(columns)} FROM {source}"
+        )
+    )
+    await db.execute(text(f"INSERT INTO {name} ({name}) VALUES ('optimize')"))
+    await db.commit()
+    return result.rowcount
+
+
+async def _rebuild(names: List[str]) -> None:
+    async with async_session_maker() as db:
+        if db.bind.dialect.name != "sqlite":
+            # Postgres 的 trigram 索引随数据自动维护，只需更新统计信息
+            for name in names:
+                await db.execute(text(f"ANALYZE {FTS_TABLES[name][0]}"))
+            await db.commit()
+            print("Postgres 使用 pg_trgm 索引，无需回填，已更新统计信息")
+            return
+        for name in names:
+            if not await _has_fts(db, name):
+                print(f"索引表 {name} 不存在，请先执行数据库迁移")
+                continue
+            count = await rebuild_index(db, name)
+            print(f"{name}: 已写入 {count} 条记录")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="全文搜索索引维护")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild = subparsers.add_parser("rebuild", help="回填 / 重建索引")
+    rebuild.add_argument(
+        "names", nargs="*", help=f"索引表（{', '.join(FTS_TABLES)}），默认全部"
+    )
+    args = parser.parse_args()
+    unknown = set(args.names) - set(FTS_TABLES)
+    if unknown:
+        parser.error(f"未知的索引表: {', '.join(sorted(unknown))}")
+    if args.command == "rebuild":
+        asyncio.run(_rebuild(args.names or list(FTS_TABLES)))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,98 @@
 支持本地存储和 S3 存储，支持从数据库动态加载配置
 """
 
+import asyncio
 import json
 import os
-from typing import Tuple
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
 
 from fastapi import UploadFile
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .object_meta_cache import OBJECT_META_OPTIMISTIC
 from .storage_backend import LocalStorageBackend, S3StorageBackend, StorageBackend
 
+# 存储后端实例缓存的重新校验间隔（秒）
+# 本进程内的配置修改会立即失效缓存；该间隔用于发现其他进程（多 worker 部署）的修改
+STORAGE_BACKEND_CACHE_TTL = float(os.getenv("STORAGE_BACKEND_CACHE_TTL", "30"))
+# 被替换或删除的存储后端实例延迟关闭的时间（秒），留给仍在使用旧实例的请求完成
+STORAGE_BACKEND_CLOSE_DELAY = float(os.getenv("STORAGE_BACKEND_CLOSE_DELAY", "300"))
+
+
+class _CachedBackend:
+    """缓存的存储后端实例，version 为构建时配置的 updated_at"""
+
+    def __init__(self, backend: StorageBackend, version: datetime | None):
+        self.backend = backend
+        self.version = version
+        self.checked_at = time.monotonic()
+
+
+# 进程级缓存：backend_id -> 已构建的存储后端（复用 boto3 客户端及其连接池）
+_backend_cache: Dict[str, _CachedBackend] = {}
+# 默认存储后端ID及其查询时间
+_default_backend: Tuple[str | None, float] | None = None
+_default_local_storage: StorageBackend | None = None
+# 等待延迟关闭的旧实例
+_retiring: Dict[asyncio.Task, StorageBackend] = {}
+
+
+def _retire_backend(backend: StorageBackend) -> None:
+    """旧实例移出缓存后延迟关闭其连接池"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # 不在事件循环中：实例没有创建过异步客户端
+        return
+
+    async def close_later():
+        await asyncio.sleep(STORAGE_BACKEND_CLOSE_DELAY)
+        await backend.aclose()
+
+    task = loop.create_task(close_later())
+    _retiring[task] = backend
+    task.add_done_callback(lambda done: _retiring.pop(done, None))
+
+
+async def close_storage_backends() -> None:
+    """进程退出时关闭所有存储后端实例的连接池，包括等待延迟关闭的旧实例"""
+    backends = list(_retiring.values())
+    for task in list(_retiring):
+        task.cancel()
+    _retiring.clear()
+    backends += [cached.backend for cached in _backend_cache.values()]
+    _backend_cache.clear()
+    if _default_local_storage is not None:
+        backends.append(_default_local_storage)
+    results = await asyncio.gather(
+        *[backend.aclose() for backend in backends], return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"关闭存储后端失败: {result}")
+
+
+def invalidate_storage_backend_cache(backend_id: str | None = None) -> None:
+    """
+    使存储后端缓存失效，存储后端配置被创建、修改、删除或切换默认后端后调用
+
+    Args:
+        backend_id: 只失效指定后端；为 None 时清空全部
+    """
+    global _default_backend
+    if backend_id is None:
+        removed = list(_backend_cache.values())
+        _backend_cache.clear()
+    else:
+        removed = [_backend_cache.pop(backend_id, None)]
+    for cached in removed:
+        if cached is not None:
+            _retire_backend(cached.backend)
+    _default_backend = None
+
 
 def _get_default_local_storage() -> StorageBackend:
     """
@@ -21,7 +103,72 @@ def _get_default_local_storage() -> StorageBackend:
     Returns:
         LocalStorageBackend 实例
     """
-    return LocalStorageBackend(base_dir="data/files")
+    global _default_local_storage
+    if _default_local_storage is None:
+        _default_local_storage = LocalStorageBackend(base_dir="data/files")
+    return _default_local_storage
+
+
+def _build_backend(backend_type: str, config_json: str) -> StorageBackend | None:
+    """根据配置构建存储后端（S3 会检查桶是否存在，需在线程中运行）"""
+    config = json.loads(config_json)
+    if backend_type == "s3":
+        return S3StorageBackend(**config)
+    elif backend_type == "local":
+        return LocalStorageBackend(**config)
+    return None
+
+
+async def _load_backend(backend_config) -> StorageBackend | None:
+    """从配置记录获取存储后端，配置未修改时复用缓存的实例"""
+    backend_id = str(backend_config.id)
+    cached = _backend_cache.get(backend_id)
+    if cached and cached.version == backend_config.updated_at:
+        cached.checked_at = time.monotonic()
+        return cached.backend
+
+    backend = await asyncio.to_thread(
+        _build_backend, backend_config.backend_type, backend_config.config_json
+    )
+    if backend:
+        _backend_cache[backend_id] = _CachedBackend(backend, backend_config.updated_at)
+        if cached and cached.backend is not backend:
+            _retire_backend(cached.backend)
+    return backend
+
+
+async def _get_cached_backend(
+    session: AsyncSession, backend_id: str
+) -> StorageBackend | None:
+    """按ID获取存储后端：缓存未过期时不查询数据库，过期后按 updated_at 重新校验"""
+    cached = _backend_cache.get(backend_id)
+    if cached and time.monotonic() - cached.checked_at < STORAGE_BACKEND_CACHE_TTL:
+        return cached.backend
+
+    # 延迟导入以避免循环依赖
+    from app.models import StorageBackendConfig
+
+    stmt = select(StorageBackendConfig).where(StorageBackendConfig.id == backend_id)
+    result = await session.execute(stmt)
+    backend_config = result.scalar_one_or_none()
+    if not backend_config:
+        invalidate_storage_backend_cache(backend_id)
+        return None
+    return await _load_backend(backend_config)
+
+
+async def load_storage_backend(
+    session: AsyncSession, backend_id: str
+) -> StorageBackend | None:
+    """
+    根据ID获取存储后端，配置不存在或加载失败时返回 None
+    用于写入数据的场景，不能像读取时那样回退到默认本地存储
+    """
+    try:
+        return await _get_cached_backend(session, backend_id)
+    except Exception as e:
+        print(f"从数据库加载存储后端配置失败: {e}")
+        return None
 
 
 async def get_storage_backend_by_id(
@@ -35,20 +182,9 @@ async def get_storage_backend_by_id(
         return _get_default_local_storage()
 
     try:
-        # 延迟导入以避免循环依赖
-        from app.models import StorageBackendConfig
-
-        stmt = select(StorageBackendConfig).where(StorageBackendConfig.id == backend_id)
-        result = await session.execute(stmt)
-        backend_config = result.scalar_one_or_none()
-
-        if backend_config:
-            config = json.loads(backend_config.config_json)
-
-            if backend_config.backend_type == "s3":
-                return S3StorageBackend(**config)
-            elif backend_config.backend_type == "local":
-                return LocalStorageBackend(**config)
+        backend = await _get_cached_backend(session, backend_id)
+        if backend:
+            return backend
     except Exception as e:
         print(f"从数据库加载存储后端配置失败: {e}")
 
@@ -65,7 +201,19 @@ async def get_default_storage_backend(
     Returns:
         (StorageBackend实例, backend_id)
     """
+    global _default_backend
     try:
+        if (
+            _default_backend
+            and time.monotonic() - _default_backend[1] < STORAGE_BACKEND_CACHE_TTL
+        ):
+            backend_id = _default_backend[0]
+            if backend_id is None:
+                return _get_default_local_storage(), None
+            backend = await _get_cached_backend(session, backend_id)
+            if backend:
+                return backend, backend_id
+
         from app.models import StorageBackendConfig
 
         stmt = select(StorageBackendConfig).where(
@@ -75,16 +223,12 @@ async def get_default_storage_backend(
         result = await session.execute(stmt)
         backend_config = result.scalar_one_or_none()
 
-        if backend_config:
-            config = json.loads(backend_config.config_json)
-            backend = None
-
-            if backend_config.backend_type == "s3":
-                backend = S3StorageBackend(**config)
-            elif backend_config.backend_type == "local":
-                backend = LocalStorageBackend(**config)
-
+        if not backend_config:
+            _default_backend = (None, time.monotonic())
+        else:
+            backend = await _load_backend(backend_config)
             if backend:
+                _default_backend = (str(backend_config.id), time.monotonic())
                 return backend, str(backend_config.id)
     except Exception as e:
         print(f"从数据库加载默认存储后端配置失败: {e}")
@@ -138,6 +282,21 @@ def file_exists(storage_path: str, backend: StorageBackend) -> bool:
     return backend.exists(storage_path)
 
 
+async def afile_exists(storage_path: str, backend: StorageBackend) -> bool:
+    """
+    异步检查文件是否存在（用于下载和预览，结果经过元数据缓存）
+    乐观模式下远程存储直接信任数据库记录，对象缺失时由存储服务返回 404
+    """
+    if OBJECT_META_OPTIMISTIC and isinstance(backend, S3StorageBackend):
+        return True
+    return await backend.aget_meta(storage_path) is not None
+
+
+async def adelete_file(storage_path: str, backend: StorageBackend) -> bool:
+    """异步删除文件"""
+    return await backend.adelete(storage_path)
+
+
 def get_download_info(
     storage_path: str,
     backend: StorageBackend,
@@ -178,3 +337,56 @@ def get_public_url(
         公共 URL 或 None
     """
     return backend.get_public_url(storage_path, filename, disposition)
+
+
+async def delete_storage_objects(
+    session: AsyncSession, targets: Iterable[Tuple[str | None, str]]
+) -> List[dict]:
+    """
+    批量删除物理文件：按存储后端分组，每个后端只解析一次，
+    各后端用自己的批量删除实现（S3 DeleteObjects / 本地并行删除）同时进行
+
+    Args:
+        targets: (storage_backend_id, storage_path)
+
+    Returns:
+        删除失败的文件 [{"storage_backend_id", "storage_path", "error"}]
+    """
+    grouped: Dict[str | None, Dict[str, None]] = {}
+    for backend_id, storage_path in targets:
+        # 用 dict 去重并保持顺序
+        grouped.setdefault(backend_id, {})[storage_path] = None
+
+    # 会话不能并发使用，先依次解析后端
+    backends = {
+        backend_id: await get_storage_backend_by_id(session, backend_id)
+        for backend_id in grouped
+    }
+
+    async def delete_group(backend_id: str | None, paths: List[str]) -> List[dict]:
+        try:
+            failures = await backends[backend_id].adelete_many(paths)
+        except Exception as e:
+            failures = {path: str(e) for path in paths}
+        return [
+            {"storage_backend_id": backend_id, "storage_path": path, "error": error}
+            for path, error in failures.items()
+        ]
+
+    results = await asyncio.gather(
+        *[
+            delete_group(backend_id, list(paths))
+            for backend_id, paths in grouped.items()
+        ]
+    )
+    return [failure for group in results for failure in group]
+
+
+async def aget_public_url(
+    storage_path: str,
+    backend: StorageBackend,
+    filename: str | None = None,
+    disposition: str = "attachment",
+) -> str | None:
+    """异步获取文件的公共访问 URL（本地存储返回 None）"""
+    return await backend.aget_public_url(storage_path, filename, disposition)
@@ -3,24 +3,325 @@
 支持本地存储和 S3 兼容存储
 """
 
+import asyncio
+import errno
+import functools
+import hashlib
+import io
 import mimetypes
 import os
 import shutil
+import tempfile
+import threading
+import time
 from abc import ABC, abstractmethod
-from datetime import datetime
-from typing import BinaryIO, Tuple
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, BinaryIO, Dict, List, Optional, Tuple
 from urllib.parse import quote
 
 import boto3
+import httpx
 import shortuuid
 from botocore.exceptions import ClientError
 from fastapi import UploadFile
 
 from .file_type_detector import FileTypeDetector
+from .object_meta_cache import ObjectMeta, ObjectMetaCache
+from .s3_async import AsyncS3Client, S3AsyncError
+
+# 类型检测读取的文件头长度（魔术字节检测）
+DETECTION_HEAD_SIZE = 8192
+
+# S3 分片上传要求除最后一片外每片至少 5MB
+S3_MIN_PART_SIZE = 5 * 1024 * 1024
+
+# 本地写入时每次读取的块大小
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# 预签名下载 URL 的时间窗口（秒）：同一窗口内同一对象的 URL 完全相同，
+# 浏览器和反向代理可以缓存；每个 URL 的剩余有效期在 1 到 2 个窗口之间
+PRESIGNED_URL_WINDOW = int(os.getenv("PRESIGNED_URL_WINDOW", "3600"))
+# 每个 S3 后端缓存的预签名 URL 数量
+PRESIGNED_URL_CACHE_SIZE = int(os.getenv("PRESIGNED_URL_CACHE_SIZE", "10000"))
+
+# S3 DeleteObjects 单次请求最多删除的对象数（S3 上限为 1000）
+S3_DELETE_BATCH_SIZE = 1000
+# 批量删除时同时进行的 DeleteObjects 请求数
+S3_DELETE_CONCURRENCY = int(os.getenv("S3_DELETE_CONCURRENCY", "4"))
+
+# 代理下载时每次向客户端转发的块大小，内存占用与对象大小无关
+S3_PROXY_CHUNK_SIZE = int(os.getenv("S3_PROXY_CHUNK_SIZE", str(256 * 1024)))
+
+# 上传文件超出内存部分时落盘的目录：与默认本地存储同一文件系统时，
+# 保存上传文件只需硬链接，不再复制数据
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", "data/files/.spool")
+
+# 内核态复制（copy_file_range / sendfile）每次调用的最大字节数
+ZERO_COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+# 本地磁盘异步操作（exists / delete / 区间读取等）专用线程池的线程数
+DISK_IO_WORKERS = int(
+    os.getenv("DISK_IO_WORKERS", str(min(32, (os.cpu_count() or 4) * 4)))
+)
+# 开启后在事件循环线程中调用同步存储方法会直接报错，用于开发和测试时发现阻塞调用
+STORAGE_BLOCKING_CHECK = os.getenv("STORAGE_BLOCKING_CHECK", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# 受检查的同步方法，路由中应使用对应的 a 前缀异步版本
+BLOCKING_STORAGE_METHODS = (
+    "save",
+    "delete",
+    "exists",
+    "get_download_info",
+    "get_public_url",
+    "read_range",
+    "stat",
+    "delete_objects",
+    "open_stream",
+)
+
+# 内核态复制不可用时可以回退到用户态复制的错误码
+_ZERO_COPY_FALLBACK_ERRNOS = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.EOPNOTSUPP,
+    errno.EBADF,
+}
+
+
+class StreamDigest:
+    """流式统计文件大小并计算 SHA-256 / MD5，同时保留文件头用于类型检测"""
+
+    def __init__(self):
+        self.size = 0
+        self.head = b""
+        self._sha256 = hashlib.sha256()
+        self._md5 = hashlib.md5(usedforsecurity=False)
+
+    def update(self, chunk: bytes):
+        if len(self.head) < DETECTION_HEAD_SIZE:
+            self.head += chunk[: DETECTION_HEAD_SIZE - len(self.head)]
+        self.size += len(chunk)
+        self._sha256.update(chunk)
+        self._md5.update(chunk)
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+    @property
+    def md5(self) -> str:
+        return self._md5.hexdigest()
+
+    def apply_to(self, file_type_info: dict) -> dict:
+        """把摘要写入文件信息字典"""
+        file_type_info["sha256"] = self.sha256
+        file_type_info["md5"] = self.md5
+        return file_type_info
+
+    @classmethod
+    def of_stream(cls, fileobj: BinaryIO) -> "StreamDigest":
+        """只读遍历文件对象计算摘要，完成后把文件指针重置到开头"""
+        digest = cls()
+        while chunk := fileobj.read(COPY_BUFFER_SIZE):
+            digest.update(chunk)
+        fileobj.seek(0)
+        return digest
+
+
+def blob_key(sha256: str) -> str:
+    """
+    内容寻址存储的对象键
+    格式：blobs/哈希前2位/哈希3-4位/完整哈希
+    """
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+class UploadSpoolFile(tempfile.SpooledTemporaryFile):
+    """
+    超出内存上限后落盘为 UPLOAD_SPOOL_DIR 下有路径的临时文件的 SpooledTemporaryFile
+
+    标准库的 TemporaryFile 使用 O_TMPFILE | O_EXCL 打开匿名文件，无法再链接到目录中，
+    保存时只能完整复制一遍；有路径的临时文件可以直接硬链接到存储路径。
+    文件关闭时删除临时路径，已链接的存储文件不受影响。
+    """
+
+    def __init__(self, max_size: int = 0, **kwargs):
+        kwargs.setdefault("dir", UPLOAD_SPOOL_DIR)
+        kwargs.setdefault("prefix", "upload-")
+        super().__init__(max_size=max_size, **kwargs)
+
+    def rollover(self) -> None:
+        if self._rolled:
+            return
+        os.makedirs(self._TemporaryFileArgs["dir"], exist_ok=True)
+        memory = self._file
+        self._file = tempfile.NamedTemporaryFile(**self._TemporaryFileArgs)
+        del self._TemporaryFileArgs
+        position = memory.tell()
+        self._file.write(memory.getvalue())
+        self._file.seek(position)
+        self._rolled = True
+
+
+def install_upload_spool() -> None:
+    """让 Starlette 解析 multipart 表单时使用 UploadSpoolFile 暂存上传文件"""
+    from starlette import formparsers
+
+    formparsers.SpooledTemporaryFile = UploadSpoolFile
+
+
+def spooled_fileno(fileobj: BinaryIO) -> Optional[int]:
+    """
+    已落盘的上传文件的文件描述符
+    仍在内存中的 SpooledTemporaryFile 或没有文件描述符的对象返回 None
+    """
+    if isinstance(fileobj, tempfile.SpooledTemporaryFile):
+        # 直接调用 fileno() 会强制把内存中的数据写到磁盘
+        if not fileobj._rolled:
+            return None
+        fileobj = fileobj._file
+    try:
+        return fileobj.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _kernel_copy(src_fd: int, dst_fd: int, size: int) -> int:
+    """
+    在内核中把 src_fd 的前 size 字节追加到 dst_fd，不经过用户态缓冲
+    优先 copy_file_range（同一文件系统上可能是 reflink 或服务端复制），其次 sendfile
+
+    Returns:
+        已复制的字节数，小于 size 表示内核态复制不可用，剩余部分需由调用方复制
+    """
+    offset = 0
+    for method in ("copy_file_range", "sendfile"):
+        if not hasattr(os, method):
+            continue
+        try:
+            while offset < size:
+                count = min(ZERO_COPY_CHUNK_SIZE, size - offset)
+                if method == "copy_file_range":
+                    copied = os.copy_file_range(
+                        src_fd, dst_fd, count, offset_src=offset
+                    )
+                else:
+                    copied = os.sendfile(dst_fd, src_fd, offset, count)
+                if copied == 0:
+                    break
+                offset += copied
+            return offset
+        except OSError as e:
+            if e.errno not in _ZERO_COPY_FALLBACK_ERRNOS:
+                raise
+    return offset
+
+
+def finalize_spooled(fileobj: BinaryIO, target_path: str) -> bool:
+    """
+    把已落盘的上传文件放到 target_path，尽量避免再写一遍数据
+
+    1. 有路径的临时文件（UploadSpoolFile）：硬链接到目标路径（同一文件系统，不复制数据）
+    2. 匿名临时文件或跨文件系统：copy_file_range / sendfile 内核态复制
+
+    临时文件仍归调用方所有（由 Starlette 关闭并删除），所以这里只链接不重命名。
+
+    Returns:
+        False 表示上传文件仍在内存中，需由调用方自行写入
+    """
+    src_fd = spooled_fileno(fileobj)
+    if src_fd is None:
+        return False
+
+    name = getattr(getattr(fileobj, "_file", fileobj), "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        try:
+            os.link(name, target_path)
+            # 临时文件权限为 0600，与普通写入的文件保持一致
+            os.chmod(target_path, 0o644)
+            return True
+        except OSError:
+            pass
+
+    size = os.fstat(src_fd).st_size
+    with open(target_path, "wb") as buffer:
+        copied = _kernel_copy(src_fd, buffer.fileno(), size)
+        if copied < size:
+            fileobj.seek(copied)
+            shutil.copyfileobj(fileobj, buffer, COPY_BUFFER_SIZE)
+            fileobj.seek(0)
+    return True
+
+
+_disk_executor: ThreadPoolExecutor | None = None
+_disk_executor_lock = threading.Lock()
+
+
+def _get_disk_executor() -> ThreadPoolExecutor:
+    global _disk_executor
+    with _disk_executor_lock:
+        if _disk_executor is None:
+            _disk_executor = ThreadPoolExecutor(
+                max_workers=DISK_IO_WORKERS, thread_name_prefix="disk_io"
+            )
+        return _disk_executor
+
+
+def shutdown_disk_executor() -> None:
+    """关闭本地磁盘线程池（应用退出时调用，下次使用时重新创建）"""
+    global _disk_executor
+    with _disk_executor_lock:
+        if _disk_executor is not None:
+            _disk_executor.shutdown(wait=False)
+            _disk_executor = None
+
+
+def _forbid_on_event_loop(func):
+    """包装同步存储方法：在事件循环线程中调用时抛出 RuntimeError"""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return func(*args, **kwargs)
+        raise RuntimeError(
+            f"在事件循环中同步调用了 {func.__qualname__}，请改用对应的异步方法"
+        )
+
+    return wrapper
+
+
+def _close_async_client(client: AsyncS3Client, loop) -> None:
+    """在客户端所属的事件循环中关闭它；该循环已结束时连接已不可用，直接丢弃"""
+    if loop is not None and loop.is_running():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
 
 
 class StorageBackend(ABC):
-    """存储后端抽象基类"""
+    """
+    存储后端抽象基类
+
+    同步方法供线程池中的任务调用；路由等异步代码应使用 a 前缀的异步版本，
+    默认实现在线程中执行同步方法，子类可以覆盖为原生异步实现
+    """
+
+    # 是否启用内容寻址存储：相同内容的文件共享同一个物理对象（由 blobs 表计数）
+    content_addressed: bool = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if STORAGE_BLOCKING_CHECK:
+            for name in BLOCKING_STORAGE_METHODS:
+                if name in cls.__dict__:
+                    setattr(cls, name, _forbid_on_event_loop(cls.__dict__[name]))
 
     @abstractmethod
     def save(self, file: UploadFile, user_id: str = None) -> Tuple[str, int, dict]:
@@ -36,7 +337,9 @@ class StorageBackend(ABC):
             file_type_info: {
                 'category': 'text' | 'document' | 'image' | 'video' | 'binary',
                 'mime_type': str,
-                'confidence': 'high' | 'medium' | 'low'
+                'confidence': 'high' | 'medium' | 'low',
+                'sha256': str,  # 文件内容 SHA-256（十六进制）
+                'md5': str,  # 文件内容 MD5（十六进制，可与 S3 ETag 比对）
             }
         """
         pass
@@ -87,12 +390,133 @@ class StorageBackend(ABC):
     ):
         pass
 
+    def buffer_bytes(self, size: int) -> int:
+        """
+        保存 size 字节的文件时内存中最多同时持有的字节数
+        I/O 调度器据此计算全局在途字节预算
+        """
+        return min(size, COPY_BUFFER_SIZE)
+
+    @abstractmethod
+    def stat(self, storage_path: str) -> ObjectMeta | None:
+        """
+        获取对象元数据（大小、ETag、修改时间），对象不存在时返回 None
+        修改时间为带时区的 UTC 时间
+        """
+        pass
+
+    @property
+    def meta_cache(self) -> ObjectMetaCache:
+        """对象元数据缓存，随后端实例创建（配置变更后重建实例即清空缓存）"""
+        cache = self.__dict__.get("_meta_cache")
+        if cache is None:
+            cache = self.__dict__.setdefault("_meta_cache", ObjectMetaCache())
+        return cache
+
+    @abstractmethod
+    def open_stream(self, storage_path: str) -> BinaryIO:
+        """以只读流的方式打开文件（支持 read(size) 和 close()），由调用方关闭"""
+        pass
+
+    @abstractmethod
+    def read_range(
+        self, storage_path: str, start: int = 0, end: int | None = None
+    ) -> bytes:
+        """
+        读取文件的一段内容
+
+        Args:
+            start: 起始偏移
+            end: 结束偏移（包含），None 表示读到文件末尾
+        """
+        pass
+
+    async def run_blocking(self, func, *args):
+        """在线程中执行同步 I/O，子类可指定专用线程池"""
+        return await asyncio.to_thread(func, *args)
+
+    async def aclose(self) -> None:
+        """释放后端持有的异步资源（实例被替换、删除或进程退出时调用）"""
+        pass
+
+    async def asave(
+        self, file: UploadFile, user_id: str = None
+    ) -> Tuple[str, int, dict]:
+        """异步保存文件"""
+        return await self.run_blocking(self.save, file, user_id)
+
+    async def adelete(self, storage_path: str) -> bool:
+        """异步删除文件"""
+        return await self.run_blocking(self.delete, storage_path)
+
+    async def aexists(self, storage_path: str) -> bool:
+        """异步检查文件是否存在"""
+        return await self.run_blocking(self.exists, storage_path)
+
+    async def adelete_many(self, storage_paths: List[str]) -> Dict[str, str]:
+        """
+        批量删除文件，不存在的文件视为删除成功
+
+        Returns:
+            删除失败的文件 {storage_path: 错误信息}
+        """
+        results = await asyncio.gather(
+            *[self.adelete(path) for path in storage_paths], return_exceptions=True
+        )
+        return {
+            path: str(result)
+            for path, result in zip(storage_paths, results)
+            if isinstance(result, Exception)
+        }
+
+    async def astat(self, storage_path: str) -> ObjectMeta | None:
+        """异步获取对象元数据（不经过缓存）"""
+        return await self.run_blocking(self.stat, storage_path)
+
+    async def aget_meta(self, storage_path: str) -> ObjectMeta | None:
+        """获取对象元数据，优先使用缓存；对象不存在的结果也会被短暂缓存"""
+        hit, meta = self.meta_cache.get(storage_path)
+        if hit:
+            return meta
+        meta = await self.astat(storage_path)
+        self.meta_cache.put(storage_path, meta)
+        return meta
+
+    async def aget_download_info(
+        self, storage_path: str, filename: str = None, disposition: str = "attachment"
+    ) -> dict:
+        """异步获取文件下载信息"""
+        return await self.run_blocking(
+            self.get_download_info, storage_path, filename, disposition
+        )
+
+    async def aget_public_url(
+        self, storage_path: str, filename: str = None, disposition: str = "attachment"
+    ):
+        """异步获取公共 URL"""
+        return await self.run_blocking(
+            self.get_public_url, storage_path, filename, disposition
+        )
+
+    async def aopen_range(
+        self, storage_path: str, start: int = 0, end: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """
+        异步按块读取文件的一段内容
+
+        Args:
+            start: 起始偏移
+            end: 结束偏移（包含），None 表示读到文件末尾
+        """
+        yield await self.run_blocking(self.read_range, storage_path, start, end)
+
 
 class LocalStorageBackend(StorageBackend):
     """本地文件存储后端"""
 
-    def __init__(self, base_dir: str = "data/files"):
+    def __init__(self, base_dir: str = "data/files", content_addressed: bool = False):
         self.base_dir = base_dir
+        self.content_addressed = content_addressed
         os.makedirs(base_dir, exist_ok=True)
 
     def _normalize_path_to_url(self, filepath: str) -> str:
@@ -101,6 +525,9 @@ class LocalStorageBackend(StorageBackend):
 
     def save(self, file: UploadFile, user_id: str = None) -> Tuple[str, int, dict]:
         """保存文件到本地磁盘"""
+        if self.content_addressed:
+            return self._save_content_addressed(file)
+
         # 生成日期和时间
         now = datetime.now()
         date_dir = now.strftime("%Y%m%d")
@@ -117,26 +544,63 @@ class LocalStorageBackend(StorageBackend):
         new_filename = f"{shortuuid.uuid()}{file_ext}"
         filepath = os.path.join(target_dir, new_filename)
 
-        # 读取文件内容用于类型检测（读取前8KB用于魔术字节检测）
-        file_content = file.file.read(8192)
-        file.file.seek(0)  # 重置文件指针
-
-        # 保存文件
-        with open(filepath, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        if spooled_fileno(file.file) is not None:
+            # 上传文件已落盘：只读计算摘要，再链接或内核态复制到目标路径
+            digest = StreamDigest.of_stream(file.file)
+            finalize_spooled(file.file, filepath)
+        else:
+            # 单次遍历：写入文件的同时统计大小、计算摘要，并保留前8KB用于类型检测
+            digest = StreamDigest()
+            with open(filepath, "wb") as buffer:
+                while chunk := file.file.read(COPY_BUFFER_SIZE):
+                    digest.update(chunk)
+                    buffer.write(chunk)
 
-        # 获取文件信息
-        size = os.path.getsize(filepath)
         storage_path = self._normalize_path_to_url(filepath)
 
         # 检测文件类型
         file_type_info = FileTypeDetector.detect(
             filename=file.filename,
-            file_content=file_content,
+            file_content=digest.head,
+            mime_hint=file.content_type,
+        )
+
+        return storage_path, digest.size, digest.apply_to(file_type_info)
+
+    def _save_content_addressed(self, file: UploadFile) -> Tuple[str, int, dict]:
+        """
+        按内容哈希保存文件
+
+        先只读遍历计算摘要，已存在相同内容的文件时跳过写入；
+        否则写入临时文件后原子重命名，避免并发上传相同内容时互相覆盖出半个文件。
+        """
+        digest = StreamDigest.of_stream(file.file)
+        filepath = os.path.join(self.base_dir, *blob_key(digest.sha256).split("/"))
+
+        if not os.path.exists(filepath):
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            tmp_path = f"{filepath}.{shortuuid.uuid()}.tmp"
+            try:
+                if not finalize_spooled(file.file, tmp_path):
+                    with open(tmp_path, "wb") as buffer:
+                        shutil.copyfileobj(file.file, buffer, COPY_BUFFER_SIZE)
+                os.replace(tmp_path, filepath)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+        file_type_info = FileTypeDetector.detect(
+            filename=file.filename,
+            file_content=digest.head,
             mime_hint=file.content_type,
         )
 
-        return storage_path, size, file_type_info
+        return (
+            self._normalize_path_to_url(filepath),
+            digest.size,
+            digest.apply_to(file_type_info),
+        )
 
     def delete(self, storage_path: str) -> bool:
         """从本地磁盘删除文件"""
@@ -148,11 +612,85 @@ class LocalStorageBackend(StorageBackend):
         except Exception as e:
             print(f"删除文件失败: {e}")
             return False
+        finally:
+            self.meta_cache.invalidate(storage_path)
+
+    def _unlink(self, storage_path: str) -> None:
+        try:
+            os.remove(storage_path)
+        except FileNotFoundError:
+            pass
+        finally:
+            self.meta_cache.invalidate(storage_path)
+
+    async def adelete_many(self, storage_paths: List[str]) -> Dict[str, str]:
+        """在磁盘线程池中并行删除文件"""
+        results = await asyncio.gather(
+            *[self.run_blocking(self._unlink, path) for path in storage_paths],
+            return_exceptions=True,
+        )
+        return {
+            path: str(result)
+            for path, result in zip(storage_paths, results)
+            if isinstance(result, Exception)
+        }
 
     def exists(self, storage_path: str) -> bool:
         """检查本地文件是否存在"""
         return os.path.exists(storage_path)
 
+    def stat(self, storage_path: str) -> ObjectMeta | None:
+        """获取本地文件的大小和修改时间"""
+        try:
+            st = os.stat(storage_path)
+        except FileNotFoundError:
+            return None
+        return ObjectMeta(
+            size=st.st_size,
+            last_modified=datetime.fromtimestamp(st.st_mtime, timezone.utc),
+        )
+
+    def open_stream(self, storage_path: str) -> BinaryIO:
+        return open(storage_path, "rb")
+
+    def read_range(
+        self, storage_path: str, start: int = 0, end: int | None = None
+    ) -> bytes:
+        """读取本地文件的一段内容"""
+        with open(storage_path, "rb") as f:
+            f.seek(start)
+            return f.read(-1 if end is None else max(end - start + 1, 0))
+
+    async def run_blocking(self, func, *args):
+        """本地磁盘操作在专用线程池中执行，不占用默认线程池"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_disk_executor(), functools.partial(func, *args)
+        )
+
+    async def aopen_range(
+        self, storage_path: str, start: int = 0, end: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """在磁盘线程池中逐块读取，每块不超过 COPY_BUFFER_SIZE"""
+        f = await self.run_blocking(open, storage_path, "rb")
+        try:
+            await self.run_blocking(f.seek, start)
+            remaining = None if end is None else max(end - start + 1, 0)
+            while remaining is None or remaining > 0:
+                size = (
+                    COPY_BUFFER_SIZE
+                    if remaining is None
+                    else min(COPY_BUFFER_SIZE, remaining)
+                )
+                chunk = await self.run_blocking(f.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await self.run_blocking(f.close)
+
     def get_download_info(
         self, storage_path: str, filename: str = None, disposition: str = "attachment"
     ) -> dict:
@@ -167,6 +705,17 @@ class LocalStorageBackend(StorageBackend):
         """
         return None
 
+    async def aget_download_info(
+        self, storage_path: str, filename: str = None, disposition: str = "attachment"
+    ) -> dict:
+        """不涉及磁盘访问，直接返回"""
+        return {"type": "local", "path": storage_path}
+
+    async def aget_public_url(
+        self, storage_path: str, filename: str = None, disposition: str = "attachment"
+    ) -> str:
+        return None
+
 
 class S3StorageBackend(StorageBackend):
     """S3 兼容存储后端（支持 AWS S3, MinIO, 阿里云 OSS 等）"""
@@ -179,6 +728,10 @@ class S3StorageBackend(StorageBackend):
         endpoint_url: str = None,
         region_name: str = "us-east-1",
         public_url: str = None,
+        multipart_chunksize: int = 8 * 1024 * 1024,
+        multipart_concurrency: int = 4,
+        content_addressed: bool = False,
+        download_mode: str = "redirect",
     ):
         """
         初始化 S3 存储后端
@@ -190,17 +743,28 @@ class S3StorageBackend(StorageBackend):
             endpoint_url: S3 端点 URL（用于 MinIO 等兼容服务）
             region_name: 区域名称
             public_url: 公共访问 URL（可选，用于直接下载）
+            multipart_chunksize: 分片大小（字节），超过一个分片的文件使用分片上传
+            multipart_concurrency: 单个文件同时上传的分片数
+            content_addressed: 是否按内容哈希存储（相同内容只保存一份）
+            download_mode: redirect 重定向到预签名 URL；proxy 由服务端流式转发
         """
         self.bucket_name = bucket_name
         self.public_url = public_url
         self.endpoint_url = endpoint_url
         self.region_name = region_name
+        self.multipart_chunksize = max(int(multipart_chunksize), S3_MIN_PART_SIZE)
+        self.multipart_concurrency = max(int(multipart_concurrency), 1)
+        self.content_addressed = content_addressed
+        self.proxy_downloads = download_mode == "proxy"
 
         # 创建 S3 配置
         # 禁用分块传输以兼容更多 S3 服务（如阿里云 OSS）
         # https://help.aliyun.com/zh/oss/developer-reference/use-aws-sdks-to-access-oss
+        # 异步客户端使用相同的签名版本
+        self.signature_version = "s3"
         config = boto3.session.Config(
-            signature_version="s3", s3={"addressing_style": "virtual"}
+            signature_version=self.signature_version,
+            s3={"addressing_style": "virtual"},
         )
 
         # 创建 S3 客户端
@@ -213,6 +777,31 @@ class S3StorageBackend(StorageBackend):
             config=config,
         )
 
+        # 异步客户端在首次使用时按事件循环创建
+        self._credentials = (access_key, secret_key)
+        self._async_client: AsyncS3Client | None = None
+        self._async_client_loop = None
+
+        # 预签名下载 URL 缓存：(客户端, 对象键, 文件名, disposition) -> (窗口, URL)
+        self._url_cache: OrderedDict = OrderedDict()
+        self._url_cache_lock = threading.Lock()
+
+        # 公共 URL 的签名客户端：只用于本地计算签名，随后端实例一起复用
+        self.public_client = None
+        if public_url:
+            self.public_client = boto3.client(
+                "s3",
+                aws_access_key_id=access_key,
+                aws_secret_access_key=secret_key,
+                endpoint_url=(
+                    f"https://{public_url}"
+                    if not public_url.startswith("http")
+                    else public_url
+                ),
+                region_name=region_name,
+                config=config,
+            )
+
         # 确保桶存在
         self._ensure_bucket_exists()
 
@@ -288,40 +877,169 @@ class S3StorageBackend(StorageBackend):
         return f"anonymous/{date_str}/{new_filename}"
 
     def save(self, file: UploadFile, user_id: str = None) -> Tuple[str, int, dict]:
-        """保存文件到 S3"""
+        """
+        保存文件到 S3
+
+        按分片大小流式读取上传文件：不足一个分片的小文件使用单次 put_object，
+        否则使用分片上传，内存中最多同时持有 multipart_concurrency + 1 个分片。
+        """
+        if self.content_addressed:
+            return self._save_content_addressed(file)
+
         # 生成 S3 键
         s3_key = self._generate_s3_key(file.filename, user_id)
 
-        # 读取文件内容
-        file_content = file.file.read()
-        size = len(file_content)
+        # 读取第一个分片，同时用于类型检测（前8KB）
+        digest = StreamDigest()
+        first_chunk = file.file.read(self.multipart_chunksize)
+        digest.update(first_chunk)
+        file_type_info = FileTypeDetector.detect(
+            filename=file.filename,
+            file_content=digest.head,
+            mime_hint=file.content_type,
+        )
 
-        # 检测文件类型（使用完整内容或前8KB）
-        detection_content = (
-            file_content[:8192] if len(file_content) > 8192 else file_content
+        self._put_stream(
+            file.file, s3_key, first_chunk, file_type_info.get("mime_type"), digest
         )
+
+        # 重置文件指针（如果需要再次读取）
+        file.file.seek(0)
+
+        return s3_key, digest.size, digest.apply_to(file_type_info)
+
+    def buffer_bytes(self, size: int) -> int:
+        """分片上传时最多持有 multipart_concurrency + 1 个分片"""
+        return min(size, self.multipart_chunksize * (self.multipart_concurrency + 1))
+
+    def _save_content_addressed(self, file: UploadFile) -> Tuple[str, int, dict]:
+        """
+        按内容哈希保存文件到 S3
+
+        先在本地只读遍历上传的临时文件计算摘要，桶中已存在相同内容的对象时跳过上传。
+        """
+        digest = StreamDigest.of_stream(file.file)
+        s3_key = blob_key(digest.sha256)
         file_type_info = FileTypeDetector.detect(
             filename=file.filename,
-            file_content=detection_content,
+            file_content=digest.head,
             mime_hint=file.content_type,
         )
 
-        # 上传到 S3
-        try:
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Body=file_content,
-                ContentType=file_type_info.get("mime_type"),
-                ContentLength=size,  # 显式设置内容长度，避免 chunked 编码
+        if not self.exists(s3_key):
+            first_chunk = file.file.read(self.multipart_chunksize)
+            self._put_stream(
+                file.file, s3_key, first_chunk, file_type_info.get("mime_type")
             )
+            file.file.seek(0)
+
+        return s3_key, digest.size, digest.apply_to(file_type_info)
+
+    def _put_stream(
+        self,
+        fileobj: BinaryIO,
+        s3_key: str,
+        first_chunk: bytes,
+        content_type: str = None,
+        digest: StreamDigest = None,
+    ):
+        """不足一个分片时单次上传，否则使用分片上传"""
+        try:
+            if len(first_chunk) < self.multipart_chunksize:
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    Body=first_chunk,
+                    ContentType=content_type,
+                    ContentLength=len(
+                        first_chunk
+                    ),  # 显式设置内容长度，避免 chunked 编码
+                )
+            else:
+                self._multipart_upload(
+                    fileobj, s3_key, first_chunk, content_type, digest
+                )
         except Exception as e:
             raise Exception(f"上传文件到 S3 失败: {e}")
 
-        # 重置文件指针（如果需要再次读取）
-        file.file.seek(0)
+    def _upload_part(
+        self, s3_key: str, upload_id: str, part_number: int, body: bytes
+    ) -> dict:
+        """上传单个分片，返回 complete_multipart_upload 需要的分片信息"""
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket_name,
+            Key=s3_key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body,
+            ContentLength=len(body),
+        )
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
 
-        return s3_key, size, file_type_info
+    def _multipart_upload(
+        self,
+        fileobj: BinaryIO,
+        s3_key: str,
+        first_chunk: bytes,
+        content_type: str = None,
+        digest: StreamDigest = None,
+    ):
+        """
+        以分片上传方式流式写入 S3，失败时中止分片上传
+
+        Args:
+            fileobj: 已读取过第一个分片的文件对象
+            s3_key: S3 对象键
+            first_chunk: 第一个分片内容（已计入 digest）
+            content_type: 文件MIME类型
+            digest: 摘要计算器，后续分片会继续计入
+        """
+        params = {"Bucket": self.bucket_name, "Key": s3_key}
+        if content_type:
+            params["ContentType"] = content_type
+        upload_id = self.s3_client.create_multipart_upload(**params)["UploadId"]
+
+        parts = []
+        try:
+            with ThreadPoolExecutor(
+                max_workers=self.multipart_concurrency, thread_name_prefix="s3_part"
+            ) as executor:
+                pending = set()
+                part_number = 0
+                chunk = first_chunk
+                while chunk:
+                    part_number += 1
+                    pending.add(
+                        executor.submit(
+                            self._upload_part, s3_key, upload_id, part_number, chunk
+                        )
+                    )
+                    # 在途分片达到上限时等待，避免把整个文件读入内存
+                    if len(pending) >= self.multipart_concurrency:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        parts.extend(f.result() for f in done)
+                    chunk = fileobj.read(self.multipart_chunksize)
+                    if chunk and digest is not None:
+                        digest.update(chunk)
+
+                done, _ = wait(pending)
+                parts.extend(f.result() for f in done)
+
+            parts.sort(key=lambda p: p["PartNumber"])
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except Exception:
+            try:
+                self.s3_client.abort_multipart_upload(
+                    Bucket=self.bucket_name, Key=s3_key, UploadId=upload_id
+                )
+            except Exception as abort_error:
+                print(f"中止 S3 分片上传失败: {abort_error}")
+            raise
 
     def delete(self, storage_path: str) -> bool:
         """从 S3 删除文件"""
@@ -331,6 +1049,8 @@ class S3StorageBackend(StorageBackend):
         except Exception as e:
             print(f"从 S3 删除文件失败: {e}")
             return False
+        finally:
+            self.meta_cache.invalidate(storage_path)
 
     def exists(self, storage_path: str) -> bool:
         """检查 S3 文件是否存在"""
@@ -340,22 +1060,212 @@ class S3StorageBackend(StorageBackend):
         except ClientError:
             return False
 
-    def get_download_info(
-        self, storage_path: str, filename: str = None, disposition: str = "attachment"
-    ) -> dict:
-        """获取 S3 文件下载信息"""
-        # 生成预签名 URL（有效期 1 小时）
+    def stat(self, storage_path: str) -> ObjectMeta | None:
+        """获取 S3 对象元数据"""
+        try:
+            response = self.s3_client.head_object(
+                Bucket=self.bucket_name, Key=storage_path
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                return None
+            raise
+        return ObjectMeta(
+            size=response["ContentLength"],
+            etag=response.get("ETag"),
+            last_modified=response.get("LastModified"),
+        )
+
+    @property
+    def async_client(self) -> AsyncS3Client:
+        """当前事件循环的异步 S3 客户端（httpx 连接池不能跨事件循环使用）"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            if self._async_client is not None:
+                _close_async_client(self._async_client, self._async_client_loop)
+            access_key, secret_key = self._credentials
+            self._async_client = AsyncS3Client(
+                bucket_name=self.bucket_name,
+                access_key=access_key,
+                secret_key=secret_key,
+                endpoint_url=self.endpoint_url,
+                region_name=self.region_name,
+                signature_version=self.signature_version,
+            )
+            self._async_client_loop = loop
+        return self._async_client
+
+    async def aclose(self) -> None:
+        """关闭异步 S3 客户端的连接池"""
+        client, loop = self._async_client, self._async_client_loop
+        self._async_client = self._async_client_loop = None
+        if client is None:
+            return
+        if loop is asyncio.get_running_loop():
+            await client.aclose()
+        else:
+            _close_async_client(client, loop)
+
+    async def aexists(self, storage_path: str) -> bool:
+        """异步检查 S3 文件是否存在"""
         try:
-            params = {"Bucket": self.bucket_name, "Key": storage_path}
+            return await self.async_client.head_object(storage_path) is not None
+        except (S3AsyncError, httpx.HTTPError):
+            return False
 
-            if filename:
-                encoded_filename = quote(filename)
-                params["ResponseContentDisposition"] = (
-                    f"{disposition}; filename*=UTF-8''{encoded_filename}"
-                )
+    def delete_objects(self, keys: List[str]) -> Dict[str, str]:
+        """
+        用一次 DeleteObjects 请求删除最多 1000 个对象
+
+        Returns:
+            删除失败的对象 {key: 错误信息}
+        """
+        try:
+            response = self.s3_client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+            )
+        except Exception as e:
+            return {key: str(e) for key in keys}
+        finally:
+            for key in keys:
+                self.meta_cache.invalidate(key)
+        return {
+            error["Key"]: f"{error.get('Code')}: {error.get('Message')}"
+            for error in response.get("Errors", [])
+        }
+
+    async def adelete_many(self, storage_paths: List[str]) -> Dict[str, str]:
+        """按 1000 个一批调用 DeleteObjects，同时进行 S3_DELETE_CONCURRENCY 个请求"""
+        semaphore = asyncio.Semaphore(S3_DELETE_CONCURRENCY)
+
+        async def delete_batch(batch: List[str]) -> Dict[str, str]:
+            async with semaphore:
+                return await asyncio.to_thread(self.delete_objects, batch)
+
+        results = await asyncio.gather(
+            *[
+                delete_batch(storage_paths[i : i + S3_DELETE_BATCH_SIZE])
+                for i in range(0, len(storage_paths), S3_DELETE_BATCH_SIZE)
+            ]
+        )
+        failures = {}
+        for result in results:
+            failures.update(result)
+        return failures
+
+    async def adelete(self, storage_path: str) -> bool:
+        """异步从 S3 删除文件"""
+        try:
+            await self.async_client.delete_object(storage_path)
+            return True
+        except (S3AsyncError, httpx.HTTPError) as e:
+            print(f"从 S3 删除文件失败: {e}")
+            return False
+        finally:
+            self.meta_cache.invalidate(storage_path)
+
+    async def astat(self, storage_path: str) -> ObjectMeta | None:
+        """通过异步客户端 HEAD 获取对象元数据"""
+        head = await self.async_client.head_object(storage_path)
+        if head is None:
+            return None
+        last_modified = head["last_modified"]
+        return ObjectMeta(
+            size=head["size"],
+            etag=head["etag"],
+            last_modified=(
+                parsedate_to_datetime(last_modified) if last_modified else None
+            ),
+        )
+
+    async def aget_object_size(self, storage_path: str) -> int | None:
+        """异步获取对象大小，对象不存在时返回 None"""
+        head = await self.async_client.head_object(storage_path)
+        return head["size"] if head else None
 
-            presigned_url = self.s3_client.generate_presigned_url(
-                "get_object", Params=params, ExpiresIn=3600  # 1 小时
+    async def aget_object(
+        self, storage_path: str, byte_range: Tuple[int, int] | None = None
+    ) -> bytes:
+        """异步读取对象内容，byte_range 为闭区间 (起始, 结束)"""
+        try:
+            return await self.async_client.get_object(storage_path, byte_range)
+        except (S3AsyncError, httpx.HTTPError) as e:
+            raise Exception(f"从 S3 获取文件失败: {e}")
+
+    async def aopen_object(self, storage_path: str, headers: dict) -> httpx.Response:
+        """
+        以流式方式 GET 对象（代理下载使用），headers 原样转发给 S3（Range、条件请求头）
+        返回未读取响应体的响应，调用方负责关闭
+        """
+        return await self.async_client.request(
+            "GET", storage_path, headers=headers, stream=True
+        )
+
+    async def aput_object(
+        self, storage_path: str, data: bytes, content_type: str = None
+    ) -> str:
+        """异步上传小对象，返回 ETag"""
+        try:
+            return await self.async_client.put_object(storage_path, data, content_type)
+        except (S3AsyncError, httpx.HTTPError) as e:
+            raise Exception(f"上传文件到 S3 失败: {e}")
+
+    def _presign_get(
+        self,
+        client,
+        storage_path: str,
+        filename: str = None,
+        disposition: str = "attachment",
+    ) -> str:
+        """
+        用指定客户端生成 GET 预签名 URL（纯本地计算，不发起网络请求）
+
+        过期时间对齐到 PRESIGNED_URL_WINDOW 窗口边界，同一窗口内的结果被缓存，
+        因此同一对象在整个窗口内返回相同的 URL
+        """
+        now = time.time()
+        window = int(now // PRESIGNED_URL_WINDOW)
+        cache_key = (id(client), storage_path, filename, disposition)
+        with self._url_cache_lock:
+            cached = self._url_cache.get(cache_key)
+            if cached and cached[0] == window:
+                self._url_cache.move_to_end(cache_key)
+                return cached[1]
+
+        params = {"Bucket": self.bucket_name, "Key": storage_path}
+
+        if filename:
+            encoded_filename = quote(filename)
+            params["ResponseContentDisposition"] = (
+                f"{disposition}; filename*=UTF-8''{encoded_filename}"
+            )
+
+        # 在下一个窗口结束时过期
+        expires_at = (window + 2) * PRESIGNED_URL_WINDOW
+        url = client.generate_presigned_url(
+            "get_object", Params=params, ExpiresIn=expires_at - int(now)
+        )
+
+        with self._url_cache_lock:
+            self._url_cache[cache_key] = (window, url)
+            self._url_cache.move_to_end(cache_key)
+            while len(self._url_cache) > PRESIGNED_URL_CACHE_SIZE:
+                self._url_cache.popitem(last=False)
+        return url
+
+    @staticmethod
+    def presigned_url_max_age() -> int:
+        """当前窗口剩余的秒数：在此之前重复请求会得到相同的 URL，可用于重定向的 Cache-Control"""
+        return PRESIGNED_URL_WINDOW - int(time.time()) % PRESIGNED_URL_WINDOW
+
+    def _download_info(
+        self, storage_path: str, filename: str = None, disposition: str = "attachment"
+    ) -> dict:
+        # 生成预签名 URL（有效期 1~2 个时间窗口）
+        try:
+            presigned_url = self._presign_get(
+                self.s3_client, storage_path, filename, disposition
             )
             return {
                 "type": "s3",
@@ -366,6 +1276,27 @@ class S3StorageBackend(StorageBackend):
         except Exception as e:
             raise Exception(f"生成预签名 URL 失败: {e}")
 
+    def _public_url(
+        self, storage_path: str, filename: str = None, disposition: str = "attachment"
+    ) -> str:
+        # 如果配置了公共 URL，使用自定义端点的签名客户端生成签名 URL
+        if self.public_client:
+            try:
+                return self._presign_get(
+                    self.public_client, storage_path, filename, disposition
+                )
+            except Exception as e:
+                print(f"使用公共 URL 生成签名 URL 失败: {e}，回退到默认方式")
+
+        # 默认使用标准签名 URL
+        return self._download_info(storage_path, filename, disposition)["presigned_url"]
+
+    def get_download_info(
+        self, storage_path: str, filename: str = None, disposition: str = "attachment"
+    ) -> dict:
+        """获取 S3 文件下载信息"""
+        return self._download_info(storage_path, filename, disposition)
+
     def get_public_url(
         self, storage_path: str, filename: str = None, disposition: str = "attachment"
     ) -> str:
@@ -380,43 +1311,57 @@ class S3StorageBackend(StorageBackend):
         Returns:
             签名后的公共 URL
         """
-        # 如果配置了公共 URL，使用自定义端点生成签名 URL
-        if self.public_url:
-            # 使用自定义端点创建临时客户端
-            public_client = boto3.client(
-                "s3",
-                aws_access_key_id=self.s3_client._request_signer._credentials.access_key,
-                aws_secret_access_key=self.s3_client._request_signer._credentials.secret_key,
-                endpoint_url=(
-                    f"https://{self.public_url}"
-                    if not self.public_url.startswith("http")
-                    else self.public_url
-                ),
-                region_name=self.region_name,
-                config=boto3.session.Config(
-                    signature_version="s3", s3={"addressing_style": "virtual"}
-                ),
-            )
-            try:
-                params = {"Bucket": self.bucket_name, "Key": storage_path}
+        return self._public_url(storage_path, filename, disposition)
 
-                if filename:
-                    encoded_filename = quote(filename)
-                    params["ResponseContentDisposition"] = (
-                        f"{disposition}; filename*=UTF-8''{encoded_filename}"
-                    )
+    async def aget_download_info(
+        self, storage_path: str, filename: str = None, disposition: str = "attachment"
+    ) -> dict:
+        """预签名是纯本地计算且有缓存，直接在事件循环中执行"""
+        return self._download_info(storage_path, filename, disposition)
 
-                presigned_url = public_client.generate_presigned_url(
-                    "get_object", Params=params, ExpiresIn=3600  # 1 小时
-                )
-                return presigned_url
-            except Exception as e:
-                print(f"使用公共 URL 生成签名 URL 失败: {e}，回退到默认方式")
+    async def aget_public_url(
+        self, storage_path: str, filename: str = None, disposition: str = "attachment"
+    ) -> str:
+        """预签名是纯本地计算且有缓存，直接在事件循环中执行"""
+        return self._public_url(storage_path, filename, disposition)
 
-        # 默认使用标准签名 URL
-        return self.get_download_info(storage_path, filename, disposition)[
-            "presigned_url"
-        ]
+    def open_stream(self, storage_path: str) -> BinaryIO:
+        """返回 S3 对象的响应体流，按需读取，不把整个对象读入内存"""
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name, Key=storage_path
+            )
+        except Exception as e:
+            raise Exception(f"从 S3 获取文件失败: {e}")
+        return response["Body"]
+
+    def read_range(
+        self, storage_path: str, start: int = 0, end: int | None = None
+    ) -> bytes:
+        """读取 S3 对象的一段内容"""
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name,
+                Key=storage_path,
+                Range=f"bytes={start}-{'' if end is None else end}",
+            )
+            return response["Body"].read()
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "InvalidRange":
+                return b""
+            raise Exception(f"从 S3 获取文件失败: {e}")
+
+    async def aopen_range(
+        self, storage_path: str, start: int = 0, end: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """通过异步客户端流式读取，不占用线程"""
+        try:
+            async for chunk in self.async_client.stream_object(
+                storage_path, (start, end), COPY_BUFFER_SIZE
+            ):
+                yield chunk
+        except (S3AsyncError, httpx.HTTPError) as e:
+            raise Exception(f"从 S3 获取文件失败: {e}")
 
     def get_object(self, storage_path: str) -> bytes:
         """
@@ -436,6 +1381,170 @@ class S3StorageBackend(StorageBackend):
         except Exception as e:
             raise Exception(f"从 S3 获取文件失败: {e}")
 
+    def get_object_head(self, storage_path: str, length: int = DETECTION_HEAD_SIZE):
+        """获取 S3 对象的前 length 个字节（用于类型检测）"""
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name,
+                Key=storage_path,
+                Range=f"bytes=0-{length - 1}",
+            )
+            return response["Body"].read()
+        except ClientError as e:
+            # 空对象不支持 Range 请求
+            if e.response.get("Error", {}).get("Code") == "InvalidRange":
+                return b""
+            raise Exception(f"从 S3 获取文件失败: {e}")
+
+    def create_multipart_upload(
+        self, filename: str, user_id: str = None, content_type: str = None
+    ) -> Tuple[str, str]:
+        """
+        创建分片上传
+
+        Returns:
+            Tuple[s3_key, upload_id]
+        """
+        s3_key = self._generate_s3_key(filename, user_id)
+        params = {"Bucket": self.bucket_name, "Key": s3_key}
+        if content_type:
+            params["ContentType"] = content_type
+        try:
+            response = self.s3_client.create_multipart_upload(**params)
+        except Exception as e:
+            raise Exception(f"创建 S3 分片上传失败: {e}")
+        return s3_key, response["UploadId"]
+
+    def upload_part(
+        self, s3_key: str, upload_id: str, part_number: int, body: BinaryIO | bytes
+    ) -> str:
+        """
+        上传分片
+
+        Args:
+            part_number: 分片编号（从1开始）
+            body: 分片内容，可以是可 seek 的文件对象
+
+        Returns:
+            分片 ETag
+        """
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket_name,
+            Key=s3_key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        return response["ETag"]
+
+    def complete_multipart_upload(
+        self, s3_key: str, upload_id: str, parts: list[dict]
+    ) -> None:
+        """
+        完成分片上传
+
+        Args:
+            parts: [{"PartNumber": int, "ETag": str}, ...]，按分片编号升序
+        """
+        try:
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except Exception as e:
+            raise Exception(f"完成 S3 分片上传失败: {e}")
+
+    def abort_multipart_upload(self, s3_key: str, upload_id: str) -> bool:
+        """中止分片上传，释放已上传的分片"""
+        try:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket_name, Key=s3_key, UploadId=upload_id
+            )
+            return True
+        except Exception as e:
+            print(f"中止 S3 分片上传失败: {e}")
+            return False
+
+    def list_multipart_parts(self, s3_key: str, upload_id: str) -> list[dict]:
+        """
+        列出分片上传中已上传的分片
+
+        Returns:
+            [{"part_number": int, "etag": str, "size": int}, ...]
+        """
+        parts = []
+        paginator = self.s3_client.get_paginator("list_parts")
+        try:
+            for page in paginator.paginate(
+                Bucket=self.bucket_name, Key=s3_key, UploadId=upload_id
+            ):
+                for part in page.get("Parts", []):
+                    parts.append(
+                        {
+                            "part_number": part["PartNumber"],
+                            "etag": part["ETag"],
+                            "size": part["Size"],
+                        }
+                    )
+        except Exception as e:
+            raise Exception(f"列出 S3 分片失败: {e}")
+        return parts
+
+    def generate_presigned_part_urls(
+        self,
+        s3_key: str,
+        upload_id: str,
+        part_numbers: list[int],
+        expires_in: int = 3600,
+    ) -> dict[int, str]:
+        """
+        为分片上传的各个分片生成预签名 PUT URL，客户端可直接并行上传到存储桶
+
+        Args:
+            part_numbers: 分片编号（从1开始）
+            expires_in: 有效期（秒）
+
+        Returns:
+            {分片编号: URL}
+        """
+        try:
+            return {
+                part_number: self.s3_client.generate_presigned_url(
+                    "upload_part",
+                    Params={
+                        "Bucket": self.bucket_name,
+                        "Key": s3_key,
+                        "UploadId": upload_id,
+                        "PartNumber": part_number,
+                    },
+                    ExpiresIn=expires_in,
+                )
+                for part_number in part_numbers
+            }
+        except Exception as e:
+            raise Exception(f"生成分片预签名 URL 失败: {e}")
+
+    def list_object_sizes(self, prefix: str) -> dict[str, int]:
+        """
+        列出前缀下的所有对象
+
+        Returns:
+            {对象键: 大小}
+        """
+        sizes = {}
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                sizes[obj["Key"]] = obj["Size"]
+        return sizes
+
+    def get_object_size(self, storage_path: str) -> int:
+        """获取对象大小（字节）"""
+        response = self.s3_client.head_object(Bucket=self.bucket_name, Key=storage_path)
+        return response["ContentLength"]
+
     def generate_presigned_upload_url(
         self, filename: str, user_id: str = None, content_type: str = None
     ) -> dict:
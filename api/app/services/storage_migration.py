@@ -0,0 +1,545 @@
+"""
+存储迁移任务
+把符合条件的文件从一个存储后端复制到另一个后端：多个文件并行复制并校验 SHA-256，
+按批更新文件记录，记录更新后才删除源文件；进度保存在数据库中，服务重启后从上次
+处理到的位置继续
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import closing
+from datetime import datetime, timedelta
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from fastapi import UploadFile
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import Headers
+
+from app.database import async_session_maker
+from app.models import File, StorageMigrationJob
+from app.services.blob_store import (
+    BlobMissingError,
+    acquire_blobs,
+    collect_blobs,
+    ensure_blobs_exist,
+    release_blob,
+)
+from app.services.io_scheduler import IO_RETRY_AFTER, IOQueueFullError, io_scheduler
+from app.services.storage import (
+    delete_storage_objects,
+    get_storage_backend_by_id,
+    load_storage_backend,
+)
+from app.services.storage_backend import (
+    COPY_BUFFER_SIZE,
+    LocalStorageBackend,
+    StorageBackend,
+)
+
+# 同时复制的文件数
+MIGRATION_CONCURRENCY = int(os.getenv("MIGRATION_CONCURRENCY", "4"))
+# 每批处理的文件数，每批提交一次数据库
+MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "100"))
+# 从远程存储读取源文件时，不超过该大小的文件暂存在内存中，否则暂存到临时文件
+MIGRATION_SPOOL_SIZE = int(os.getenv("MIGRATION_SPOOL_SIZE", str(8 * 1024 * 1024)))
+# 心跳超过该时间（秒）未更新的运行中任务视为执行进程已退出，可由其他进程接管
+MIGRATION_LEASE_SECONDS = int(os.getenv("MIGRATION_LEASE_SECONDS", "120"))
+# 检查待接管任务的间隔（秒）
+MIGRATION_POLL_INTERVAL = int(os.getenv("MIGRATION_POLL_INTERVAL", "30"))
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_PAUSED = "paused"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+# 当前进程的标识，用于任务租约
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# 本进程正在执行的任务
+_tasks: Dict[str, asyncio.Task] = {}
+# 本进程本次执行的吞吐统计：job_id -> (开始时间, 已迁移字节数)
+_throughput: Dict[str, Tuple[float, int]] = {}
+
+
+class MigrationError(Exception):
+    """单个文件迁移失败"""
+
+
+class LeaseLostError(Exception):
+    """任务租约已被其他进程接管，本进程不能再更新任务"""
+
+
+def _source_condition(job: StorageMigrationJob):
+    if job.source_backend_id:
+        return File.storage_backend_id == job.source_backend_id
+    # 未指定存储后端的旧数据位于默认本地存储
+    return File.storage_backend_id.is_(None)
+
+
+def job_conditions(job: StorageMigrationJob) -> list:
+    """任务的文件过滤条件"""
+    conditions = [_source_condition(job)]
+    if job.user_id:
+        conditions.append(File.user_id == job.user_id)
+    if job.file_type:
+        conditions.append(File.file_type == job.file_type)
+    return conditions
+
+
+async def count_job_files(db: AsyncSession, job: StorageMigrationJob) -> None:
+    """统计待迁移的文件数和总大小"""
+    row = (
+        await db.execute(
+            select(func.count(File.id), func.coalesce(func.sum(File.size), 0)).where(
+                *job_conditions(job)
+            )
+        )
+    ).one()
+    job.total_files, job.total_bytes = row[0], row[1]
+
+
+def job_throughput(job: StorageMigrationJob) -> float:
+    """迁移速度（字节/秒）：运行中的任务取本进程本次执行的速度，其余取整体平均值"""
+    if job.id in _throughput:
+        started, migrated = _throughput[job.id]
+        elapsed = time.monotonic() - started
+        return migrated / elapsed if elapsed > 0 else 0.0
+    if job.started_at and job.finished_at:
+        elapsed = (job.finished_at - job.started_at).total_seconds()
+        return job.migrated_bytes / elapsed if elapsed > 0 else 0.0
+    return 0.0
+
+
+def _hash_stream(stream: BinaryIO) -> Tuple[str, int]:
+    sha256 = hashlib.sha256()
+    size = 0
+    while chunk := stream.read(COPY_BUFFER_SIZE):
+        sha256.update(chunk)
+        size += len(chunk)
+    return sha256.hexdigest(), size
+
+
+def _open_source(backend: StorageBackend, storage_path: str) -> BinaryIO:
+    """
+    打开源文件，返回可 seek 的文件对象
+    本地文件直接打开（目标为本地时可硬链接或内核态复制）；远程对象先暂存，
+    因为内容寻址存储和 S3 上传都需要重新读取
+    """
+    if isinstance(backend, LocalStorageBackend):
+        return open(storage_path, "rb")
+    spool = tempfile.SpooledTemporaryFile(max_size=MIGRATION_SPOOL_SIZE)
+    try:
+        with closing(backend.open_stream(storage_path)) as stream:
+            shutil.copyfileobj(stream, spool, COPY_BUFFER_SIZE)
+        spool.seek(0)
+    except Exception:
+        spool.close()
+        raise
+    return spool
+
+
+def copy_file(
+    source: StorageBackend, target: StorageBackend, record: dict, verify: bool
+) -> dict:
+    """
+    把一个文件复制到目标后端并校验（在线程中执行）
+
+    Returns:
+        {"storage_path", "size", "sha256", "md5"}
+    """
+    fileobj = _open_source(source, record["storage_path"])
+    try:
+        upload = UploadFile(
+            file=fileobj,
+            filename=record["filename"],
+            headers=Headers({"content-type": record["mime_type"] or ""}),
+        )
+        storage_path, size, info = target.save(upload, record["user_id"])
+    finally:
+        fileobj.close()
+
+    try:
+        if size != record["size"]:
+            raise MigrationError(f"文件大小不一致：记录 {record['size']}，实际 {size}")
+        expected = record["content_sha256"]
+        if expected and info["sha256"] != expected:
+            raise MigrationError("源文件内容与记录的 SHA-256 不一致")
+        if verify:
+            # 重新读取目标文件，确认写入的内容完整
+            with closing(target.open_stream(storage_path)) as stream:
+                sha256, written = _hash_stream(stream)
+            if sha256 != info["sha256"] or written != size:
+                raise MigrationError("目标文件校验失败")
+    except Exception:
+        # 内容寻址的对象可能被其他文件共享，不能删除
+        if not target.content_addressed:
+            target.delete(storage_path)
+        raise
+
+    return {
+        "storage_path": storage_path,
+        "size": size,
+        "sha256": info["sha256"],
+        "md5": info["md5"],
+    }
+
+
+async def _copy_batch(
+    job: StorageMigrationJob,
+    source: StorageBackend,
+    target: StorageBackend,
+    records: List[dict],
+) -> List[Tuple[dict, Optional[dict], Optional[str]]]:
+    """并行复制一批文件，返回 [(文件记录, 复制结果, 错误信息)]"""
+    semaphore = asyncio.Semaphore(MIGRATION_CONCURRENCY)
+
+    async def copy_one(record: dict):
+        async with semaphore:
+            while True:
+                try:
+                    # 与上传共用目标后端的线程池和在途字节预算
+                    result = await io_scheduler.run(
+                        job.target_backend_id,
+                        target,
+                        copy_file,
+                        source,
+                        target,
+                        record,
+                        bool(job.verify_checksum),
+                        size=record["size"],
+                    )
+                    return record, result, None
+                except IOQueueFullError:
+                    # 后台任务不应失败，等待队列空闲后重试
+                    await asyncio.sleep(IO_RETRY_AFTER)
+                except Exception as e:
+                    return record, None, str(e)
+
+    return await asyncio.gather(*[copy_one(record) for record in records])
+
+
+async def _commit_batch(
+    db: AsyncSession,
+    job: StorageMigrationJob,
+    target: StorageBackend,
+    results: List[Tuple[dict, Optional[dict], Optional[str]]],
+) -> Tuple[list, list, list]:
+    """
+    更新一批文件记录和任务进度（同一事务）
+    任务进度只在本进程仍持有租约时更新，否则回滚整批并抛出 LeaseLostError
+
+    Returns:
+        (需要删除的源文件, 需要清理的目标文件, 释放了引用的源 blob)，
+        文件为 (storage_backend_id, storage_path)，blob 为 (storage_backend_id, sha256)
+    """
+    source_garbage = []
+    target_garbage = []
+    released = []
+    moved = []
+    migrated_bytes = 0
+    failed_files = 0
+    last_error = None
+
+    for record, result, error in results:
+        if error:
+            failed_files += 1
+            last_error = f"{record['id']}: {error}"
+            continue
+        # 复制期间文件可能已被删除或迁移，只更新仍指向源文件的记录
+        updated = await db.execute(
+            update(File)
+            .where(
+                File.id == record["id"],
+                File.storage_path == record["storage_path"],
+                _source_condition(job),
+            )
+            .values(
+                storage_path=result["storage_path"],
+                storage_backend_id=job.target_backend_id,
+                content_sha256=func.coalesce(File.content_sha256, result["sha256"]),
+                content_md5=func.coalesce(File.content_md5, result["md5"]),
+            )
+        )
+        if not updated.rowcount:
+            if not target.content_addressed:
+                target_garbage.append((job.target_backend_id, result["storage_path"]))
+            continue
+
+        moved.append(result)
+        migrated_bytes += result["size"]
+        # 源文件为内容寻址时由 collect_blobs 在最后一个引用迁走后删除物理对象
+        source = File(**record)
+        if await release_blob(db, source, keep_object=not job.delete_source):
+            source_garbage.append(
+                (record["storage_backend_id"], record["storage_path"])
+            )
+        else:
+            released.append((source.storage_backend_id, source.content_sha256))
+
+    if target.content_addressed:
+        created = await acquire_blobs(
+            db,
+            job.target_backend_id,
+            [
+                {
+                    "content_sha256": result["sha256"],
+                    "storage_path": result["storage_path"],
+                    "size": result["size"],
+                }
+                for result in moved
+            ],
+        )
+        try:
+            await ensure_blobs_exist(target, created)
+        except BlobMissingError as e:
+            raise MigrationError(f"目标对象在复制后被回收: {e}")
+
+    progress = {
+        "migrated_files": StorageMigrationJob.migrated_files + len(moved),
+        "migrated_bytes": StorageMigrationJob.migrated_bytes + migrated_bytes,
+        "failed_files": StorageMigrationJob.failed_files + failed_files,
+        "cursor": results[-1][0]["id"],
+        "heartbeat_at": datetime.utcnow(),
+    }
+    if last_error:
+        progress["last_error"] = last_error
+    owned = await db.execute(
+        update(StorageMigrationJob)
+        .where(
+            StorageMigrationJob.id == job.id,
+            StorageMigrationJob.worker_id == WORKER_ID,
+        )
+        .values(**progress)
+    )
+    if not owned.rowcount:
+        # 心跳过期后任务已被其他进程接管，由新的执行进程重新处理这一批
+        await db.rollback()
+        raise LeaseLostError(job.id)
+    await db.commit()
+
+    if job.id in _throughput:
+        started, total = _throughput[job.id]
+        _throughput[job.id] = (started, total + migrated_bytes)
+    return source_garbage, target_garbage, released
+
+
+async def _load_job(db: AsyncSession, job_id: str) -> Optional[StorageMigrationJob]:
+    return (
+        await db.execute(
+            select(StorageMigrationJob).where(StorageMigrationJob.id == job_id)
+        )
+    ).scalar_one_or_none()
+
+
+async def _finish_job(job_id: str, status: str, error: str | None = None) -> None:
+    async with async_session_maker() as db:
+        job = await _load_job(db, job_id)
+        if job is None or job.worker_id != WORKER_ID:
+            return
+        job.status = status
+        job.finished_at = datetime.utcnow()
+        job.worker_id = None
+        job.heartbeat_at = None
+        if error:
+            job.last_error = error
+        await db.commit()
+
+
+async def _release_lease(job_id: str) -> None:
+    """释放本进程持有的任务租约，任务之后可立即被接管"""
+    async with async_session_maker() as db:
+        await db.execute(
+            update(StorageMigrationJob)
+            .where(
+                StorageMigrationJob.id == job_id,
+                StorageMigrationJob.worker_id == WORKER_ID,
+            )
+            .values(worker_id=None, heartbeat_at=None)
+        )
+        await db.commit()
+
+
+async def _heartbeat(job_id: str) -> None:
+    """复制耗时较长时也定期续约，避免被其他进程接管"""
+    while True:
+        await asyncio.sleep(MIGRATION_LEASE_SECONDS / 3)
+        async with async_session_maker() as db:
+            await db.execute(
+                update(StorageMigrationJob)
+                .where(
+                    StorageMigrationJob.id == job_id,
+                    StorageMigrationJob.worker_id == WORKER_ID,
+                )
+                .values(heartbeat_at=datetime.utcnow())
+            )
+            await db.commit()
+
+
+async def run_migration_job(job_id: str) -> None:
+    """执行迁移任务，直到完成、失败或任务状态不再是 running（暂停 / 取消）"""
+    _throughput[job_id] = (time.monotonic(), 0)
+    heartbeat = asyncio.create_task(_heartbeat(job_id))
+    try:
+        while True:
+            async with async_session_maker() as db:
+                job = await _load_job(db, job_id)
+                if job is None or job.worker_id != WORKER_ID:
+                    return
+                if job.status != STATUS_RUNNING:
+                    # 已暂停或取消
+                    await _release_lease(job_id)
+                    return
+
+                # 后端被删除或无法连接时停止任务，不能回退到默认存储
+                target = await load_storage_backend(db, job.target_backend_id)
+                if target is None:
+                    await _finish_job(job_id, STATUS_FAILED, "无法加载目标存储后端")
+                    return
+                if job.source_backend_id:
+                    source = await load_storage_backend(db, job.source_backend_id)
+                else:
+                    source = await get_storage_backend_by_id(db, None)
+                if source is None:
+                    await _finish_job(job_id, STATUS_FAILED, "无法加载源存储后端")
+                    return
+
+                stmt = (
+                    select(
+                        File.id,
+                        File.user_id,
+                        File.filename,
+                        File.mime_type,
+                        File.size,
+                        File.storage_path,
+                        File.storage_backend_id,
+                        File.content_sha256,
+                    )
+                    .where(*job_conditions(job))
+                    .order_by(File.id)
+                    .limit(MIGRATION_BATCH_SIZE)
+                )
+                if job.cursor:
+                    stmt = stmt.where(File.id > job.cursor)
+                records = [dict(row._mapping) for row in await db.execute(stmt)]
+
+                if not records:
+                    await _finish_job(job_id, STATUS_COMPLETED)
+                    return
+
+            # 复制可能持续很久，期间不占用数据库连接和事务
+            results = await _copy_batch(job, source, target, records)
+
+            async with async_session_maker() as db:
+                try:
+                    source_garbage, target_garbage, released = await _commit_batch(
+                        db, job, target, results
+                    )
+                except LeaseLostError:
+                    # 本批复制的目标文件没有记录引用，清理后退出，由新的执行进程继续
+                    print(f"迁移任务 {job_id} 已被其他进程接管")
+                    if not target.content_addressed:
+                        await delete_storage_objects(
+                            db,
+                            [
+                                (job.target_backend_id, result["storage_path"])
+                                for _, result, _ in results
+                                if result
+                            ],
+                        )
+                    return
+
+                # 记录已指向目标文件后再删除源文件
+                garbage = target_garbage
+                if job.delete_source:
+                    garbage = garbage + source_garbage
+                for failure in await delete_storage_objects(db, garbage):
+                    print(
+                        f"迁移任务 {job_id} 删除文件失败: "
+                        f"{failure['storage_path']}: {failure['error']}"
+                    )
+            if job.delete_source and released:
+                await collect_blobs(released)
+    except asyncio.CancelledError:
+        # 进程退出：释放租约，下次启动时立即接管
+        await _release_lease(job_id)
+        raise
+    except Exception as e:
+        print(f"迁移任务 {job_id} 失败: {e}")
+        await _finish_job(job_id, STATUS_FAILED, str(e))
+    finally:
+        heartbeat.cancel()
+        _throughput.pop(job_id, None)
+        _tasks.pop(job_id, None)
+
+
+async def claim_and_start(db: AsyncSession, job_id: str) -> bool:
+    """
+    获取任务租约并在本进程中执行
+    只有没有执行进程或心跳已过期的运行中任务可以被获取
+    """
+    if job_id in _tasks:
+        return True
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(StorageMigrationJob)
+        .where(
+            StorageMigrationJob.id == job_id,
+            StorageMigrationJob.status == STATUS_RUNNING,
+            or_(
+                StorageMigrationJob.worker_id.is_(None),
+                StorageMigrationJob.heartbeat_at.is_(None),
+                StorageMigrationJob.heartbeat_at
+                < now - timedelta(seconds=MIGRATION_LEASE_SECONDS),
+            ),
+        )
+        .values(worker_id=WORKER_ID, heartbeat_at=now)
+    )
+    await db.commit()
+    if not result.rowcount:
+        return False
+    _tasks[job_id] = asyncio.create_task(run_migration_job(job_id))
+    return True
+
+
+async def resume_migration_jobs() -> None:
+    """接管所有没有执行进程的运行中任务"""
+    async with async_session_maker() as db:
+        job_ids = (
+            (
+                await db.execute(
+                    select(StorageMigrationJob.id).where(
+                        StorageMigrationJob.status == STATUS_RUNNING
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+        for job_id in job_ids:
+            await claim_and_start(db, job_id)
+
+
+async def run_migration_supervisor() -> None:
+    """启动时及之后定期接管运行中但无人执行的迁移任务（进程重启或崩溃后继续）"""
+    while True:
+        try:
+            await resume_migration_jobs()
+        except Exception as e:
+            print(f"接管迁移任务失败: {e}")
+        await asyncio.sleep(MIGRATION_POLL_INTERVAL)
+
+
+async def stop_migration_jobs() -> None:
+    """进程退出时停止本进程执行的任务（任务保持 running，之后会被接管）"""
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,188 @@
+"""
+分片上传会话服务
+本地存储的分片暂存在 UPLOAD_SESSION_DIR 下，完成时按顺序拼接写入存储后端；
+S3 存储的分片直接对应 S3 分片上传的各个分片
+"""
+
+import asyncio
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+from typing import BinaryIO, List
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session_maker
+from app.models import UploadSession, UploadSessionPart
+from app.services.io_scheduler import io_scheduler
+from app.services.storage import get_storage_backend_by_id
+from app.services.storage_backend import S3_MIN_PART_SIZE, S3StorageBackend
+
+# 分片暂存目录
+UPLOAD_SESSION_DIR = os.getenv("UPLOAD_SESSION_DIR", "data/uploads")
+# 会话有效期（小时），每次上传分片后顺延
+UPLOAD_SESSION_TTL_HOURS = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+# 过期会话清理间隔（秒）
+UPLOAD_SESSION_GC_INTERVAL = int(os.getenv("UPLOAD_SESSION_GC_INTERVAL", "600"))
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+# S3 分片上传最多 10000 个分片
+MAX_PART_COUNT = 10000
+
+SESSION_UPLOADING = "uploading"
+SESSION_COMPLETING = "completing"
+
+
+def session_expires_at() -> datetime:
+    return datetime.utcnow() + timedelta(hours=UPLOAD_SESSION_TTL_HOURS)
+
+
+def resolve_chunk_size(size: int, chunk_size: int | None, is_s3: bool) -> int:
+    """确定分片大小：S3 分片至少 5MB，且分片数不超过 10000"""
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    if is_s3:
+        chunk_size = max(chunk_size, S3_MIN_PART_SIZE)
+    return max(chunk_size, (size + MAX_PART_COUNT - 1) // MAX_PART_COUNT)
+
+
+def expected_part_size(session: UploadSession, part_number: int) -> int:
+    """分片应有的大小，最后一个分片可以不足 chunk_size"""
+    if part_number == session.part_count - 1:
+        return session.size - part_number * session.chunk_size
+    return session.chunk_size
+
+
+def session_dir(session_id: str) -> str:
+    return os.path.join(UPLOAD_SESSION_DIR, session_id)
+
+
+def part_path(session_id: str, part_number: int) -> str:
+    return os.path.join(session_dir(session_id), f"{part_number}.part")
+
+
+def remove_session_dir(session_id: str) -> None:
+    shutil.rmtree(session_dir(session_id), ignore_errors=True)
+
+
+class PartsReader:
+    """按顺序读取多个分片文件的只读文件对象，完成时无需先拼接成一个临时文件"""
+
+    def __init__(self, paths: List[str]):
+        self._paths = paths
+        self._index = 0
+        self._current: BinaryIO | None = None
+
+    def read(self, size: int = -1) -> bytes:
+        chunks = []
+        while size != 0 and self._index < len(self._paths):
+            if self._current is None:
+                self._current = open(self._paths[self._index], "rb")
+            chunk = self._current.read(size)
+            if not chunk:
+                self._current.close()
+                self._current = None
+                self._index += 1
+                continue
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if offset != 0 or whence != os.SEEK_SET:
+            raise OSError("PartsReader only supports seek(0)")
+        self.close()
+        self._index = 0
+        return 0
+
+    def close(self) -> None:
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+
+
+async def discard_session(
+    session: UploadSession,
+    db: AsyncSession,
+    abort_upload: bool = True,
+    remove_parts: bool = True,
+) -> None:
+    """
+    删除暂存分片和会话记录（不提交事务）
+
+    Args:
+        abort_upload: 是否中止 S3 分片上传（上传已完成时传 False）
+        remove_parts: 是否删除暂存分片；为 False 时由调用方在提交后调用 remove_session_dir
+    """
+    if abort_upload and session.s3_upload_id:
+        backend = await get_storage_backend_by_id(db, session.storage_backend_id)
+        if isinstance(backend, S3StorageBackend):
+            await io_scheduler.run(
+                session.storage_backend_id,
+                backend,
+                backend.abort_multipart_upload,
+                session.storage_path,
+                session.s3_upload_id,
+            )
+    if remove_parts:
+        await asyncio.to_thread(remove_session_dir, session.id)
+    await db.execute(
+        delete(UploadSessionPart).where(UploadSessionPart.session_id == session.id)
+    )
+    await db.execute(delete(UploadSession).where(UploadSession.id == session.id))
+
+
+def remove_orphan_session_dirs(session_ids: set) -> int:
+    """
+    删除没有对应会话记录的暂存目录，返回删除数量
+    会话完成或删除时仍在接收的分片请求可能留下这类目录；
+    最近修改过的目录可能属于刚创建的会话，暂不删除
+    """
+    try:
+        names = os.listdir(UPLOAD_SESSION_DIR)
+    except FileNotFoundError:
+        return 0
+    cutoff = time.time() - UPLOAD_SESSION_GC_INTERVAL
+    removed = 0
+    for name in names:
+        path = os.path.join(UPLOAD_SESSION_DIR, name)
+        if name in session_ids or not os.path.isdir(path):
+            continue
+        try:
+            if os.path.getmtime(path) > cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+    return removed
+
+
+async def cleanup_expired_sessions(db: AsyncSession) -> int:
+    """清理过期的上传会话和没有会话记录的暂存目录，返回清理数量"""
+    stmt = select(UploadSession).where(UploadSession.expires_at < datetime.utcnow())
+    result = await db.execute(stmt)
+    sessions = result.scalars().all()
+    for session in sessions:
+        await discard_session(session, db)
+    await db.commit()
+
+    session_ids = set((await db.execute(select(UploadSession.id))).scalars().all())
+    await db.commit()
+    orphans = await asyncio.to_thread(remove_orphan_session_dirs, session_ids)
+    return len(sessions) + orphans
+
+
+async def run_session_gc() -> None:
+    """后台定期清理过期的上传会话"""
+    while True:
+        await asyncio.sleep(UPLOAD_SESSION_GC_INTERVAL)
+        try:
+            async with async_session_maker() as db:
+                count = await cleanup_expired_sessions(db)
+            if count:
+                print(f"已清理 {count} 个过期的上传会话")
+        except Exception as e:
+            print(f"清理过期上传会话失败: {e}")
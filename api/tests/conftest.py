@@ -0,0 +1,107 @@
+"""
+测试公共配置
+应用在临时目录中运行：SQLite 数据库和本地存储的文件都写在临时目录下。
+测试期间开启 STORAGE_BLOCKING_CHECK，路由在事件循环中同步调用存储方法时会直接报错
+"""
+
+import asyncio
+import os
+import tempfile
+import uuid
+
+import pytest
+
+# 必须在导入应用之前设置：数据库路径相对于工作目录，阻塞检查在定义存储后端类时生效
+_workdir = tempfile.mkdtemp(prefix="filetrace-test-")
+os.chdir(_workdir)
+os.makedirs("data", exist_ok=True)
+os.environ["STORAGE_BLOCKING_CHECK"] = "1"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import app.app as app_module  # noqa: E402
+from app.database import create_db_and_tables  # noqa: E402
+
+# 直接按模型建表（首个迁移使用了 SQLite 不支持的 ALTER 约束）
+asyncio.run(create_db_and_tables())
+app_module.run_migrations = lambda: None
+
+
+@pytest.fixture(scope="session")
+def client():
+    """已登录管理员的测试客户端（第一个注册的用户为管理员）"""
+    with TestClient(app_module.app) as test_client:
+        response = test_client.post(
+            "/api/v1/auth/register", data={"username": "admin", "password": "pw"}
+        )
+        assert response.status_code == 200, response.text
+        token = response.json()["access_token"]
+        test_client.headers["Authorization"] = f"Bearer {token}"
+        yield test_client
+
+
+@pytest.fixture
+def upload(client):
+    """上传一个文件到默认存储后端，返回文件记录"""
+
+    def _upload(filename: str, content: bytes, mime_type: str = "text/plain"):
+        response = client.post(
+            "/api/v1/files/", files=[("files", (filename, content, mime_type))]
+        )
+        assert response.status_code == 200, response.text
+        return response.json()[0]
+
+    return _upload
+
+
+@pytest.fixture(scope="session")
+def s3_endpoint():
+    """本地 moto S3 服务的地址（异步客户端使用 httpx，需要真实的 HTTP 服务）"""
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    yield f"http://{host}:{port}"
+    server.stop()
+
+
+@pytest.fixture
+def s3_bucket(s3_endpoint):
+    """在 moto 中创建一个新的存储桶，返回 S3 存储后端的配置"""
+    import boto3
+
+    config = {
+        "bucket_name": f"bucket-{uuid.uuid4().hex[:12]}",
+        "access_key": "testing",
+        "secret_key": "testing",
+        "endpoint_url": s3_endpoint,
+    }
+    boto3.client(
+        "s3",
+        endpoint_url=s3_endpoint,
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+        region_name="us-east-1",
+    ).create_bucket(Bucket=config["bucket_name"])
+    return config
+
+
+@pytest.fixture
+def s3_backend(client, s3_bucket):
+    """通过 API 创建指向 moto 存储桶的 S3 存储后端（非默认），返回 (后端ID, 后端配置)"""
+
+    def _create(**config):
+        response = client.post(
+            "/api/v1/storage-backends",
+            json={
+                "name": f"s3-{uuid.uuid4().hex[:12]}",
+                "backend_type": "s3",
+                "config": {**s3_bucket, **config},
+            },
+        )
+        assert response.status_code == 201, response.text
+        return response.json()["id"], s3_bucket
+
+    return _create
@@ -0,0 +1,90 @@
+"""
+STORAGE_BLOCKING_CHECK 开启时，存储相关路由不能在事件循环中同步调用存储方法
+（测试客户端会把路由中的 RuntimeError 直接抛出）
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.storage_backend import (
+    BLOCKING_STORAGE_METHODS,
+    STORAGE_BLOCKING_CHECK,
+    LocalStorageBackend,
+)
+
+
+def test_check_enabled():
+    assert STORAGE_BLOCKING_CHECK
+
+
+def test_sync_call_on_event_loop_raises(tmp_path):
+    backend = LocalStorageBackend(base_dir=str(tmp_path))
+
+    async def call_on_loop():
+        backend.exists(str(tmp_path / "missing"))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(call_on_loop())
+    # 线程中调用不受影响
+    assert asyncio.run(backend.aexists(str(tmp_path / "missing"))) is False
+
+
+def test_all_methods_wrapped():
+    for name in BLOCKING_STORAGE_METHODS:
+        method = LocalStorageBackend.__dict__.get(name)
+        if method is not None:
+            assert hasattr(method, "__wrapped__"), name
+
+
+def test_file_routes(client, upload):
+    content = b"0123456789" * 1000
+    file = upload("blocking/check.txt", content)
+    file_id = file["id"]
+
+    assert client.get("/api/v1/files/").status_code == 200
+    assert client.get(f"/api/v1/files/{file_id}").status_code == 200
+
+    response = client.get(file["download_url"])
+    assert response.status_code == 200
+    assert response.content == content
+    response = client.get(file["download_url"], headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == content[10:20]
+    assert client.get(file["preview_url"]).status_code == 200
+
+    response = client.put(
+        f"/api/v1/files/{file_id}/rename", json={"filename": "renamed.txt"}
+    )
+    assert response.status_code == 200, response.text
+
+    assert client.delete(f"/api/v1/files/{file_id}").status_code == 200
+    response = client.request(
+        "DELETE", "/api/v1/recycle/permanent", json={"file_ids": [file_id]}
+    )
+    assert response.status_code == 200
+    assert response.json()["failed"] == []
+
+
+def test_upload_session_routes(client):
+    content = bytes(range(256)) * 1024
+    response = client.post(
+        "/api/v1/uploads/sessions",
+        json={"filename": "session.bin", "size": len(content), "chunk_size": 65536},
+    )
+    assert response.status_code == 200, response.text
+    session = response.json()
+    chunk_size = session["chunk_size"]
+    for part_number in range(session["part_count"]):
+        chunk = content[part_number * chunk_size : (part_number + 1) * chunk_size]
+        response = client.put(
+            f"/api/v1/uploads/sessions/{session['id']}/chunks/{part_number}",
+            content=chunk,
+        )
+        assert response.status_code == 200, response.text
+
+    response = client.post(f"/api/v1/uploads/sessions/{session['id']}/complete")
+    assert response.status_code == 200, response.text
+    file = response.json()
+    assert file["size"] == len(content)
+    assert client.get(file["download_url"]).content == content
@@ -0,0 +1,106 @@
+"""
+本地存储文件下载 / 预览的条件请求和 Range 请求
+"""
+
+import os
+from datetime import timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+
+import pytest
+
+SEEK_OFFSET = 4 * 1024 * 1024
+CONTENT = os.urandom(5 * 1024 * 1024 + 123)
+
+
+@pytest.fixture(scope="module")
+def preview_url(client):
+    response = client.post(
+        "/api/v1/files/",
+        files=[("files", ("video.mp4", CONTENT, "video/mp4"))],
+    )
+    assert response.status_code == 200, response.text
+    file = response.json()[0]
+    return f"/api/v1/files/preview/{file['id']}/video.mp4"
+
+
+@pytest.fixture(scope="module")
+def validators(client, preview_url):
+    response = client.get(preview_url)
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["cache-control"] == "private, no-cache"
+    return response.headers["etag"], response.headers["last-modified"]
+
+
+def test_if_none_match(client, preview_url, validators):
+    etag, _ = validators
+    response = client.get(preview_url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    weak = client.get(preview_url, headers={"If-None-Match": f'"other", W/{etag}'})
+    assert weak.status_code == 304
+
+    stale = client.get(preview_url, headers={"If-None-Match": '"other"'})
+    assert stale.status_code == 200
+    assert stale.content == CONTENT
+
+
+def test_if_modified_since(client, preview_url, validators):
+    etag, last_modified = validators
+    response = client.get(preview_url, headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+    earlier = format_datetime(
+        parsedate_to_datetime(last_modified) - timedelta(hours=1), usegmt=True
+    )
+    modified = client.get(preview_url, headers={"If-Modified-Since": earlier})
+    assert modified.status_code == 200
+
+    # 同时携带两个条件头时以 If-None-Match 为准
+    both = client.get(
+        preview_url,
+        headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified},
+    )
+    assert both.status_code == 200
+
+
+def test_open_ended_range(client, preview_url):
+    response = client.get(preview_url, headers={"Range": f"bytes={SEEK_OFFSET}-"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == (
+        f"bytes {SEEK_OFFSET}-{len(CONTENT) - 1}/{len(CONTENT)}"
+    )
+    assert response.content == CONTENT[SEEK_OFFSET:]
+
+
+def test_multiple_ranges(client, preview_url):
+    response = client.get(preview_url, headers={"Range": "bytes=0-9,100-199"})
+    assert response.status_code == 206
+    assert response.headers["content-type"].startswith("multipart/byteranges")
+    body = response.content
+    assert f"Content-Range: bytes 0-9/{len(CONTENT)}".encode() in body
+    assert f"Content-Range: bytes 100-199/{len(CONTENT)}".encode() in body
+    assert CONTENT[0:10] in body
+    assert CONTENT[100:200] in body
+
+
+def test_if_range(client, preview_url, validators):
+    etag, _ = validators
+    current = client.get(preview_url, headers={"Range": "bytes=0-99", "If-Range": etag})
+    assert current.status_code == 206
+    assert current.content == CONTENT[:100]
+
+    # 验证器不匹配时忽略 Range，返回完整文件
+    stale = client.get(
+        preview_url, headers={"Range": "bytes=0-99", "If-Range": '"other"'}
+    )
+    assert stale.status_code == 200
+    assert stale.content == CONTENT
+
+
+def test_unsatisfiable_range(client, preview_url):
+    response = client.get(preview_url, headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
@@ -0,0 +1,43 @@
+"""
+I/O 调度器：等待方被取消时，在途字节在线程任务结束后才归还
+"""
+
+import asyncio
+import threading
+
+from app.services.io_scheduler import IOScheduler
+from app.services.storage_backend import COPY_BUFFER_SIZE, LocalStorageBackend
+
+
+def test_cancelled_request_keeps_budget_until_thread_finishes(tmp_path):
+    scheduler = IOScheduler()
+    backend = LocalStorageBackend(str(tmp_path))
+    started = threading.Event()
+    finish = threading.Event()
+
+    def blocking_io():
+        started.set()
+        finish.wait(5)
+
+    async def scenario():
+        request = asyncio.create_task(
+            scheduler.run("local", backend, blocking_io, size=COPY_BUFFER_SIZE)
+        )
+        await asyncio.to_thread(started.wait, 5)
+        request.cancel()
+        await asyncio.gather(request, return_exceptions=True)
+        # 线程仍在执行，预算不能提前归还
+        assert scheduler.snapshot()["inflight_bytes"] == COPY_BUFFER_SIZE
+
+        finish.set()
+        for _ in range(100):
+            if not scheduler.snapshot()["inflight_bytes"]:
+                break
+            await asyncio.sleep(0.01)
+        assert scheduler.snapshot()["inflight_bytes"] == 0
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        finish.set()
+        scheduler.shutdown()
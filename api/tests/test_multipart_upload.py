@@ -0,0 +1,65 @@
+"""
+S3 客户端直传分片上传
+"""
+
+import boto3
+import pytest
+
+
+@pytest.mark.parametrize("part_number", [0, -1, 10001])
+def test_presign_rejects_invalid_part_numbers(client, part_number):
+    response = client.post(
+        "/api/v1/files/multipart-upload/presign",
+        json={
+            "s3_key": "user/key.bin",
+            "upload_id": "upload",
+            "storage_backend_id": "backend",
+            "part_numbers": [1, part_number],
+        },
+    )
+    assert response.status_code == 422
+
+
+def test_complete_maps_relative_path_to_folders(client, upload, s3_backend):
+    backend_id, config = s3_backend()
+    user_id = upload("owner.txt", b"owner")["user_id"]
+    s3 = boto3.client(
+        "s3",
+        endpoint_url=config["endpoint_url"],
+        aws_access_key_id=config["access_key"],
+        aws_secret_access_key=config["secret_key"],
+        region_name="us-east-1",
+    )
+    key = f"{user_id}/multipart/report.txt"
+    upload_id = s3.create_multipart_upload(Bucket=config["bucket_name"], Key=key)[
+        "UploadId"
+    ]
+    etag = s3.upload_part(
+        Bucket=config["bucket_name"],
+        Key=key,
+        UploadId=upload_id,
+        PartNumber=1,
+        Body=b"quarterly report",
+    )["ETag"]
+
+    response = client.post(
+        "/api/v1/files/multipart-upload/complete",
+        json={
+            "s3_key": key,
+            "upload_id": upload_id,
+            "storage_backend_id": backend_id,
+            "filename": "reports/2026/report.txt",
+            "content_type": "text/plain",
+            "parts": [{"part_number": 1, "etag": etag}],
+        },
+    )
+    assert response.status_code == 200, response.text
+    file = response.json()
+    assert file["filename"] == "report.txt"
+    assert file["size"] == len(b"quarterly report")
+
+    folder = client.get(f"/api/v1/folders/{file['folder_id']}").json()
+    assert folder["name"] == "2026"
+    parent = client.get(f"/api/v1/folders/{folder['parent_id']}").json()
+    assert parent["name"] == "reports"
+    assert parent["parent_id"] is None
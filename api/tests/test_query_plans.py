@@ -0,0 +1,160 @@
+"""
+列表、回收站和统计查询的执行计划：在 SQLite 上按模型建表，用 EXPLAIN QUERY PLAN
+确认查询使用复合索引，并且排序直接按索引顺序读取（不需要临时 B 树）
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select, tuple_
+from sqlalchemy.dialects import sqlite
+
+from app.models import Base, File, Folder, Note, User
+
+USER_ID = str(uuid.uuid4())
+FOLDER_ID = str(uuid.uuid4())
+CURSOR = (datetime(2024, 1, 1), str(uuid.uuid4()))
+
+
+@pytest.fixture(scope="module")
+def connection():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        # 数据和统计信息接近真实分布，规划器才会在多个候选索引之间做出实际的选择
+        users = [str(uuid.uuid4()) for _ in range(20)] + [USER_ID]
+        conn.execute(
+            insert(User), [{"id": u, "username": u, "password": "pw"} for u in users]
+        )
+        now = datetime(2024, 1, 1)
+        files = [
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": users[i % len(users)],
+                "filename": f"file-{i}.txt",
+                "storage_path": f"path-{i}",
+                "size": i,
+                "mime_type": "text/plain",
+                "is_deleted": 1 if i % 4 == 0 else 0,
+                "folder_id": FOLDER_ID if i % 3 == 0 else None,
+                "created_at": now + timedelta(seconds=i),
+            }
+            for i in range(2000)
+        ]
+        conn.execute(insert(File), files)
+        conn.execute(
+            insert(Note),
+            [
+                {
+                    "id": str(uuid.uuid4()),
+                    "user_id": users[i % len(users)],
+                    "title": f"note-{i}",
+                    "content": "content",
+                    "visibility": "private",
+                    "created_at": now + timedelta(seconds=i),
+                    "updated_at": now + timedelta(seconds=i),
+                }
+                for i in range(500)
+            ],
+        )
+        conn.exec_driver_sql("ANALYZE")
+    with engine.connect() as conn:
+        yield conn
+    engine.dispose()
+
+
+def _plan(connection, stmt) -> str:
+    sql = stmt.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+    return "\n".join(row[3] for row in rows)
+
+
+def _page(stmt, sort_column, id_column, cursor: bool = False):
+    """与 paginate() 相同的排序和键集条件"""
+    stmt = stmt.order_by(sort_column.desc(), id_column.desc())
+    if cursor:
+        stmt = stmt.where(tuple_(sort_column, id_column) < CURSOR)
+    return stmt.limit(21)
+
+
+LISTING_QUERIES = {
+    "files_root": (
+        _page(
+            select(File).where(
+                File.user_id == USER_ID,
+                File.is_deleted == 0,
+                File.folder_id.is_(None),
+            ),
+            File.created_at,
+            File.id,
+        ),
+        "ix_files_user_deleted_folder_created",
+    ),
+    "files_folder_cursor": (
+        _page(
+            select(File).where(
+                File.user_id == USER_ID,
+                File.is_deleted == 0,
+                File.folder_id == FOLDER_ID,
+            ),
+            File.created_at,
+            File.id,
+            cursor=True,
+        ),
+        "ix_files_user_deleted_folder_created",
+    ),
+    "folders_root": (
+        _page(
+            select(Folder).where(
+                Folder.user_id == USER_ID,
+                Folder.is_deleted == 0,
+                Folder.parent_id.is_(None),
+            ),
+            Folder.created_at,
+            Folder.id,
+        ),
+        "ix_folders_user_deleted_parent_created",
+    ),
+    "notes": (
+        _page(select(Note).where(Note.user_id == USER_ID), Note.updated_at, Note.id),
+        "ix_notes_user_updated",
+    ),
+}
+
+FILTER_QUERIES = {
+    "recycle_files": (
+        select(File).where(File.user_id == USER_ID, File.is_deleted == 1),
+        "ix_files_user_deleted_folder_created",
+    ),
+    "recycle_folders": (
+        select(Folder).where(Folder.user_id == USER_ID, Folder.is_deleted == 1),
+        "ix_folders_user_deleted_parent_created",
+    ),
+    "stats_files": (
+        select(func.count(File.id), func.sum(File.size)).where(
+            File.user_id == USER_ID, File.is_deleted == 0
+        ),
+        "ix_files_user_deleted_folder_created",
+    ),
+    "stats_notes": (
+        select(func.count(Note.id)).where(Note.user_id == USER_ID),
+        "ix_notes_user_updated",
+    ),
+}
+
+
+@pytest.mark.parametrize("name", LISTING_QUERIES)
+def test_listing_reads_pages_from_index(connection, name):
+    stmt, index = LISTING_QUERIES[name]
+    plan = _plan(connection, stmt)
+    assert f"USING INDEX {index}" in plan or f"USING COVERING INDEX {index}" in plan
+    assert "USE TEMP B-TREE FOR ORDER BY" not in plan, plan
+
+
+@pytest.mark.parametrize("name", FILTER_QUERIES)
+def test_recycle_and_stats_search_index(connection, name):
+    stmt, index = FILTER_QUERIES[name]
+    plan = _plan(connection, stmt)
+    assert index in plan, plan
+    assert plan.startswith("SEARCH"), plan
@@ -0,0 +1,76 @@
+"""
+S3 存储后端的异步操作：在本地 moto S3 服务上验证签名后的请求
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.s3_async import AsyncS3Client
+from app.services.storage_backend import S3StorageBackend
+
+CONTENT = bytes(range(256)) * 40
+
+
+def test_backend_async_object_operations(s3_bucket):
+    backend = S3StorageBackend(**s3_bucket)
+    key = "user/中文 文件+1.bin"
+
+    async def scenario():
+        try:
+            assert not await backend.aexists(key)
+            assert await backend.aput_object(key, CONTENT, "application/octet-stream")
+            assert await backend.aexists(key)
+            assert await backend.aget_object_size(key) == len(CONTENT)
+            assert await backend.aget_object(key) == CONTENT
+            assert await backend.aget_object(key, (100, 1099)) == CONTENT[100:1100]
+            meta = await backend.astat(key)
+            assert meta.size == len(CONTENT)
+            assert meta.etag
+
+            assert await backend.adelete(key)
+            assert not await backend.aexists(key)
+            assert await backend.astat(key) is None
+        finally:
+            await backend.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_backend_missing_object(s3_bucket):
+    backend = S3StorageBackend(**s3_bucket)
+
+    async def scenario():
+        try:
+            assert not await backend.aexists("missing/key")
+            assert await backend.aget_object_size("missing/key") is None
+            with pytest.raises(Exception, match="从 S3 获取文件失败"):
+                await backend.aget_object("missing/key")
+        finally:
+            await backend.aclose()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("signature_version", ["s3", "s3v4"])
+def test_async_client_round_trip(s3_bucket, signature_version):
+    client = AsyncS3Client(
+        s3_bucket["bucket_name"],
+        s3_bucket["access_key"],
+        s3_bucket["secret_key"],
+        s3_bucket["endpoint_url"],
+        signature_version=signature_version,
+    )
+
+    async def scenario():
+        try:
+            await client.put_object("a/b.txt", b"hello world", "text/plain")
+            head = await client.head_object("a/b.txt")
+            assert head["size"] == 11
+            assert await client.get_object("a/b.txt", (6, 10)) == b"world"
+            await client.delete_object("a/b.txt")
+            assert await client.head_object("a/b.txt") is None
+        finally:
+            await client.aclose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,112 @@
+"""
+S3 代理下载模式：Range 和条件请求头转发给 S3，206 / 304 原样返回，响应体分块流式转发
+"""
+
+import asyncio
+import os
+
+import boto3
+import pytest
+
+from app.app import app
+from app.services.storage_backend import S3_PROXY_CHUNK_SIZE
+
+CONTENT = os.urandom(4 * S3_PROXY_CHUNK_SIZE + 123)
+
+
+@pytest.fixture
+def preview_url(client, upload, s3_backend):
+    backend_id, config = s3_backend(download_mode="proxy")
+    user_id = upload("owner.txt", b"owner")["user_id"]
+    key = f"{user_id}/proxy/video.mp4"
+    boto3.client(
+        "s3",
+        endpoint_url=config["endpoint_url"],
+        aws_access_key_id=config["access_key"],
+        aws_secret_access_key=config["secret_key"],
+        region_name="us-east-1",
+    ).put_object(Bucket=config["bucket_name"], Key=key, Body=CONTENT)
+
+    response = client.post(
+        "/api/v1/files/confirm-direct-uploads",
+        json={
+            "storage_backend_id": backend_id,
+            "files": [
+                {
+                    "s3_key": key,
+                    "filename": "video.mp4",
+                    "size": len(CONTENT),
+                    "content_type": "video/mp4",
+                }
+            ],
+        },
+    )
+    assert response.status_code == 200, response.text
+    return f"/api/v1/files/preview/{response.json()[0]['id']}/video.mp4"
+
+
+def test_range_is_forwarded(client, preview_url):
+    response = client.get(
+        preview_url, headers={"Range": "bytes=1000-1999"}, follow_redirects=False
+    )
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 1000-1999/{len(CONTENT)}"
+    assert response.content == CONTENT[1000:2000]
+
+
+def test_if_none_match_returns_304(client, preview_url):
+    full = client.get(preview_url, follow_redirects=False)
+    assert full.status_code == 200
+    etag = full.headers["etag"]
+
+    response = client.get(preview_url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    stale = client.get(preview_url, headers={"If-None-Match": '"other"'})
+    assert stale.status_code == 200
+
+
+def test_body_is_streamed_in_chunks(client, preview_url):
+    messages = []
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # 响应发送完之前客户端保持连接
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+        if message["type"] == "http.response.body" and not message.get("more_body"):
+            finished.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": preview_url,
+        "raw_path": preview_url.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"test")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+    # 直接调用 ASGI 应用，观察每条 http.response.body 消息的大小
+    client.portal.call(app, scope, receive, send)
+
+    assert messages[0]["status"] == 200
+    chunks = [m["body"] for m in messages[1:] if m.get("body")]
+    assert b"".join(chunks) == CONTENT
+    # 按 S3_PROXY_CHUNK_SIZE 分块转发，而不是一次读入整个对象
+    assert len(chunks) > 1
+    assert max(len(chunk) for chunk in chunks) <= S3_PROXY_CHUNK_SIZE
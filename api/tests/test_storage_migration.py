@@ -0,0 +1,73 @@
+"""
+存储迁移任务：租约被接管后，旧的执行进程不能再提交批次
+"""
+
+import time
+
+import pytest
+from sqlalchemy import update
+
+from app.database import async_session_maker
+from app.models import StorageMigrationJob
+from app.services import storage_migration
+
+
+def _wait_for_runner(job_id: str, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while job_id in storage_migration._tasks:
+        assert time.monotonic() < deadline, "迁移任务未结束"
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def target_backend(client):
+    response = client.post(
+        "/api/v1/storage-backends",
+        json={
+            "name": f"migration-target-{time.monotonic_ns()}",
+            "backend_type": "local",
+            "config": {"base_dir": "data/migration-target"},
+        },
+    )
+    assert response.status_code in (200, 201), response.text
+    return response.json()["id"]
+
+
+def test_batch_is_dropped_after_lease_takeover(
+    client, upload, target_backend, monkeypatch
+):
+    files = [upload(f"lease-{i}.txt", f"lease {i}".encode()) for i in range(3)]
+    copy_batch = storage_migration._copy_batch
+
+    async def copy_then_lose_lease(job, source, target, records):
+        results = await copy_batch(job, source, target, records)
+        # 复制期间心跳过期，任务被其他进程接管
+        async with async_session_maker() as db:
+            await db.execute(
+                update(StorageMigrationJob)
+                .where(StorageMigrationJob.id == job.id)
+                .values(worker_id="other-worker")
+            )
+            await db.commit()
+        return results
+
+    monkeypatch.setattr(storage_migration, "_copy_batch", copy_then_lose_lease)
+    response = client.post(
+        "/api/v1/storage-migrations",
+        json={"target_backend_id": target_backend, "delete_source": True},
+    )
+    assert response.status_code == 201, response.text
+    job_id = response.json()["id"]
+    _wait_for_runner(job_id)
+
+    job = client.get(f"/api/v1/storage-migrations/{job_id}").json()
+    assert job["status"] == "running"
+    assert job["migrated_files"] == 0
+    assert job["failed_files"] == 0
+    for file in files:
+        record = client.get(f"/api/v1/files/{file['id']}").json()
+        assert record["storage_backend_id"] is None
+        assert client.get(record["download_url"]).status_code == 200
+
+    # 交还任务，避免影响其他测试
+    client.post(f"/api/v1/storage-migrations/{job_id}/cancel")
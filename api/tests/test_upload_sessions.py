@@ -0,0 +1,151 @@
+"""
+分片上传会话的完成流程：抢占会话、失败后可重试、提交后才删除暂存分片
+"""
+
+import os
+import time
+
+import httpx
+import pytest
+
+from app.app import app
+from app.database import async_session_maker
+from app.routers import uploads
+from app.services.upload_sessions import (
+    UPLOAD_SESSION_GC_INTERVAL,
+    cleanup_expired_sessions,
+    session_dir,
+)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _create_session(client, content: bytes) -> dict:
+    response = client.post(
+        "/api/v1/uploads/sessions",
+        json={
+            "filename": "session.bin",
+            "size": len(content),
+            "chunk_size": CHUNK_SIZE,
+        },
+    )
+    assert response.status_code == 200, response.text
+    session = response.json()
+    for part_number in range(session["part_count"]):
+        chunk = content[part_number * CHUNK_SIZE : (part_number + 1) * CHUNK_SIZE]
+        response = client.put(
+            f"/api/v1/uploads/sessions/{session['id']}/chunks/{part_number}",
+            content=chunk,
+        )
+        assert response.status_code == 200, response.text
+    return session
+
+
+def test_complete_removes_parts_after_commit(client):
+    content = os.urandom(CHUNK_SIZE * 2 + 10)
+    session = _create_session(client, content)
+    assert os.path.isdir(session_dir(session["id"]))
+
+    response = client.post(f"/api/v1/uploads/sessions/{session['id']}/complete")
+    assert response.status_code == 200, response.text
+    assert client.get(response.json()["download_url"]).content == content
+    assert not os.path.exists(session_dir(session["id"]))
+    assert client.get(f"/api/v1/uploads/sessions/{session['id']}").status_code == 404
+
+
+def test_failed_complete_keeps_parts_and_can_retry(client, monkeypatch):
+    content = os.urandom(CHUNK_SIZE + 10)
+    session = _create_session(client, content)
+
+    async def fail(*args, **kwargs):
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(uploads, "insert_file_records", fail)
+    with pytest.raises(RuntimeError):
+        client.post(f"/api/v1/uploads/sessions/{session['id']}/complete")
+    monkeypatch.undo()
+
+    # 会话和分片仍在，状态恢复为 uploading
+    response = client.get(f"/api/v1/uploads/sessions/{session['id']}")
+    assert response.json()["status"] == "uploading"
+    assert os.path.isdir(session_dir(session["id"]))
+
+    response = client.post(f"/api/v1/uploads/sessions/{session['id']}/complete")
+    assert response.status_code == 200, response.text
+    assert client.get(response.json()["download_url"]).content == content
+
+
+def test_completing_session_rejects_second_complete(client, monkeypatch):
+    content = os.urandom(CHUNK_SIZE)
+    session = _create_session(client, content)
+    second = {}
+    original = uploads._complete_session
+
+    async def complete_concurrently(db, upload_session, user_id):
+        # 第一个请求抢占会话后，其他请求不能再完成、上传分片或取消
+        url = f"/api/v1/uploads/sessions/{session['id']}"
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+            headers=client.headers,
+        ) as concurrent:
+            second["complete"] = (await concurrent.post(f"{url}/complete")).status_code
+            second["chunk"] = (
+                await concurrent.put(f"{url}/chunks/0", content=content)
+            ).status_code
+            second["abort"] = (await concurrent.delete(url)).status_code
+        return await original(db, upload_session, user_id)
+
+    monkeypatch.setattr(uploads, "_complete_session", complete_concurrently)
+    response = client.post(f"/api/v1/uploads/sessions/{session['id']}/complete")
+    assert response.status_code == 200, response.text
+    assert second == {"complete": 409, "chunk": 409, "abort": 409}
+
+
+def test_chunk_received_during_complete_is_rejected(client):
+    content = os.urandom(CHUNK_SIZE * 2)
+    session = _create_session(client, content)
+    url = f"/api/v1/uploads/sessions/{session['id']}"
+    statuses = {}
+
+    async def scenario():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+            headers=client.headers,
+        ) as concurrent:
+
+            async def body():
+                yield content[: CHUNK_SIZE // 2]
+                # 分片接收到一半时会话被完成，暂存目录随之删除
+                statuses["complete"] = (
+                    await concurrent.post(f"{url}/complete")
+                ).status_code
+                yield content[CHUNK_SIZE // 2 : CHUNK_SIZE]
+
+            response = await concurrent.put(f"{url}/chunks/0", content=body())
+            statuses["chunk"] = response.status_code
+
+    client.portal.call(scenario)
+    assert statuses == {"complete": 200, "chunk": 409}
+    assert not os.path.exists(session_dir(session["id"]))
+
+
+def test_gc_removes_session_dirs_without_session(client):
+    content = os.urandom(CHUNK_SIZE)
+    session = _create_session(client, content)
+    orphan = session_dir("orphan-session")
+    os.makedirs(orphan)
+    open(os.path.join(orphan, "0.part"), "wb").close()
+    stale = time.time() - UPLOAD_SESSION_GC_INTERVAL - 60
+    for path in (orphan, session_dir(session["id"])):
+        os.utime(path, (stale, stale))
+
+    async def cleanup():
+        async with async_session_maker() as db:
+            return await cleanup_expired_sessions(db)
+
+    assert client.portal.call(cleanup) == 1
+    assert not os.path.exists(orphan)
+    # 仍有会话记录的目录保留
+    assert os.path.isdir(session_dir(session["id"]))
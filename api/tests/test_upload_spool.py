@@ -0,0 +1,33 @@
+"""
+本地存储保存已落盘的上传文件：硬链接暂存文件，不再复制数据
+"""
+
+import os
+
+from app.services import storage_backend
+
+
+def test_spooled_upload_is_linked_into_storage(client, monkeypatch):
+    links = []
+    finalize_spooled = storage_backend.finalize_spooled
+
+    def record_links(fileobj, target_path):
+        finalized = finalize_spooled(fileobj, target_path)
+        # 暂存文件关闭前，与存储文件是同一个 inode
+        links.append(os.stat(target_path).st_nlink)
+        return finalized
+
+    monkeypatch.setattr(storage_backend, "finalize_spooled", record_links)
+    content = os.urandom(3 * 1024 * 1024)
+    response = client.post(
+        "/api/v1/files/",
+        files=[("files", ("large.bin", content, "application/octet-stream"))],
+    )
+    assert response.status_code == 200, response.text
+    assert links == [2]
+
+    file = response.json()[0]
+    download = client.get(file["download_url"])
+    assert download.content == content
+    # 请求结束后暂存文件已删除
+    assert os.listdir(storage_backend.UPLOAD_SPOOL_DIR) == []